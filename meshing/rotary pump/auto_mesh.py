@@ -2,41 +2,98 @@ import uuid
 from typing import Optional, Union
 import yaml
 from marshmallow import Schema, fields, validate, ValidationError, post_load
-import ansys.fluent.core as pyfluent
 import os
 import pathlib
-from dataclasses import dataclass
+import shutil
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
 
+import checkpoint
 import geometry_handler
+import journal
+import mesh_cache
+import mesh_quality
+import pmdb_converter
+import profiling
 import psutil
+import resources
+import run_registry
+
+# stages that write a mesh checkpoint to resume from
+CHECKPOINT_STAGES = ["run_diagnostics", "mesh"]
+
+# first stage affected by a change to each config field, the most specific
+# field wins. Fields not listed only change how the run is executed.
+STAGE_FIELDS = {
+    "precision": "geometry_import",
+    "geometry": "geometry_import",
+    "scoped": "scoped_sizing",
+    "size_field": "write_sf",
+    "mesh": "mesh",
+    "mesh.name": "save_mesh",
+}
 
 
 class AutoMesh:
     def __init__(self, precision, show_gui, geometry, scoped,
-                 size_field, mesh):
+                 size_field, mesh, processors=None, cache=True,
+                 journal_mode='memory', keep_journals=False, checkpoints=True,
+                 working_folder=None, quality=None, export_arrays=False,
+                 registry=True):
         """
         Auto Mesh class, handles all required attributes.
 
         :param precision: (str) single or double.
-        :param processors: (Int) number of cores to use.
         :param show_gui: (Bool) show fluent gui or not.
         :param geometry: (Geometry) class for geometry.
         :param scoped: (list[ScopedSizing]) list of scoped sizing's.
         :param size_field: (SizeField) size field class.
         :param mesh: (Mesh) mesh field class.
+        :param processors: (Int) number of cores to use, defaults to all
+            physical cores but two.
+        :param cache: (Bool) reuse meshes from identical earlier runs, and
+            size fields computed for the same geometry and scoped sizings.
+        :param journal_mode: (str) memory sends all stages to fluent as one
+            command stream, files reads one journal file per stage.
+        :param keep_journals: (Bool) write the journals to disk in memory mode.
+        :param checkpoints: (Bool) save the surface and volume mesh after the
+            stages in CHECKPOINT_STAGES, so a failed run can be resumed.
+        :param working_folder: (str) existing working folder to continue in,
+            a new one is made if not given.
+        :param quality: (Quality) mesh quality gates, the run stops at the
+            first stage whose mesh fails one.
+        :param export_arrays: (Bool) also export a new mesh to a mesh_export
+            array folder next to it.
+        :param registry: (Bool) record finished runs in the run registry.
         """
 
+        # the working folder is only made once a run needs it, not for cache hits
         self.cwd = os.path.dirname(__file__)
-        self.uuid = uuid.uuid4().hex[:5]
-        self.working_folder = pathlib.Path(self.cwd) / f'automesh_{self.uuid}'
-        self.working_folder.mkdir(exist_ok=False)
+        if working_folder is None:
+            self.uuid = uuid.uuid4().hex[:5]
+            self.working_folder = pathlib.Path(self.cwd) / f'automesh_{self.uuid}'
+        else:
+            self.working_folder = pathlib.Path(working_folder)
+            self.uuid = self.working_folder.name.split('_')[-1]
 
         self.journals = 'journals'
         self.journal_folder = self.working_folder.joinpath(self.journals)
-        self.journal_folder.mkdir(exist_ok=False)
+        self.journal_mode = journal_mode
+        self.keep_journals = keep_journals
+        self.tracker = journal.StageTracker()
+        self.tracker.on_complete.append(self.stage_completed)
+
+        self.quality = quality or Quality()
+        self.quality_monitor = mesh_quality.QualityMonitor()
+        self.tracker.listeners.append(self.quality_monitor)
+
+        self.checkpoints = checkpoints
+        self.checkpoint_folder = self.working_folder.joinpath('checkpoints')
+        self.manifest = checkpoint.Manifest(self.working_folder)
 
         self.precision = precision
-        self.processors = self.cores_available()-2
+        self.processors = processors or max(self.cores_available()-2, 1)
         self.show_gui = show_gui
 
         self.geometry = geometry
@@ -46,6 +103,14 @@ class AutoMesh:
 
         self.mesh = mesh
 
+        self.cache = cache
+        self.export_arrays = export_arrays
+        self.registry = registry
+        self.mesh_cache = mesh_cache.MeshCache()
+        self.size_field_cache = mesh_cache.SizeFieldCache()
+        self.size_field_key = None
+        self.geometry_hash = None
+
         self.mesh_file = None
         self.meshing = None
         self.tui = None
@@ -57,6 +122,7 @@ class AutoMesh:
         :param command_name:
         :param command:
         """
+        self.journal_folder.mkdir(parents=True, exist_ok=True)
         save_file_path = os.path.join(self.journal_folder, f"{command_name}.jou")
 
         with open(save_file_path, "w+") as f:
@@ -64,40 +130,429 @@ class AutoMesh:
 
         return save_file_path
 
-    def run(self):
+    def geometry_path(self):
+        """
+        Path to the geometry file.
+
+        :return:
+        """
+        return self.geometry.name + '.' + self.geometry.type \
+            if not self.geometry.name.endswith(self.geometry.type) else self.geometry.name
+
+    def cache_config(self):
+        """
+        The parts of the config the finished mesh depends on. The geometry
+        is identified by its contents rather than its path.
+
+        :return:
+        """
+        return {
+            'precision': self.precision,
+            'geometry_type': self.geometry.type,
+            'scoped': self.scoped,
+            'size_field': self.size_field,
+            'mesh': self.mesh,
+        }
+
+    def hash_geometry(self):
+        """
+        Hash the geometry contents once per run, for the cache keys, the
+        pmdb lookup and the manifest.
+
+        :return: (str) hash of the geometry file.
+        """
+        self.geometry_hash = mesh_cache.file_hash(self.geometry_path())
+        return self.geometry_hash
+
+    def cache_key(self):
+        """
+        Key of this mesh in the mesh cache.
+
+        :return:
+        """
+        return self.mesh_cache.key(self.geometry_hash or self.hash_geometry(), self.cache_config())
+
+    def launch_kwargs(self):
+        """
+        Arguments used to launch fluent for this config, e.g. to fill a
+        session_pool.SessionPool.
+
+        :return:
+        """
+        return dict(mode="meshing",
+                    precision=self.precision,
+                    processor_count=self.processors,
+                    show_gui=self.show_gui)
+
+    def run(self, session=None):
         """
-        Run the meshing process.
+        Run the meshing process. Returns a cached mesh without launching
+        fluent when an identical mesh has been made before.
+
+        :param session: running meshing session to use, e.g. from a
+            session_pool.SessionPool. It is left open, otherwise fluent is
+            launched for this run and exited afterwards.
+        :return: path to the mesh file.
         """
-        self.meshing = pyfluent.launch_fluent(mode="meshing",
-                                              precision=self.precision,
-                                              processor_count=self.processors,
-                                              show_gui=self.show_gui)
+        self.hash_geometry()
+        key = self.cache_key() if self.cache else None
+
+        if key is not None:
+            cached = self.mesh_cache.get(key)
+            if cached is not None:
+                print(f'Using cached mesh {cached}')
+                self.mesh_file = cached
+                return self.mesh_file
+
+        self.working_folder.mkdir(parents=True, exist_ok=True)
+        self.invalidate()
 
-        self.tui = self.meshing.tui
-        self.tui.file.read_journal(self.import_geometry())
-        self.tui.file.read_journal(self.scoped_sizings())
-        self.tui.file.read_journal(self.write_size_field(self.size_field_path))
-        self.tui.file.read_journal(self.load_size_field(self.size_field_path))
-        self.tui.file.read_journal(self.run_diagnostics())
-        self.tui.file.read_journal(self.compute_mesh())
-        self.tui.file.read_journal(self.auto_node_move())
-        self.tui.file.read_journal(self.check_mesh())
-        self.tui.file.read_journal(self.save_mesh())
-        self.tui.exit()
+        stages = self.remaining_stages()
+        if not stages:
+            self.mesh_file = pathlib.Path(self.manifest.data['mesh_file'])
+            return self.mesh_file
+
+        if self.cache:
+            stages = self.use_stored_size_field(stages)
+
+        profiler = profiling.Profiler(self.working_folder)
+        profiler.watch(os.getpid())
+
+        self.meshing = None
+        try:
+            with profiler.stage("launch"):
+                if session is None:
+                    # pyfluent is only imported when fluent is launched, so
+                    # cache hits and config checks start quickly
+                    import ansys.fluent.core as pyfluent
+
+                    self.meshing = pyfluent.launch_fluent(**self.launch_kwargs())
+                else:
+                    self.meshing = session
+            pid = resources.fluent_pid(self.meshing)
+            if pid is not None:
+                profiler.watch(pid)
+
+            self.tui = self.meshing.tui
+            self.execute(stages)
+        finally:
+            if session is None and self.meshing is not None:
+                self.meshing.tui.exit()
+
+            for timing in self.tracker.timings:
+                profiler.record(*timing)
+            if self.tracker.stage is not None:
+                profiler.record(f'{self.tracker.stage} (failed)',
+                                self.tracker.history[-1][1], time.time())
+            profiler.write()
+            print(profiler.table())
+            self.quality_monitor.write(self.working_folder / 'quality.json')
+
+        if key is not None:
+            self.mesh_cache.put(key, self.mesh_file, self.cache_config())
+
+        if self.export_arrays:
+            import mesh_export
+
+            print(f'Exported arrays to {mesh_export.export(self.mesh_file, config=self.manifest.config)}')
+
+        if self.registry:
+            self.register()
+
+        return self.mesh_file
+
+    def register(self, path=run_registry.REGISTRY):
+        """
+        Record the finished run in the run registry. A registry that can not
+        be written to, or a working folder without a finished run, is
+        reported, the mesh is still returned.
+
+        :param path: (os.Pathlike) registry database.
+        """
+        record = run_registry.folder_record(self.working_folder)
+        if record is None:
+            print(f'Run {self.uuid} was not registered: {self.working_folder} holds no finished run')
+            return
+
+        try:
+            with run_registry.Registry(path) as registry:
+                registry.add(**record)
+        except sqlite3.Error as error:
+            print(f'Run {self.uuid} was not registered: {error}')
+
+    @classmethod
+    def resume(cls, working_folder, session=None):
+        """
+        Continue a failed run from the last stage with a checkpoint.
+
+        :param working_folder: working folder of the failed run.
+        :param session: running meshing session to use.
+        :return: path to the mesh file.
+        """
+        manifest = checkpoint.Manifest(working_folder)
+        if manifest.config is None:
+            raise FileNotFoundError(f'No run to resume in {working_folder}.')
+
+        config = dict(manifest.config, working_folder=str(working_folder))
+        mesher = AutoMeshSchema().load(config)
+
+        return mesher.run(session)
+
+    def invalidate(self):
+        """
+        Compare the config and geometry with those of the last run in the
+        working folder. Stages affected by a change are forgotten along with
+        the stages after them, so the run restarts from the checkpoint just
+        before the first affected stage.
+
+        :return: list of changed config fields.
+        """
+        config = AutoMeshSchema(exclude=['working_folder']).dump(self)
+        geometry_hash = self.geometry_hash or self.hash_geometry()
+
+        changes = []
+        if self.manifest.config is not None:
+            changes = changed_fields(self.manifest.config, config)
+        if self.manifest.data.get('geometry_hash', geometry_hash) != geometry_hash:
+            changes.append('geometry')
+
+        names = [name for name, _ in self.stages()]
+        affected = [names.index(stage) for stage in map(affected_stage, changes) if stage]
+
+        if affected:
+            first = min(affected)
+            print(f'Config changed ({", ".join(changes)}), rerunning from {names[first]}')
+            self.manifest.reset(names[first:])
+
+        self.manifest.data['geometry_hash'] = geometry_hash
+        self.manifest.config = config
+
+        return changes
+
+    def checkpoint_path(self, stage):
+        return self.checkpoint_folder.joinpath(stage).with_suffix('.msh')
+
+    def stage_completed(self, stage):
+        """
+        Record a completed stage and the checkpoint it left in the manifest.
+
+        :param stage: name of the stage.
+        """
+        artifact = None
+
+        if stage == "write_sf":
+            artifact = self.size_field_path
+            if self.size_field_key is not None and self.size_field_path.exists():
+                self.size_field_cache.put(self.size_field_key, self.size_field_path, self.scoped)
+        elif stage in CHECKPOINT_STAGES and self.checkpoints:
+            artifact = self.checkpoint_path(stage)
+        elif stage == "save_mesh":
+            self.manifest.data['mesh_file'] = str(self.mesh_file)
+
+        self.manifest.complete(stage, artifact)
+
+    def remaining_stages(self):
+        """
+        Stages still to run according to the manifest. When earlier stages
+        left a checkpoint the run restarts after the latest one, with a stage
+        restoring the checkpoint first.
+
+        :return: list of stage names and command builders.
+        """
+        stages = self.stages()
+        names = [name for name, _ in stages]
+        completed = self.manifest.completed(names)
+
+        if completed == len(names):
+            return []
+
+        for index in reversed(range(completed)):
+            artifact = self.manifest.checkpoint(names[index])
+            if artifact is None:
+                continue
+
+            if names[index] == "write_sf":
+                # the size field is read back against the imported geometry
+                restore = [stages[0]]
+            else:
+                restore = [("load_checkpoint",
+                            lambda: geometry_handler.import_mesh(artifact, 0))]
+
+            print(f'Resuming after {names[index]} from {artifact}')
+            return restore + stages[index + 1:]
+
+        return stages
+
+    def use_stored_size_field(self, stages):
+        """
+        Skip computing the size field when one was stored for the same
+        geometry and scoped sizings. The stored size field is copied to the
+        working folder and read as usual.
+
+        :param stages: list of stage names and command builders.
+        :return: stages left to execute.
+        """
+        names = [name for name, _ in stages]
+        if "scoped_sizing" not in names:
+            return stages
+
+        self.size_field_key = self.size_field_cache.key(self.geometry_hash or self.hash_geometry(), self.scoped)
+        stored = self.size_field_cache.get(self.size_field_key)
+        if stored is None:
+            return stages
+
+        print(f'Using stored size field {stored}')
+        shutil.copy2(stored, self.size_field_path)
+        self.manifest.complete("scoped_sizing")
+        self.manifest.complete("write_sf", self.size_field_path)
+
+        return [(name, build) for name, build in stages
+                if name not in ("scoped_sizing", "write_sf")]
+
+    def with_checkpoint(self, stage, build):
+        """
+        Append writing a checkpoint mesh to a stage.
+
+        :param stage: name of the stage.
+        :param build: command builder of the stage.
+        :return: command builder.
+        """
+        if not self.checkpoints or stage not in CHECKPOINT_STAGES:
+            return build
+
+        def build_with_checkpoint():
+            self.checkpoint_folder.mkdir(parents=True, exist_ok=True)
+            return build() + geometry_handler.write_mesh(self.checkpoint_path(stage))
+
+        return build_with_checkpoint
+
+    def stages(self):
+        """
+        Pipeline stages in order. Commands are built when the stage is
+        executed, so each builder can rely on the stages before it.
+
+        :return: list of stage names and command builders.
+        """
+        stages = [
+            ("geometry_import", self.import_geometry),
+            ("scoped_sizing", self.scoped_sizings),
+            ("write_sf", lambda: self.write_size_field(self.size_field_path)),
+            ("read_sf", lambda: self.load_size_field(
+                self.size_field_path, must_exist=self.journal_mode == 'files')),
+            ("run_diagnostics", self.run_diagnostics),
+            ("mesh", self.compute_mesh),
+            ("auto_node_move", self.auto_node_move),
+            ("get_summary", self.check_mesh),
+            ("save_mesh", self.save_mesh),
+        ]
+
+        return [(stage, self.with_checkpoint(stage, build))
+                for stage, build in stages]
+
+    def execute(self, stages):
+        """
+        Execute pipeline stages in the running session.
+
+        In memory mode the commands of every stage are sent to fluent as a
+        command stream with stage markers, in files mode each stage is
+        written to a journal and read separately. The stream is split after
+        each stage with quality gates, so a failed gate stops the run before
+        the next stage starts. An error in the transcript raises a StageError
+        for the stage that reported it once its journal or stream returns.
+
+        :param stages: list of stage names and command builders.
+        """
+        callback = self.meshing.transcript.register_callback(self.tracker)
+        try:
+            if self.journal_mode == 'files':
+                for stage, build in stages:
+                    self.tracker.enter(stage)
+                    self.tui.file.read_journal(
+                        self.write_journal(stage, f'{build()}\n{journal.end_marker(stage)}'))
+                    self.wait_for_transcript(stage)
+                    self.tracker.raise_errors()
+                    self.check_quality(stage)
+            else:
+                commands = [(stage, build()) for stage, build in stages]
+
+                if self.keep_journals:
+                    for stage, command in commands:
+                        self.write_journal(stage, command)
+                    self.write_journal("automesh", journal.consolidate(commands))
+
+                for segment in self.segments(commands):
+                    stage = segment[-1][0]
+                    self.meshing.execute_tui(
+                        f'{journal.consolidate(segment)}\n{journal.end_marker(stage)}')
+                    self.wait_for_transcript(stage)
+                    self.tracker.raise_errors()
+                    self.check_quality(stage)
+        except journal.StageError:
+            raise
+        except Exception as error:
+            raise journal.StageError(self.tracker.stage, error) from error
+        finally:
+            self.meshing.transcript.unregister_callback(callback)
+
+        self.tracker.finish()
+
+    def wait_for_transcript(self, stage):
+        """
+        Wait until the transcript of a journal or stream has been received,
+        so errors and quality reports printed at its end are not missed.
+
+        :param stage: name of the last stage in it.
+        """
+        if not self.tracker.wait(stage):
+            raise journal.StageError(stage, 'the transcript did not reach the end marker')
+
+    @staticmethod
+    def segments(commands):
+        """
+        Split stage commands into command streams ending at stages with
+        quality gates.
+
+        :param commands: list of stage names and commands.
+        :return: list of segments.
+        """
+        segments = [[]]
+
+        for stage, command in commands:
+            segments[-1].append((stage, command))
+            if stage in mesh_quality.STAGE_GATES:
+                segments.append([])
+
+        return [segment for segment in segments if segment]
+
+    def check_quality(self, stage):
+        """
+        Check the mesh metrics reported by a stage against the quality gates.
+
+        :param stage: name of the stage.
+        """
+        failures = self.quality_monitor.check(stage, asdict(self.quality))
+
+        if failures:
+            raise mesh_quality.QualityError(stage, failures)
 
     def import_geometry(self):
         """
-        Imports geometry given filepath.
+        Imports geometry given filepath. A pmdb converted from the current
+        geometry by pmdb_converter is imported instead when there is one.
 
         :return:
         """
+        geometry = self.geometry_path()
 
-        file_path = self.geometry.name + '.' + self.geometry.type \
-            if not self.geometry.name.endswith(self.geometry.type) else self.geometry.name
+        if self.geometry.type != 'pmdb':
+            pmdb = pmdb_converter.lookup(geometry, self.geometry_hash)
+            if pmdb is not None:
+                print(f'Importing converted geometry {pmdb}')
+                geometry = pmdb
 
-        command = geometry_handler.import_geometry(file_path)
+        command = geometry_handler.import_geometry(geometry)
 
-        return self.write_journal("geometry_import", command)
+        return command
 
     def scoped_sizings(self):
         """
@@ -153,7 +608,7 @@ class AutoMesh:
 
         command = '\n'.join(journal)
 
-        return self.write_journal("scoped_sizing", command)
+        return command
 
     @staticmethod
     def boi_scoped_sizing(name, max_size, growth, selection,
@@ -222,18 +677,18 @@ class AutoMesh:
         return command
     
     @staticmethod
-    def cores_available(self):
+    def cores_available():
         return psutil.cpu_count(logical=False)
 
     def write_size_field(self, name):
         command = f'''
-        file write-size-field {name}
+        file write-size-field "{name}"
         '''
 
-        return self.write_journal("write_sf", command)
+        return command
 
-    def load_size_field(self, name):
-        if not name.exists():
+    def load_size_field(self, name, must_exist=True):
+        if must_exist and not name.exists():
             raise FileNotFoundError(f'Cannot find size field {name}.')
 
         command = f'''
@@ -241,7 +696,7 @@ class AutoMesh:
         file/import/cad , , , , , , mm ok
         '''
 
-        return self.write_journal("read_sf", command)
+        return command
 
     def run_diagnostics(self):
         command = f'''
@@ -249,9 +704,9 @@ class AutoMesh:
         diagnostics/quality general-improve objects * () skewness 0.9 30 15 yes q
         diagnostics/quality delaunay-swap objects * () 0.9 40 15 yes q
         diagnostics/quality smooth objects * () 15 yes q
-        '''
+        ''' + mesh_quality.face_report()
 
-        return self.write_journal("run_diagnostics", command)
+        return command
 
     def compute_mesh(self):
 
@@ -262,30 +717,89 @@ class AutoMesh:
         objects/volumetric-regions change-type fluid_domain:fluid_domain-enclosure "rocket_body" () dead
         mesh/scoped-prisms create rocket_inf uniform {self.mesh.initial_layer} {self.mesh.layers} {self.mesh.growth} fluid_domain:fluid_domain-enclosure fluid-regions selected-face-zones "{zones}"
         mesh/auto-mesh fluid_domain:fluid_domain-enclosure no scoped pyramids poly-hexcore yes
-        '''
+        ''' + mesh_quality.cell_report()
 
-        return self.write_journal("mesh", command)
+        return command
 
     def auto_node_move(self):
         command = f'''
         mesh/modify/auto-node-move "*" "*" , , , , 10
         '''
 
-        return self.write_journal("auto_node_move", command)
+        return command
 
     def check_mesh(self):
         command = f'''
         mesh check-mesh
         '''
 
-        return self.write_journal("get_summary", command)
+        return command
 
     def save_mesh(self):
         self.mesh_file = self.working_folder.joinpath(f'{self.mesh.name}_{self.uuid}').with_suffix(".msh")
 
         command = geometry_handler.write_mesh(self.mesh_file)
 
-        return self.write_journal("save_mesh", command)
+        return command
+
+
+def changed_fields(old, new, prefix=''):
+    """
+    Fields that differ between two dumped configs, nested fields joined by
+    dots. Lists are compared as a whole.
+
+    :param old: (dict) previous config.
+    :param new: (dict) current config.
+    :param prefix: (str) path of the configs within the full config.
+    :return: (list[str]) changed fields.
+    """
+    changes = []
+
+    for key in sorted(set(old) | set(new)):
+        field = f'{prefix}{key}'
+        if isinstance(old.get(key), dict) and isinstance(new.get(key), dict):
+            changes.extend(changed_fields(old[key], new[key], f'{field}.'))
+        elif old.get(key) != new.get(key):
+            changes.append(field)
+
+    return changes
+
+
+def affected_stage(field):
+    """
+    First pipeline stage affected by a config field.
+
+    :param field: (str) dotted config field, e.g. mesh.layers.
+    :return: (str) stage name or None if no stage depends on it.
+    """
+    parts = field.split('.')
+
+    for end in reversed(range(1, len(parts) + 1)):
+        stage = STAGE_FIELDS.get('.'.join(parts[:end]))
+        if stage:
+            return stage
+
+    return None
+
+
+def load_config(file_path, **overrides):
+    """
+    Load an auto mesh config.
+
+    :param file_path: (os.Pathlike) yaml config.
+    :param overrides: top level config values to replace, e.g. processors.
+    :return: (AutoMesh)
+    """
+    with open(file_path) as auto_mesh_config:
+        data = yaml.safe_load(auto_mesh_config)
+
+    if 'matrix' in data:
+        raise ValueError(f'{file_path} has a matrix section, run its jobs with mesh_farm.py '
+                         f'or config_matrix.load')
+
+    data.update(overrides)
+
+    return AutoMeshSchema().load(data)
 
 
 def validate_greater_than(n, num):
@@ -313,8 +827,8 @@ class ScopedSizingSchema(Schema):
     type = fields.Str(validate=validate.OneOf(["boi", "proximity", "curve"]))
     max = fields.Int(validate=lambda x: validate_greater_than(x, 0))
     growth = fields.Float(validate=lambda x: validate_greater_than(x, 1))
-    cells = fields.Int(validate=lambda x: validate_greater_than(x, 0), required=False)
-    curve = fields.Int(validate=lambda x: validate_greater_than(x, 0), required=False)
+    cells = fields.Int(validate=lambda x: validate_greater_than(x, 0), required=False, allow_none=True)
+    curve = fields.Int(validate=lambda x: validate_greater_than(x, 0), required=False, allow_none=True)
     zone = fields.List(fields.Str())
 
     @post_load
@@ -333,6 +847,25 @@ class ScopedSizing:
     curve: Optional[int] = None
 
 
+class QualitySchema(Schema):
+    surface_skewness = fields.Float(allow_none=True)
+    skewness = fields.Float(allow_none=True)
+    orthogonal_quality = fields.Float(allow_none=True)
+    negative_volumes = fields.Int(allow_none=True)
+
+    @post_load
+    def make_user(self, data, **kwargs):
+        return Quality(**data)
+
+
+@dataclass
+class Quality:
+    surface_skewness: Optional[float] = 0.95
+    skewness: Optional[float] = None
+    orthogonal_quality: Optional[float] = 0.01
+    negative_volumes: Optional[int] = 0
+
+
 class SizeFieldSchema(Schema):
     name = fields.Str()
 
@@ -375,6 +908,14 @@ class AutoMeshSchema(Schema):
     geometry = fields.Nested(GeometrySchema)
     size_field = fields.Nested(SizeFieldSchema)
     mesh = fields.Nested(MeshSchema)
+    cache = fields.Bool()
+    journal_mode = fields.Str(validate=validate.OneOf(['memory', 'files']))
+    keep_journals = fields.Bool()
+    checkpoints = fields.Bool()
+    working_folder = fields.Str()
+    quality = fields.Nested(QualitySchema)
+    export_arrays = fields.Bool()
+    registry = fields.Bool()
 
     @post_load
     def make_user(self, data, **kwargs):
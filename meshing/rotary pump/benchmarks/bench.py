@@ -0,0 +1,281 @@
+import argparse
+import atexit
+import json
+import os
+import pathlib
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+
+import numpy as np
+import yaml
+
+HERE = pathlib.Path(__file__).resolve().parent
+sys.path.append(str(HERE.parent))
+
+import auto_mesh
+import geometry_handler
+import journal
+import mesh_settings
+
+BASELINE = HERE / 'baseline.json'
+BENCHMARKS = {}
+
+# scratch files (geometry, working folders) used by the benchmarks
+SCRATCH = pathlib.Path(tempfile.mkdtemp(prefix='automesh_bench_'))
+atexit.register(shutil.rmtree, SCRATCH, ignore_errors=True)
+
+
+def benchmark(name):
+    """
+    Register a benchmark. The decorated function does the setup and returns
+    the callable that is timed.
+
+    :param name: (str) benchmark name, used as the key in the baseline.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def geometry_file():
+    path = SCRATCH / 'geometry.scdoc'
+    path.touch()
+    return path
+
+
+def config(scoped=300):
+    """
+    Auto mesh config with a given number of scoped sizings, cycling through
+    the sizing types.
+
+    :param scoped: (int) number of scoped sizings.
+    :return: (dict) config as loaded from yaml.
+    """
+    types = [
+        {'type': 'boi', 'max': 100, 'growth': 1.2},
+        {'type': 'curve', 'max': 16, 'growth': 1.2, 'curve': 10},
+        {'type': 'proximity', 'max': 8, 'growth': 1.2, 'cells': 8},
+    ]
+
+    return {
+        'precision': 'double',
+        'processors': 4,
+        'show_gui': False,
+        'cache': False,
+        'working_folder': str(SCRATCH / 'automesh_bench'),
+        'geometry': {'name': str(geometry_file()), 'type': 'scdoc'},
+        'scoped': [{'name': f'sizing_{i}', 'zone': [f'zone_{i}', f'zone_{i + 1}'],
+                    **types[i % len(types)]} for i in range(scoped)],
+        'size_field': {'name': 'bench_size_field'},
+        'mesh': {'name': 'bench_mesh', 'initial_layer': 0.5, 'layers': 15,
+                 'growth': 1.08, 'zone': [f'zone_{i}' for i in range(50)]},
+    }
+
+
+@benchmark('mesh_settings.calcs')
+def bench_calcs():
+    grid = [(v, l, y) for v in np.linspace(20, 600, 20)
+            for l in np.linspace(0.5, 4.5, 10)
+            for y in np.linspace(40, 190, 10)]
+
+    def run():
+        for velocity, length, yplus in grid:
+            mesh_settings.calcs(mesh_settings.RHO, mesh_settings.MU, velocity, length, yplus)
+
+    return run
+
+
+@benchmark('mesh_settings.get_table')
+def bench_get_table():
+    points = [mesh_settings.calcs(mesh_settings.RHO, mesh_settings.MU, v, 3, y)
+              for v in (50, 170, 340) for y in (50, 100, 150)]
+
+    def run():
+        for y1, BL in points:
+            mesh_settings.get_table(y1, BL)
+
+    return run
+
+
+@benchmark('mesh_settings.layer_grid')
+def bench_layer_grid():
+    yplus = np.linspace(35, 195, 40)
+    velocity = np.linspace(20, 1000, 50)
+    length = np.linspace(0.5, 4.5, 20)
+
+    return lambda: mesh_settings.layer_grid(yplus, velocity, length)
+
+
+@benchmark('AutoMeshSchema.load')
+def bench_schema():
+    text = yaml.safe_dump(config())
+
+    return lambda: auto_mesh.AutoMeshSchema().load(yaml.safe_load(text))
+
+
+@benchmark('AutoMesh.scoped_sizings')
+def bench_scoped_sizings():
+    mesher = auto_mesh.AutoMeshSchema().load(config())
+
+    return mesher.scoped_sizings
+
+
+@benchmark('AutoMesh.compute_mesh')
+def bench_compute_mesh():
+    mesher = auto_mesh.AutoMeshSchema().load(config())
+
+    return mesher.compute_mesh
+
+
+@benchmark('journal.consolidate')
+def bench_consolidate():
+    mesher = auto_mesh.AutoMeshSchema().load(config())
+    commands = [(stage, build()) for stage, build in mesher.stages()
+                if stage != 'read_sf']
+
+    return lambda: journal.consolidate(commands)
+
+
+@benchmark('geometry_handler')
+def bench_geometry_handler():
+    path = geometry_file()
+    mesh_file = SCRATCH / 'mesh.msh'
+
+    def run():
+        for iteration in range(100):
+            geometry_handler.import_geometry(path)
+            geometry_handler.save_pmdb(path, iteration)
+            geometry_handler.import_mesh(path, iteration)
+            geometry_handler.write_mesh(mesh_file)
+
+    return run
+
+
+def measure(run, repeat=5, min_time=0.2):
+    """
+    Time a callable, calling it enough times per repeat to last min_time.
+
+    :param run: callable to time.
+    :param repeat: (int) number of repeats.
+    :param min_time: (float) minimum seconds per repeat.
+    :return: (dict) best and median seconds per call, and calls per repeat.
+    """
+    timer = timeit.Timer(run)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    times = [t / number for t in timer.repeat(repeat, number)]
+
+    return {'best': min(times), 'median': statistics.median(times), 'number': number}
+
+
+def machine():
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'processor': platform.processor(), 'cpus': os.cpu_count()}
+
+
+def run_benchmarks(names=None, repeat=5, min_time=0.2):
+    """
+    Run the registered benchmarks.
+
+    :param names: (list[str]) benchmark names to run, all if None.
+    :param repeat: (int) number of repeats.
+    :param min_time: (float) minimum seconds per repeat.
+    :return: (dict) results keyed by benchmark name.
+    """
+    results = {}
+
+    for name, setup in BENCHMARKS.items():
+        if names and not any(selected in name for selected in names):
+            continue
+        results[name] = measure(setup(), repeat, min_time)
+
+    return results
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compare results against a baseline. A benchmark regresses when its best
+    time is more than tolerance slower than the baseline.
+
+    :param results: (dict) output of run_benchmarks.
+    :param baseline: (dict) saved results.
+    :param tolerance: (float) allowed slowdown as a fraction.
+    :return: (list[dict]) rows of name, baseline, current, ratio and status.
+    """
+    rows = []
+
+    for name, result in results.items():
+        reference = baseline.get(name)
+        ratio = result['best'] / reference['best'] if reference else None
+
+        if ratio is None:
+            status = 'new'
+        elif ratio > 1 + tolerance:
+            status = 'REGRESSION'
+        elif ratio < 1 / (1 + tolerance):
+            status = 'faster'
+        else:
+            status = 'ok'
+
+        rows.append({'name': name, 'baseline': reference['best'] if reference else None,
+                     'current': result['best'], 'ratio': ratio, 'status': status})
+
+    return rows
+
+
+def table(rows):
+    lines = [f'{"benchmark":<28} {"baseline (ms)":>13} {"current (ms)":>12} {"ratio":>6}  status']
+
+    for row in rows:
+        baseline = f'{row["baseline"] * 1e3:.3f}' if row['baseline'] else '-'
+        ratio = f'{row["ratio"]:.2f}' if row['ratio'] else '-'
+        lines.append(f'{row["name"]:<28} {baseline:>13} {row["current"] * 1e3:>12.3f} '
+                     f'{ratio:>6}  {row["status"]}')
+
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('names', nargs='*',
+                        help="only run benchmarks whose name contains one of these")
+    parser.add_argument('--baseline', default=BASELINE, action='store',
+                        help="json file with the baseline results")
+    parser.add_argument('--save', action='store_true',
+                        help="save the results as the new baseline")
+    parser.add_argument('--tolerance', default=0.25, action='store', type=float,
+                        help="allowed slowdown relative to the baseline, 0.25 is 25%%")
+    parser.add_argument('--repeat', default=5, action='store', type=int,
+                        help="timing repeats per benchmark")
+    args = parser.parse_args()
+
+    baseline_file = pathlib.Path(args.baseline)
+    saved = {}
+    if baseline_file.exists():
+        with open(baseline_file) as f:
+            saved = json.load(f)
+        if saved.get('machine') != machine():
+            print(f'Baseline was recorded on a different machine: {saved.get("machine")}')
+
+    results = run_benchmarks(args.names, args.repeat)
+    rows = compare(results, saved.get('results', {}), args.tolerance)
+    print(table(rows))
+
+    if args.save:
+        with open(baseline_file, 'w') as f:
+            json.dump({'machine': machine(), 'time': time.time(),
+                       'results': {**saved.get('results', {}), **results}}, f, indent=2)
+        print(f'Baseline saved to {baseline_file}')
+
+    regressions = [row['name'] for row in rows if row['status'] == 'REGRESSION']
+    if regressions:
+        print(f'{len(regressions)} regression(s): {", ".join(regressions)}')
+        sys.exit(1)
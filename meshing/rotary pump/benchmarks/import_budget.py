@@ -0,0 +1,122 @@
+import argparse
+import json
+import pathlib
+import subprocess
+import sys
+
+HERE = pathlib.Path(__file__).resolve().parent
+ROOT = HERE.parent
+
+# scripts that are run from the command line or sweep drivers
+ENTRY_POINTS = {
+    'auto_mesh': ROOT / 'auto_mesh.py',
+    'mesh_settings': ROOT / 'mesh_settings.py',
+    'mesh_farm': ROOT / 'mesh_farm.py',
+    'config_matrix': ROOT / 'config_matrix.py',
+    'pmdb_converter': ROOT / 'pmdb_converter.py',
+    'msh_reader': ROOT / 'msh_reader.py',
+    'mesh_export': ROOT / 'mesh_export.py',
+    'watertight mesh': ROOT / 'watertight_workflow' / 'mesh.py',
+    'watertight solve': ROOT / 'watertight_workflow' / 'solve.py',
+}
+
+# packages that must only be imported by the code paths that use them
+HEAVY = ['ansys', 'pandas', 'scipy', 'requests', 'pyvista', 'vtk', 'matplotlib']
+
+PROBE = '''
+import json, sys
+sys.path.insert(0, {folder!r})
+import {module}
+print(json.dumps(sorted({{name.split('.')[0] for name in sys.modules}})))
+'''
+
+
+def import_time(script: pathlib.Path):
+    """
+    Import a script in a fresh interpreter.
+
+    :param script: (pathlib.Path) python file.
+    :return: (tuple[float, list[str]]) seconds spent importing the script and
+        the top level packages loaded by it.
+    """
+    probe = PROBE.format(folder=str(script.parent), module=script.stem)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe],
+                            cwd=script.parent, capture_output=True, text=True)
+
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+
+    # lines are "import time: self [us] | cumulative | imported package"
+    seconds = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.strip() == script.stem and cumulative.strip().isdigit():
+            seconds = int(cumulative) / 1e6
+
+    return seconds, json.loads(result.stdout.splitlines()[-1])
+
+
+def check(names=None, budget=0.5, repeat=3):
+    """
+    Time the import of each entry point against a budget.
+
+    :param names: (list[str]) only check entry points whose name contains one
+        of these.
+    :param budget: (float) seconds an entry point may take to import.
+    :param repeat: (int) imports per entry point, the fastest is kept.
+    :return: (list[dict]) rows with the time, heavy packages and status.
+    """
+    rows = []
+
+    for name, script in ENTRY_POINTS.items():
+        if names and not any(part in name for part in names):
+            continue
+
+        row = {'name': name, 'seconds': None, 'heavy': [], 'status': 'ok'}
+        try:
+            runs = [import_time(script) for _ in range(repeat)]
+        except ImportError as error:
+            row['status'] = f'ERROR {error}'
+            rows.append(row)
+            continue
+
+        row['seconds'] = min(seconds for seconds, _ in runs)
+        row['heavy'] = [package for package in HEAVY if package in runs[0][1]]
+
+        if row['heavy']:
+            row['status'] = 'HEAVY IMPORT'
+        elif row['seconds'] > budget:
+            row['status'] = 'OVER BUDGET'
+        rows.append(row)
+
+    return rows
+
+
+def table(rows, budget):
+    lines = [f'{"entry point":<20} {"import (s)":>10} {"budget (s)":>10}  status']
+    for row in rows:
+        seconds = f'{row["seconds"]:.3f}' if row['seconds'] is not None else '-'
+        heavy = f' ({", ".join(row["heavy"])})' if row['heavy'] else ''
+        lines.append(f'{row["name"]:<20} {seconds:>10} {budget:>10.3f}  {row["status"]}{heavy}')
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('names', nargs='*',
+                        help="only check entry points whose name contains one of these")
+    parser.add_argument('--budget', default=0.5, action='store', type=float,
+                        help="seconds an entry point may take to import")
+    parser.add_argument('--repeat', default=3, action='store', type=int,
+                        help="imports per entry point, the fastest is kept")
+    args = parser.parse_args()
+
+    rows = check(args.names, args.budget, args.repeat)
+    print(table(rows, args.budget))
+
+    failed = [row['name'] for row in rows if row['status'] != 'ok']
+    if failed:
+        print(f'{len(failed)} entry point(s) failed: {", ".join(failed)}')
+        sys.exit(1)
@@ -0,0 +1,95 @@
+import json
+import os
+import pathlib
+import time
+
+MANIFEST = 'manifest.json'
+
+
+class Manifest:
+    def __init__(self, working_folder: os.PathLike):
+        """
+        Record of the completed stages of a run and the checkpoints they
+        left, kept in the working folder so a later session can resume.
+
+        :param working_folder: (os.Pathlike) run working folder.
+        """
+        self.path = pathlib.Path(working_folder) / MANIFEST
+
+        if self.path.exists():
+            with open(self.path) as f:
+                self.data = json.load(f)
+        else:
+            self.data = {'config': None, 'stages': {}}
+
+    @property
+    def config(self):
+        return self.data['config']
+
+    @config.setter
+    def config(self, config):
+        self.data['config'] = config
+        self.save()
+
+    def save(self):
+        partial = self.path.with_suffix('.partial')
+
+        with open(partial, 'w') as f:
+            json.dump(self.data, f, indent=2)
+
+        os.replace(partial, self.path)
+
+    def complete(self, stage: str, checkpoint: os.PathLike = None):
+        """
+        Mark a stage as completed.
+
+        :param stage: (str) name of the stage.
+        :param checkpoint: (os.Pathlike) file the stage can be restored from.
+        """
+        self.data['stages'][stage] = {
+            'completed': time.time(),
+            'checkpoint': str(checkpoint) if checkpoint else None,
+        }
+        self.save()
+
+    def reset(self, stages):
+        """
+        Forget stages, e.g. because their inputs changed.
+
+        :param stages: (list[str]) names of the stages.
+        """
+        for stage in stages:
+            self.data['stages'].pop(stage, None)
+        self.save()
+
+    def completed(self, names):
+        """
+        Number of leading pipeline stages that have completed.
+
+        :param names: (list[str]) stage names in pipeline order.
+        :return: (int)
+        """
+        count = 0
+
+        for name in names:
+            if name not in self.data['stages']:
+                break
+            count += 1
+
+        return count
+
+    def checkpoint(self, stage: str):
+        """
+        Checkpoint left by a completed stage, if it still exists.
+
+        :param stage: (str) name of the stage.
+        :return: (pathlib.Path) or None.
+        """
+        entry = self.data['stages'].get(stage)
+
+        if not entry or not entry['checkpoint']:
+            return None
+
+        path = pathlib.Path(entry['checkpoint'])
+
+        return path if path.exists() else None
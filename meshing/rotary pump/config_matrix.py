@@ -0,0 +1,175 @@
+import argparse
+import copy
+import math
+import os
+from dataclasses import dataclass
+
+import yaml
+
+MATRIX = 'matrix'
+
+
+def resolve(config: dict, path: str):
+    """
+    Find the containers a matrix axis sets a value in. Scoped sizings are
+    addressed by name, or all of them with *, e.g. scoped.rocket_curve.max.
+
+    :param config: (dict) config without the matrix section.
+    :param path: (str) dotted path of the axis.
+    :return: (list[tuple[dict, str]]) containers and the key to set in each.
+    """
+    parts = path.split('.')
+    containers = [config]
+    index = 0
+
+    while index < len(parts) - 1:
+        part = parts[index]
+        values = [container.get(part) for container in containers]
+
+        if all(isinstance(value, dict) for value in values):
+            containers = values
+            index += 1
+        elif all(isinstance(value, list) for value in values):
+            if index + 2 >= len(parts):
+                raise KeyError(f'{path}: name the {part} entry, e.g. {part}.<name>.{parts[-1]}')
+            name = parts[index + 1]
+            containers = [item for value in values for item in value
+                          if name == '*' or item.get('name') == name]
+            if not containers:
+                raise KeyError(f'{path}: no {part} entry named {name}')
+            index += 2
+        else:
+            raise KeyError(f'{path}: {part} is not a section of the config')
+
+    return [(container, parts[-1]) for container in containers]
+
+
+@dataclass
+class Job:
+    index: int
+    values: dict
+    config: dict
+
+    @property
+    def label(self):
+        return ', '.join(f'{path}={value}' for path, value in self.values.items())
+
+    def errors(self):
+        """
+        Validate the job config without building it.
+
+        :return: (dict) marshmallow validation errors, empty if valid.
+        """
+        import auto_mesh
+
+        return auto_mesh.AutoMeshSchema().validate(self.config)
+
+    def build(self, **overrides):
+        """
+        Build the AutoMesh of this job, creating its working folder.
+
+        :param overrides: top level config values to replace, e.g. processors.
+        :return: (AutoMesh)
+        """
+        import auto_mesh
+
+        return auto_mesh.AutoMeshSchema().load(dict(self.config, **overrides))
+
+
+class Matrix:
+    def __init__(self, config: dict):
+        """
+        Parameter study described by a config with a matrix section, mapping
+        dotted config paths to the values to try:
+
+            matrix:
+              mesh.layers: [10, 15, 20]
+              scoped.rocket_curve.max: [8, 16]
+
+        Jobs cover every combination and are made one at a time as they are
+        iterated, nothing is validated or built up front.
+
+        :param config: (dict) config including the matrix section.
+        """
+        self.base = {key: value for key, value in config.items() if key != MATRIX}
+        self.axes = {path: list(values) if isinstance(values, list) else [values]
+                     for path, values in (config.get(MATRIX) or {}).items()}
+
+        for path in self.axes:
+            resolve(self.base, path)
+
+    def __len__(self):
+        return math.prod(len(values) for values in self.axes.values())
+
+    def __iter__(self):
+        return (self.job(index) for index in range(len(self)))
+
+    def job(self, index: int):
+        """
+        Job at a position in the matrix, the last axis varying fastest.
+
+        :param index: (int) job index.
+        :return: (Job)
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f'job {index} out of range for {len(self)} jobs')
+
+        positions = []
+        remainder = index
+        for options in reversed(list(self.axes.values())):
+            remainder, position = divmod(remainder, len(options))
+            positions.append(position)
+
+        values = {path: options[position] for (path, options), position
+                  in zip(self.axes.items(), reversed(positions))}
+
+        config = copy.deepcopy(self.base)
+        for path, value in values.items():
+            for container, key in resolve(config, path):
+                container[key] = value
+
+        return Job(index, values, config)
+
+    def invalid(self):
+        """
+        Jobs whose config fails validation.
+
+        :return: generator of (Job, dict) jobs and their errors.
+        """
+        for job in self:
+            errors = job.errors()
+            if errors:
+                yield job, errors
+
+
+def load(file_path: os.PathLike):
+    """
+    Load a config as a matrix, a config without a matrix section is a
+    matrix of one job.
+
+    :param file_path: (os.Pathlike) yaml config.
+    :return: (Matrix)
+    """
+    with open(file_path) as f:
+        return Matrix(yaml.safe_load(f))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('config', help="auto mesh config with a matrix section")
+    parser.add_argument('--check', action='store_true',
+                        help="validate every job config")
+    args = parser.parse_args()
+
+    matrix = load(args.config)
+    print(f'{len(matrix)} jobs over {", ".join(matrix.axes) or "no axes"}')
+
+    if args.check:
+        invalid = 0
+        for job, errors in matrix.invalid():
+            invalid += 1
+            print(f'job {job.index} ({job.label}): {errors}')
+        print(f'{invalid} invalid jobs')
+    else:
+        for job in matrix:
+            print(f'{job.index:>5}  {job.label}')
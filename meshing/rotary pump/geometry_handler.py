@@ -19,7 +19,7 @@ def import_geometry(file_path: os.PathLike,
         raise FileNotFoundError(f"{file_path} not found.")
 
     command = f'''
-    file/import cad-geometry yes {file_path} {length_unit} {tessellation_method} {refine_faceting}
+    file/import cad-geometry yes "{file_path}" {length_unit} {tessellation_method} {refine_faceting}
     '''
     return command
 
@@ -46,7 +46,7 @@ def save_pmdb(file_path: os.PathLike, iteration,
 
     command = f'''
     /file import cad-options save-PMDB y
-    /file import cad-geometry yes {file_path} {append} {length_unit} {tessellation_method} {refine_faceting} {overwrite}
+    /file import cad-geometry yes "{file_path}" {append} {length_unit} {tessellation_method} {refine_faceting} {overwrite}
     '''
     return command
 
@@ -58,7 +58,7 @@ def import_mesh(file_path: os.PathLike, iteration):
     answer = 'ok' if iteration != 0 else ""
 
     command = f'''
-    file read-mesh {file_path} {answer}
+    file read-mesh "{file_path}" {answer}
     '''
 
     return command
@@ -69,7 +69,7 @@ def write_mesh(file_path: pathlib.Path):
 
     command = f'''
     preferences general default-ioformat "Legacy"
-    file write-mesh {file_path}
+    file write-mesh "{file_path}"
     '''
 
     return command
@@ -0,0 +1,145 @@
+import threading
+import time
+
+MARKER = '[automesh] stage:'
+END_MARKER = '[automesh] end:'
+
+
+def stage_marker(stage: str):
+    """
+    Scheme expression that prints a stage marker to the fluent transcript.
+
+    :param stage: (str) name of the stage.
+    :return: (str) command.
+    """
+    return f'(display "\\n{MARKER} {stage}\\n")'
+
+
+def end_marker(name: str):
+    """
+    Scheme expression that prints an end marker to the fluent transcript,
+    the last line of a journal or command stream.
+
+    :param name: (str) name of the journal or stream.
+    :return: (str) command.
+    """
+    return f'(display "\\n{END_MARKER} {name}\\n")'
+
+
+def consolidate(commands):
+    """
+    Join the commands of several stages into a single command stream, each
+    stage preceded by its marker.
+
+    :param commands: (list[tuple[str, str]]) stage names and their commands.
+    :return: (str) command stream.
+    """
+    return '\n'.join(f'{stage_marker(stage)}\n{command}'
+                     for stage, command in commands)
+
+
+class StageError(RuntimeError):
+    def __init__(self, stage, message):
+        """
+        Raised when a stage of a command stream fails.
+
+        :param stage: (str) stage that was running.
+        :param message: error raised by fluent.
+        """
+        super().__init__(f'stage {stage} failed: {message}')
+        self.stage = stage
+
+
+class StageTracker:
+    def __init__(self, independent: bool = False):
+        """
+        Follows the stage markers in the fluent transcript, so errors in a
+        command stream can be traced back to the stage that raised them.
+
+        Register an instance as a transcript callback. Listeners are called
+        with (stage, line) for every transcript line, and on_complete
+        callbacks with the stage name once a stage has finished without
+        errors.
+
+        :param independent: (Bool) stages do not build on each other, e.g.
+            one conversion per file, so an error only fails its own stage.
+        """
+        self.independent = independent
+        self.stage = None
+        self.history = []
+        self.timings = []
+        self.errors = []
+        self.listeners = []
+        self.on_complete = []
+        self.ended = set()
+        self.condition = threading.Condition()
+
+    def enter(self, stage: str):
+        """
+        Record the start of a stage, which completes the previous one.
+
+        :param stage: (str) name of the stage.
+        """
+        self.finish()
+        self.stage = stage
+        self.history.append((stage, time.time()))
+
+    def finish(self):
+        """
+        Record the end of the current stage. It only counts as completed
+        while no errors were seen, fluent carries on with the rest of a
+        command stream after an error but those stages build on a failed one.
+        Independent stages only need to be free of errors themselves.
+        """
+        if self.stage is None:
+            return
+
+        stage, self.stage = self.stage, None
+        self.timings.append((stage, self.history[-1][1], time.time()))
+        if self.independent:
+            failed = any(error_stage == stage for error_stage, _ in self.errors)
+        else:
+            failed = bool(self.errors)
+        if failed:
+            return
+
+        for callback in self.on_complete:
+            callback(stage)
+
+    def raise_errors(self):
+        """
+        Raise the first error reported in the transcript.
+        """
+        if self.errors:
+            stage, line = self.errors[0]
+            raise StageError(stage, line)
+
+    def wait(self, name: str, timeout: float = 60.0):
+        """
+        Wait for the end marker of a journal or stream. The transcript is
+        streamed, so its last lines can arrive after the command returned.
+
+        :param name: (str) name of the journal or stream.
+        :param timeout: (float) seconds to wait.
+        :return: (Bool) whether the end marker was seen.
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: name in self.ended, timeout)
+
+    def __call__(self, text: str):
+        for line in text.splitlines():
+            if END_MARKER in line:
+                with self.condition:
+                    self.ended.add(line.split(END_MARKER, 1)[1].strip())
+                    self.condition.notify_all()
+                continue
+
+            if MARKER in line:
+                self.enter(line.split(MARKER, 1)[1].strip())
+                continue
+
+            if line.lstrip().lower().startswith('error'):
+                self.errors.append((self.stage, line.strip()))
+
+            for listener in self.listeners:
+                listener(self.stage, line)
@@ -0,0 +1,264 @@
+import dataclasses
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+from importlib import metadata
+
+CACHE_DIR = pathlib.Path(os.path.dirname(__file__)) / 'mesh_cache'
+SIZE_FIELD_DIR = pathlib.Path(os.path.dirname(__file__)) / 'size_field_cache'
+
+
+def file_hash(file_path: os.PathLike, chunk_size: int = 1 << 20):
+    """
+    Hash the contents of a file without reading it into memory at once.
+
+    :param file_path: (os.Pathlike) file to hash.
+    :param chunk_size: (int) bytes read per chunk.
+    :return: (str) sha256 hex digest.
+    """
+    digest = hashlib.sha256()
+
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def normalise(config):
+    """
+    Convert config dataclasses (and lists of them) into plain, json
+    serialisable values.
+
+    :param config: dataclass, list of dataclasses or plain value.
+    :return: plain python value.
+    """
+    if dataclasses.is_dataclass(config):
+        return normalise(dataclasses.asdict(config))
+    if isinstance(config, dict):
+        return {key: normalise(value) for key, value in config.items()}
+    if isinstance(config, (list, tuple)):
+        return [normalise(value) for value in config]
+    if isinstance(config, pathlib.PurePath):
+        return str(config)
+
+    return config
+
+
+def config_hash(config):
+    """
+    Hash a config independent of key order.
+
+    :param config: dataclass, list of dataclasses or plain value.
+    :return: (str) sha256 hex digest.
+    """
+    text = json.dumps(normalise(config), sort_keys=True)
+
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def normalise_scoped(scoped):
+    """
+    Scoped sizings in a canonical form, independent of the order of the
+    sizings and of the zones within each sizing.
+
+    :param scoped: (list[ScopedSizing]) scoped sizings.
+    :return: (list[dict])
+    """
+    entries = [dict(item, zone=sorted(item.get('zone') or []))
+               for item in normalise(scoped)]
+
+    return sorted(entries, key=lambda item: json.dumps(item, sort_keys=True))
+
+
+def fluent_version():
+    """
+    Identify the Fluent install launch_fluent will pick up, without
+    launching it.
+
+    :return: (str) pyfluent version and fluent root or AWP_ROOT variable.
+    """
+    try:
+        pyfluent_version = metadata.version('ansys-fluent-core')
+    except metadata.PackageNotFoundError:
+        pyfluent_version = 'unknown'
+
+    root = os.environ.get('PYFLUENT_FLUENT_ROOT')
+    if root:
+        install = str(pathlib.Path(root).resolve())
+    else:
+        installs = sorted(key for key in os.environ if key.startswith('AWP_ROOT'))
+        install = installs[-1] if installs else 'unknown'
+
+    return f'{pyfluent_version}:{install}'
+
+
+def partial_file(target: pathlib.Path):
+    """
+    Temporary file next to a cache file, unique to this writer so runs
+    storing the same entry at once do not write to the same file. It is
+    moved onto the target with os.replace once complete.
+
+    :param target: (pathlib.Path) cache file to be written.
+    :return: (pathlib.Path) empty temporary file.
+    """
+    handle, partial = tempfile.mkstemp(dir=target.parent, prefix=f'{target.name}.', suffix='.partial')
+    os.close(handle)
+
+    return pathlib.Path(partial)
+
+
+def write_json(target: pathlib.Path, data):
+    partial = partial_file(target)
+    try:
+        with open(partial, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(partial, target)
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+class MeshCache:
+    def __init__(self, cache_dir: os.PathLike = CACHE_DIR):
+        """
+        Content addressed store of finished meshes.
+
+        :param cache_dir: (os.Pathlike) folder holding cached meshes.
+        """
+        self.cache_dir = pathlib.Path(cache_dir)
+
+    @staticmethod
+    def key(geometry_hash: str, config, version: str = None):
+        """
+        Cache key for a mesh.
+
+        :param geometry_hash: (str) file_hash of the geometry file.
+        :param config: normalised config the mesh depends on.
+        :param version: (str) fluent version, detected when not given.
+        :return: (str) key.
+        """
+        entry = {
+            'geometry': geometry_hash,
+            'config': normalise(config),
+            'fluent': version or fluent_version(),
+        }
+
+        return config_hash(entry)[:20]
+
+    def get(self, key: str):
+        """
+        Find a cached mesh.
+
+        :param key: (str) cache key.
+        :return: (pathlib.Path) cached mesh or None.
+        """
+        entry = self.cache_dir / key
+
+        if not entry.is_dir():
+            return None
+
+        meshes = sorted(entry.glob('*.msh'))
+
+        return meshes[0] if meshes else None
+
+    def put(self, key: str, mesh_file: os.PathLike, config=None):
+        """
+        Store a finished mesh. The mesh is hard linked into the cache where
+        possible and copied otherwise.
+
+        :param key: (str) cache key.
+        :param mesh_file: (os.Pathlike) finished mesh.
+        :param config: normalised config, saved next to the mesh for reference.
+        :return: (pathlib.Path) cached mesh.
+        """
+        mesh_file = pathlib.Path(mesh_file)
+        entry = self.cache_dir / key
+        entry.mkdir(parents=True, exist_ok=True)
+
+        cached = entry / mesh_file.name
+        partial = partial_file(cached)
+
+        try:
+            try:
+                partial.unlink()
+                os.link(mesh_file, partial)
+            except OSError:
+                shutil.copy2(mesh_file, partial)
+
+            os.replace(partial, cached)
+        finally:
+            partial.unlink(missing_ok=True)
+
+        if config is not None:
+            write_json(entry / 'config.json', normalise(config))
+
+        return cached
+
+
+class SizeFieldCache:
+    def __init__(self, cache_dir: os.PathLike = SIZE_FIELD_DIR):
+        """
+        Store of computed size fields, keyed by the geometry and the scoped
+        sizings they were computed from.
+
+        :param cache_dir: (os.Pathlike) folder holding stored size fields.
+        """
+        self.cache_dir = pathlib.Path(cache_dir)
+
+    @staticmethod
+    def key(geometry_hash: str, scoped, version: str = None):
+        """
+        Key of a size field.
+
+        :param geometry_hash: (str) file_hash of the geometry file.
+        :param scoped: (list[ScopedSizing]) scoped sizings.
+        :param version: (str) fluent version, detected when not given.
+        :return: (str) key.
+        """
+        entry = {
+            'geometry': geometry_hash,
+            'scoped': normalise_scoped(scoped),
+            'fluent': version or fluent_version(),
+        }
+
+        return config_hash(entry)[:20]
+
+    def get(self, key: str):
+        """
+        Find a stored size field.
+
+        :param key: (str) size field key.
+        :return: (pathlib.Path) stored size field or None.
+        """
+        stored = self.cache_dir / f'{key}.sf'
+
+        return stored if stored.exists() else None
+
+    def put(self, key: str, size_field: os.PathLike, scoped=None):
+        """
+        Store a size field. It is copied rather than linked, fluent may
+        rewrite the original in place.
+
+        :param key: (str) size field key.
+        :param size_field: (os.Pathlike) size field written by fluent.
+        :param scoped: (list[ScopedSizing]) scoped sizings, saved next to the
+            size field for reference.
+        :return: (pathlib.Path) stored size field.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        stored = self.cache_dir / f'{key}.sf'
+        partial = partial_file(stored)
+
+        try:
+            shutil.copy2(size_field, partial)
+            os.replace(partial, stored)
+        finally:
+            partial.unlink(missing_ok=True)
+
+        if scoped is not None:
+            write_json(stored.with_suffix('.json'), normalise_scoped(scoped))
+
+        return stored
@@ -0,0 +1,207 @@
+import argparse
+import dataclasses
+import json
+import os
+import pathlib
+import zlib
+
+import numpy as np
+
+import checkpoint
+import mesh_cache
+import msh_reader
+
+FORMAT = 1
+HEADER = 'header.json'
+CHUNK = 1 << 22  # elements per compressed chunk
+
+
+def write_array(folder: pathlib.Path, name: str, array: np.ndarray,
+                compress: bool = False, chunk: int = CHUNK):
+    """
+    Write an array to an export folder, as a .npy file or as zlib compressed
+    chunks of its flattened data.
+
+    :param folder: (pathlib.Path) export folder.
+    :param name: (str) array name.
+    :param array: (ndarray) array to write.
+    :param compress: (Bool) compress in chunks instead of writing a .npy file.
+    :param chunk: (int) elements per compressed chunk.
+    :return: (dict) header entry of the array.
+    """
+    array = np.ascontiguousarray(array)
+    entry = {'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+    if not compress:
+        entry['file'] = f'{name}.npy'
+        np.save(folder / entry['file'], array)
+        return entry
+
+    entry['file'] = f'{name}.z'
+    entry['chunks'] = []
+    flat = array.reshape(-1)
+
+    with open(folder / entry['file'], 'wb') as f:
+        for start in range(0, len(flat), chunk):
+            data = zlib.compress(flat[start:start + chunk].tobytes(), 1)
+            f.write(data)
+            entry['chunks'].append([min(chunk, len(flat) - start), len(data)])
+
+    return entry
+
+
+def read_array(folder: pathlib.Path, entry: dict, mmap: bool = True):
+    """
+    Read an array written by write_array.
+
+    :param folder: (pathlib.Path) export folder.
+    :param entry: (dict) header entry of the array.
+    :param mmap: (Bool) memory map uncompressed arrays instead of reading them.
+    :return: (ndarray)
+    """
+    if 'chunks' not in entry:
+        return np.load(folder / entry['file'], mmap_mode='r' if mmap else None)
+
+    array = np.empty(int(np.prod(entry['shape'])), dtype=np.dtype(entry['dtype']))
+    position = 0
+
+    with open(folder / entry['file'], 'rb') as f:
+        for elements, size in entry['chunks']:
+            array[position:position + elements] = np.frombuffer(
+                zlib.decompress(f.read(size)), dtype=array.dtype)
+            position += elements
+
+    return array.reshape(entry['shape'])
+
+
+def smallest_int(array: np.ndarray):
+    # face and cell indices fit in int32 for any mesh fluent can write
+    if len(array) and array.max() < np.iinfo(np.int32).max:
+        return array.astype(np.int32, copy=False)
+    return array
+
+
+def run_config(mesh_file: pathlib.Path):
+    """
+    Config of the AutoMesh run that made a mesh, if the mesh is still in its
+    working folder.
+
+    :param mesh_file: (pathlib.Path) mesh file.
+    :return: (dict) config or None.
+    """
+    return checkpoint.Manifest(mesh_file.parent).config
+
+
+def export(mesh_file: os.PathLike, output: os.PathLike = None, config=None,
+           compress: bool = False):
+    """
+    Convert a legacy msh file into an array export folder holding the node
+    coordinates, the face connectivity in CSR form, the cells on either side
+    of each face and a header with the zone tables, counts and config hash.
+
+    :param mesh_file: (os.Pathlike) msh file.
+    :param output: (os.Pathlike) export folder, defaults to the mesh file
+        with a .arrays suffix.
+    :param config: config the mesh was made from, read from the run manifest
+        when not given.
+    :param compress: (Bool) store zlib compressed chunks, smaller on disk but
+        read into memory rather than memory mapped.
+    :return: (pathlib.Path) export folder.
+    """
+    mesh_file = pathlib.Path(mesh_file)
+    output = pathlib.Path(output) if output else mesh_file.with_suffix('.arrays')
+    output.mkdir(parents=True, exist_ok=True)
+
+    if config is None:
+        config = run_config(mesh_file)
+
+    mesh = msh_reader.read(mesh_file)
+    offsets, nodes, c0, c1 = mesh.face_csr()
+
+    arrays = {
+        'nodes': mesh.nodes,
+        'face_offsets': offsets,
+        'face_nodes': smallest_int(nodes),
+        'c0': smallest_int(c0),
+        'c1': smallest_int(c1),
+    }
+
+    header = {
+        'format': FORMAT,
+        'source': str(mesh_file.resolve()),
+        'source_hash': mesh_cache.file_hash(mesh_file),
+        'config_hash': mesh_cache.config_hash(config) if config is not None else None,
+        'dimensions': mesh.dimensions,
+        'counts': {kind: mesh.count(kind) for kind in ('nodes', 'faces', 'cells')},
+        'zones': [dataclasses.asdict(zone) for zone in mesh.zones.values()],
+        'face_zones': [{'id': zone.id, 'first': zone.first, 'last': zone.last,
+                        'bc_type': zone.bc_type, 'face_type': zone.face_type}
+                       for zone in mesh.face_zones],
+        'cell_zones': [dataclasses.asdict(zone) for zone in mesh.cell_zones],
+        'arrays': {name: write_array(output, name, array, compress)
+                   for name, array in arrays.items()},
+    }
+
+    with open(output / HEADER, 'w') as f:
+        json.dump(header, f, indent=2)
+
+    return output
+
+
+class MeshArrays:
+    def __init__(self, folder: os.PathLike, mmap: bool = True):
+        """
+        Mesh export folder. Arrays are loaded on first access, uncompressed
+        arrays are memory mapped so only the pages used are read.
+
+        :param folder: (os.Pathlike) export folder.
+        :param mmap: (Bool) memory map uncompressed arrays.
+        """
+        self.folder = pathlib.Path(folder)
+        self.mmap = mmap
+
+        with open(self.folder / HEADER) as f:
+            self.header = json.load(f)
+
+        if self.header['format'] != FORMAT:
+            raise ValueError(f'{self.folder} has export format {self.header["format"]}, '
+                             f'expected {FORMAT}')
+
+        self.arrays = {}
+
+    def __getitem__(self, name: str):
+        if name not in self.arrays:
+            self.arrays[name] = read_array(self.folder, self.header['arrays'][name], self.mmap)
+        return self.arrays[name]
+
+    def face_nodes(self, face: int):
+        """
+        Nodes of a face.
+
+        :param face: (int) 0 based face index.
+        :return: (ndarray) 1 based node indices.
+        """
+        offsets = self['face_offsets']
+        return self['face_nodes'][offsets[face]:offsets[face + 1]]
+
+    def matches(self, config):
+        """
+        Whether the export was made from a config.
+
+        :param config: config to compare.
+        :return: (Bool)
+        """
+        return self.header['config_hash'] == mesh_cache.config_hash(config)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('mesh', help="fluent legacy msh file")
+    parser.add_argument('--output', default=None, action='store',
+                        help="export folder, defaults to <mesh>.arrays")
+    parser.add_argument('--compress', action='store_true',
+                        help="store zlib compressed chunks instead of .npy files")
+    args = parser.parse_args()
+
+    folder = export(args.mesh, args.output, compress=args.compress)
+    print(f'Exported {args.mesh} to {folder}')
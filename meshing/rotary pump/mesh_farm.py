@@ -0,0 +1,196 @@
+import argparse
+import json
+import multiprocessing
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import psutil
+
+import config_matrix
+import resources
+
+
+def find_configs(paths):
+    """
+    Expand directories into the yaml configs they contain.
+
+    :param paths: (list[os.Pathlike]) config files or directories.
+    :return: (list[pathlib.Path]) config files.
+    """
+    configs = []
+
+    for path in map(pathlib.Path, paths):
+        if path.is_dir():
+            configs.extend(sorted(path.glob('*.yaml')) + sorted(path.glob('*.yml')))
+        else:
+            configs.append(path)
+
+    return configs
+
+
+def find_jobs(paths):
+    """
+    Expand configs into jobs, one per point of a config's matrix section.
+
+    :param paths: (list[os.Pathlike]) config files or directories.
+    :return: (list[tuple[pathlib.Path, int]]) configs and matrix job indices,
+        None for configs without a matrix.
+    """
+    jobs = []
+
+    for config in find_configs(paths):
+        matrix = config_matrix.load(config)
+        if matrix.axes:
+            jobs.extend((config, index) for index in range(len(matrix)))
+        else:
+            jobs.append((config, None))
+
+    return jobs
+
+
+def split_cores(budget, jobs):
+    """
+    Share a core budget between concurrent jobs.
+
+    :param budget: (int) physical cores available to the farm.
+    :param jobs: (int) concurrent jobs.
+    :return: (list[int]) cores for each job slot.
+    """
+    jobs = max(min(jobs, budget), 1)
+    share, extra = divmod(budget, jobs)
+
+    return [share + (slot < extra) for slot in range(jobs)]
+
+
+def run_job(config, processors, interval=1.0, index=None):
+    """
+    Run one auto mesh config, sampling the memory of this worker and the
+    fluent processes it launches.
+
+    :param config: (os.Pathlike) yaml config.
+    :param processors: (int) cores fluent may use.
+    :param interval: (float) seconds between memory samples.
+    :param index: (int) job of the config's matrix to run, built only now.
+    :return: (dict) job record.
+    """
+    record = {'config': str(config), 'index': index, 'processors': processors,
+              'mesh_file': None, 'error': None}
+    start = time.time()
+
+    with resources.ProcessTreeSampler(os.getpid(), interval) as sampler:
+        try:
+            if index is None:
+                import auto_mesh
+
+                mesher = auto_mesh.load_config(config, processors=processors)
+            else:
+                job = config_matrix.load(config).job(index)
+                record['values'] = job.values
+                mesher = job.build(processors=processors)
+            record['working_folder'] = str(mesher.working_folder)
+            record['mesh_file'] = str(mesher.run())
+        except Exception as error:
+            record['error'] = f'{type(error).__name__}: {error}'
+
+    record['wall_time'] = time.time() - start
+    record['peak_rss'] = sampler.peak_rss
+
+    return record
+
+
+def _run_slot(config, index, slots, interval):
+    # each worker process takes a free core share for the duration of a job
+    processors = slots.get()
+    try:
+        return run_job(config, processors, interval, index)
+    finally:
+        slots.put(processors)
+
+
+def run_farm(configs, jobs=2, cores=None, interval=1.0):
+    """
+    Run auto mesh configs as concurrent fluent jobs, sharing the physical
+    cores between them.
+
+    :param configs: (list[os.Pathlike]) config files or directories, configs
+        with a matrix section run a job per matrix point.
+    :param jobs: (int) jobs to run at once.
+    :param cores: (int) physical core budget, defaults to all physical cores.
+    :param interval: (float) seconds between memory samples.
+    :return: (list[dict]) job records in completion order.
+    """
+    configs = find_jobs(configs)
+    cores = cores or psutil.cpu_count(logical=False)
+    shares = split_cores(cores, jobs)
+
+    context = multiprocessing.get_context('spawn')
+    manager = context.Manager()
+    slots = manager.Queue()
+    for share in shares:
+        slots.put(share)
+
+    print(f'Running {len(configs)} jobs, {len(shares)} at a time on '
+          f'{cores} cores ({shares} cores per job)')
+
+    records = []
+    with ProcessPoolExecutor(max_workers=len(shares), mp_context=context) as pool:
+        futures = [pool.submit(_run_slot, config, index, slots, interval)
+                   for config, index in configs]
+
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            status = 'failed' if record['error'] else 'done'
+            print(f'{status}: {job_name(record)} in {record["wall_time"]:.0f} s, '
+                  f'peak {record["peak_rss"] / 2 ** 30:.2f} GB')
+
+    manager.shutdown()
+
+    return records
+
+
+def job_name(record):
+    name = pathlib.Path(record['config']).name
+    return name if record.get('index') is None else f'{name}#{record["index"]}'
+
+
+def summary(records):
+    """
+    Table of job records.
+
+    :param records: (list[dict]) job records.
+    :return: (str)
+    """
+    lines = [f'{"config":<40} {"cores":>5} {"wall (s)":>9} {"peak (GB)":>9}  status']
+
+    for record in records:
+        lines.append(f'{job_name(record):<40} '
+                     f'{record["processors"]:>5} {record["wall_time"]:>9.0f} '
+                     f'{record["peak_rss"] / 2 ** 30:>9.2f}  '
+                     f'{record["error"] or "ok"}')
+
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('configs', nargs='+',
+                        help="auto mesh configs or folders of configs")
+    parser.add_argument('--jobs', default=2, action='store', type=int,
+                        help="configs to mesh at once")
+    parser.add_argument('--cores', default=None, action='store', type=int,
+                        help="physical cores shared by all jobs")
+    parser.add_argument('--interval', default=1.0, action='store', type=float,
+                        help="seconds between memory samples")
+    parser.add_argument('--report', default='mesh_farm.json', action='store',
+                        help="json file to write the job records to")
+    args = parser.parse_args()
+
+    records = run_farm(args.configs, args.jobs, args.cores, args.interval)
+
+    with open(args.report, 'w') as report:
+        json.dump(records, report, indent=2)
+
+    print(summary(records))
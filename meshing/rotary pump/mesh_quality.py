@@ -0,0 +1,174 @@
+import json
+import os
+import re
+
+import journal
+
+MARKER = '[automesh] quality:'
+
+NUMBER = r'([-+]?\d[\d,]*\.?\d*(?:[eE][-+]?\d+)?)'
+
+# metrics read from any transcript line, e.g. the output of check-mesh
+PATTERNS = {
+    # not "N cells with negative volumes", which counts bad cells, not the mesh
+    'cells': re.compile(rf'\bcells\s*[:=]\s*{NUMBER}|{NUMBER}\s+cells\b(?!\s+with\b)', re.I),
+    'faces': re.compile(rf'\bfaces\s*[:=]\s*{NUMBER}|{NUMBER}\s+faces\b', re.I),
+    'nodes': re.compile(rf'\bnodes\s*[:=]\s*{NUMBER}|{NUMBER}\s+nodes\b', re.I),
+    'negative_volumes': re.compile(
+        rf'{NUMBER}\s+(?:cells?\s+with\s+)?negative\s+volumes?|negative\s+volumes?\s*[:=]\s*{NUMBER}', re.I),
+    'min_volume': re.compile(rf'min(?:imum)?\s+volume[^:=]*[:=]\s*{NUMBER}', re.I),
+}
+
+# limits of the quality measure last announced with a quality marker
+RANGE = {
+    'min': re.compile(rf'\bmin(?:imum)?\b[^:=]*[:=]\s*{NUMBER}', re.I),
+    'max': re.compile(rf'\bmax(?:imum)?\b[^:=]*[:=]\s*{NUMBER}', re.I),
+}
+
+# metrics checked once a stage finishes, against the config field named
+# second. min_ metrics must not fall below their limit, others not exceed it.
+STAGE_GATES = {
+    'run_diagnostics': [('max_face_skewness', 'surface_skewness')],
+    'mesh': [('max_cell_skewness', 'skewness'),
+             ('min_cell_orthogonal_quality', 'orthogonal_quality')],
+    'get_summary': [('negative_volumes', 'negative_volumes')],
+}
+
+
+def quality_marker(measure: str):
+    """
+    Scheme expression that announces the quality measure of the next report.
+
+    :param measure: (str) metric name, e.g. cell_skewness.
+    :return: (str) command.
+    """
+    return f'(display "\\n{MARKER} {measure}\\n")'
+
+
+def face_report():
+    """
+    Report the skewness range of the surface mesh.
+
+    :return: (str) command.
+    """
+    return f'''
+        report/quality-method skewness
+        {quality_marker('face_skewness')}
+        report/face-quality-limits * ()
+        '''
+
+
+def cell_report():
+    """
+    Report the skewness and orthogonal quality ranges of the volume mesh.
+
+    :return: (str) command.
+    """
+    return f'''
+        report/quality-method skewness
+        {quality_marker('cell_skewness')}
+        report/cell-quality-limits * ()
+        report/quality-method orthogonal-quality
+        {quality_marker('cell_orthogonal_quality')}
+        report/cell-quality-limits * ()
+        '''
+
+
+def to_number(text: str):
+    value = float(text.replace(',', ''))
+
+    return int(value) if value.is_integer() and '.' not in text else value
+
+
+class QualityError(journal.StageError):
+    def __init__(self, stage, failures):
+        """
+        Raised when a stage leaves a mesh that fails a quality gate.
+
+        :param stage: (str) stage that produced the mesh.
+        :param failures: (list[str]) failed gates.
+        """
+        super().__init__(stage, 'mesh quality gate failed, ' + '; '.join(failures))
+        self.failures = failures
+
+
+class QualityMonitor:
+    def __init__(self):
+        """
+        Parses mesh metrics out of the fluent transcript as it arrives.
+
+        Register an instance as a journal.StageTracker listener. Metrics are
+        kept per stage, a later report in the same stage replaces an earlier
+        one.
+        """
+        self.metrics = {}
+        self.measure = None
+        self.bounds = []
+
+    def __call__(self, stage, line: str):
+        if MARKER in line:
+            self.measure = line.split(MARKER, 1)[1].strip()
+            self.bounds = list(RANGE)
+            return
+
+        if stage is None:
+            return
+
+        metrics = self.metrics.setdefault(stage, {})
+
+        if self.measure is not None:
+            # each bound is read once, later min/max lines, e.g. the volume
+            # statistics of check-mesh, belong to other quantities
+            for bound in list(self.bounds):
+                match = RANGE[bound].search(line)
+                if match:
+                    metrics[f'{bound}_{self.measure}'] = to_number(match.group(1))
+                    self.bounds.remove(bound)
+            if not self.bounds:
+                self.measure = None
+
+        for name, pattern in PATTERNS.items():
+            match = pattern.search(line)
+            if match:
+                metrics[name] = to_number(next(group for group in match.groups() if group))
+
+        if 'min_volume' in metrics:
+            metrics.setdefault('negative_volumes', int(metrics['min_volume'] < 0))
+
+    def check(self, stage: str, limits: dict):
+        """
+        Check the metrics of a finished stage against its gates.
+
+        :param stage: (str) name of the stage.
+        :param limits: (dict) gate limits by config field, None disables a gate.
+        :return: (list[str]) failed gates, empty if the mesh is usable.
+        """
+        self.measure = None
+        self.bounds = []
+        metrics = self.metrics.get(stage, {})
+        failures = []
+
+        for metric, field in STAGE_GATES.get(stage, []):
+            limit = limits.get(field)
+            if limit is None:
+                continue
+
+            value = metrics.get(metric)
+            if value is None:
+                print(f'{stage}: {metric} was not reported, gate not checked')
+                continue
+
+            passed = value >= limit if metric.startswith('min_') else value <= limit
+            if not passed:
+                failures.append(f'{metric} {value} (limit {limit})')
+
+        return failures
+
+    def write(self, file_path: os.PathLike):
+        """
+        Write the metrics of every stage as json.
+
+        :param file_path: (os.Pathlike) output file.
+        """
+        with open(file_path, 'w') as f:
+            json.dump(self.metrics, f, indent=2)
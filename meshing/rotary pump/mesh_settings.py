@@ -1,6 +1,11 @@
-import pandas as pd
 import argparse
-from scipy.optimize import fsolve
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 
 # Constants that will approximately hold true
 RHO = 1.23  # density of air
@@ -12,6 +17,11 @@ MIN_LENGTH = 0.1
 MAX_LENGTH = 5
 MAX_VELOCITY = 1715  # mach 5
 MIN_VELOCITY = 1
+MIN_GROWTH = 1.05
+MAX_GROWTH = 1.3
+SPEED_OF_SOUND = 343
+POOL_MIN_POINTS = 200_000  # grids smaller than this are solved in process
+SWEEP_CACHE = pathlib.Path(os.path.dirname(__file__)) / 'sweep_cache'
 
 
 def calcs(density, viscosity, velocity, length, yplus):
@@ -68,30 +78,324 @@ def f(G, N, y1, BL):
     return y
 
 
-def get_table(y1, BL, g_guess=1.1):
+def get_table(y1, BL):
     """
-    Function defined for rootfinding through fsolve to return dataframe
+    Function defined for rootfinding through solve_growth to return dataframe
     : param y1 : (float) initial layer height
     : param BL : (float) boundary layer thickness
     : returns growth rates, number of layers, and initial layers (lists) :
     """
-    y1_mm = y1 * 10 ** 3  # convert to mm
-    n_layers = []
-    g_rates = []
-    initial_layers = []
+    import pandas as pd
 
-    for N in N_limits:
-        parameters = (N, y1, BL)
-        g_current = fsolve(f, g_guess, parameters)
-        if 1.05 < g_current < 1.3:
-            g_rates.append(round(g_current[0], 3))
-            n_layers.append(N)
-            initial_layers.append(y1_mm)
+    tables = get_tables(y1, BL)
+    valid = tables['valid']
 
     table = pd.DataFrame(
-        {'Initial Layer Height (mm)': initial_layers,
-         'Number of Layers': n_layers,
-         'Inflation Growth Rate': g_rates
+        {'Initial Layer Height (mm)': [float(tables['initial_layer_mm'])] * int(valid.sum()),
+         'Number of Layers': tables['n_layers'][valid].tolist(),
+         'Inflation Growth Rate': tables['growth'][valid].tolist()
+         })
+
+    return table
+
+
+def calcs_array(density, viscosity, velocity, length, yplus):
+    """
+    Vectorised form of calcs, inputs are broadcast against each other so
+    whole grids of operating points are handled in one call.
+
+    :param density: (float or ndarray) approximate density of water
+    :param viscosity: (float or ndarray) approximate viscosity of water
+    :param velocity: (float or ndarray) target velocity for target y plus
+    :param length: (float or ndarray) length of rocket
+    :param yplus: (float or ndarray) target y plus value for a mesh
+    :returns (ndarray, ndarray): initial layer height (y1) and boundary layer
+        thickness (BL), both with the broadcast shape of the inputs
+    """
+    density, viscosity, velocity, length, yplus = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in
+          (density, viscosity, velocity, length, yplus)))
+
+    if not np.all((MIN_YPLUS < yplus) & (yplus < MAX_YPLUS)):
+        raise ValueError(f'y+ values should be '
+                         f'{MIN_YPLUS} < y+ < {MAX_YPLUS}')
+
+    if not np.all((MIN_LENGTH < length) & (length < MAX_LENGTH)):
+        raise ValueError(f'rocket lengths are not in range '
+                         f'({MIN_LENGTH, MAX_LENGTH})')
+
+    if not np.all((MIN_VELOCITY < velocity) & (velocity < MAX_VELOCITY)):
+        raise ValueError(f'velocities are not in range '
+                         f'({MIN_VELOCITY}, {MAX_VELOCITY})')
+
+    if np.any(density == 0) or np.any(viscosity == 0):
+        raise ValueError(f'Division by zero encountered.')
+
+    Re = (density * velocity * length) / viscosity  # reynolds number
+    Cf = 0.058 / (Re ** 0.2)  # skin friction coefficient
+    Tw = 0.5 * Cf * density * (velocity ** 2)  # wall shear stress
+    U = (Tw / density) ** 0.5  # frictional velocity
+
+    y1 = np.round((yplus * viscosity) / (density * U), 5)
+    BL = (0.37 * length) / (Re ** 0.2)  # boundary layer thickness
+
+    return y1, BL
+
+
+def solve_growth(N, y1, BL, tol=1e-12, max_iter=60):
+    """
+    Vectorised root find of f(G, N, y1, BL) = 0 for G > 1.
+
+    The equation is solved in the form G**N - 1 - r(G - 1) = 0 with
+    r = BL / y1, which is convex in G. Bounding the geometric series by its
+    largest term, its mean and its geometric mean brackets the root by
+    (r / N)**(1 / (N-1)) <= G <= min(r**(1 / (N-1)), (r / N)**(2 / (N-1))).
+    Newton steps start from the upper bound and fall back to bisection if
+    they leave the bracket.
+
+    :param N: (int or ndarray) number of inflation layers
+    :param y1: (float or ndarray) initial layer height
+    :param BL: (float or ndarray) boundary layer thickness
+    :param tol: (float) relative tolerance on G
+    :param max_iter: (int) maximum number of Newton/bisection iterations
+    :returns (ndarray): growth rates with the broadcast shape of the inputs,
+        NaN where no growth rate above 1 exists (N * y1 >= BL)
+    """
+    N, y1, BL = np.broadcast_arrays(np.asarray(N, dtype=float),
+                                    np.asarray(y1, dtype=float),
+                                    np.asarray(BL, dtype=float))
+    r = BL / y1
+    solvable = r > N
+    N, r = N[solvable], r[solvable]
+
+    lo = (r / N) ** (1 / (N - 1))
+    hi = np.minimum(r ** (1 / (N - 1)), (r / N) ** (2 / (N - 1)))
+    G = hi.copy()
+    active = np.arange(G.size)
+
+    for _ in range(max_iter):
+        g, n, r_active = G[active], N[active], r[active]
+        g_n1 = g ** (n - 1)
+        h = g_n1 * g - 1 - r_active * (g - 1)
+        dh = n * g_n1 - r_active
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = h / dh
+        converged = np.abs(step) <= tol * g
+
+        lower = np.where(h < 0, g, lo[active])
+        upper = np.where(h > 0, g, hi[active])
+        lo[active], hi[active] = lower, upper
+
+        g_new = g - step
+        bisect = ~converged & (~np.isfinite(g_new) | (g_new <= lower)
+                               | (g_new >= upper))
+        G[active] = np.where(bisect, 0.5 * (lower + upper), g_new)
+
+        active = active[~converged]
+        if active.size == 0:
+            break
+
+    growth = np.full(solvable.shape, np.nan)
+    growth[solvable] = G
+
+    return growth
+
+
+def get_tables(y1, BL, n_layers=N_limits):
+    """
+    Batch equivalent of get_table for arrays of (y1, BL) pairs.
+
+    :param y1: (float or ndarray) initial layer height
+    :param BL: (float or ndarray) boundary layer thickness
+    :param n_layers: (list[int]) layer counts to solve for
+    :returns (dict[str, ndarray]): 'initial_layer_mm' with the shape of the
+        inputs, 'n_layers' with shape (len(n_layers),), and 'growth' and
+        'valid' with the input shape plus a trailing layer axis. Growth rates
+        outside (MIN_GROWTH, MAX_GROWTH) are NaN and not valid.
+    """
+    y1, BL = np.broadcast_arrays(np.asarray(y1, dtype=float),
+                                 np.asarray(BL, dtype=float))
+    n_layers = np.asarray(n_layers)
+    N, y1_n, BL_n = np.broadcast_arrays(n_layers, y1[..., None], BL[..., None])
+
+    # only solve where the root lies inside the growth band, i.e. where
+    # G**N - 1 - r(G - 1) changes sign between MIN_GROWTH and MAX_GROWTH
+    r = BL_n / y1_n
+    in_band = ((MIN_GROWTH ** N - 1 - r * (MIN_GROWTH - 1) < 0)
+               & (MAX_GROWTH ** N - 1 - r * (MAX_GROWTH - 1) > 0))
+
+    g_rates = np.full(in_band.shape, np.nan)
+    g_rates[in_band] = solve_growth(N[in_band], y1_n[in_band], BL_n[in_band])
+    valid = (MIN_GROWTH < g_rates) & (g_rates < MAX_GROWTH)
+
+    return {'initial_layer_mm': y1 * 10 ** 3,
+            'n_layers': n_layers,
+            'growth': np.where(valid, np.round(g_rates, 3), np.nan),
+            'valid': valid}
+
+
+def layer_grid(yplus, velocity, length, density=RHO, viscosity=MU,
+               n_layers=N_limits):
+    """
+    Solves the inflation layer tables for every combination of y+, velocity
+    and length.
+
+    :param yplus: (list[float]) target y plus values
+    :param velocity: (list[float]) target velocities
+    :param length: (list[float]) characteristic lengths
+    :param density: (float) fluid density
+    :param viscosity: (float) fluid viscosity
+    :param n_layers: (list[int]) layer counts to solve for
+    :returns (dict[str, ndarray]): the get_tables output over a grid of shape
+        (len(yplus), len(velocity), len(length)), plus 'y1' and 'BL'
+    """
+    grid = np.meshgrid(np.asarray(yplus, dtype=float),
+                       np.asarray(velocity, dtype=float),
+                       np.asarray(length, dtype=float), indexing='ij')
+    y1, BL = calcs_array(density, viscosity, grid[1], grid[2], grid[0])
+
+    tables = get_tables(y1, BL, n_layers)
+    tables['y1'] = y1
+    tables['BL'] = BL
+
+    return tables
+
+
+def parse_values(text):
+    """
+    Parses a sweep input, either a comma separated list ("30,50,100") or an
+    inclusive range given as start:stop:step ("30:200:10").
+
+    :param text: (str) values to parse
+    :returns (list[float]): parsed values
+    """
+    if ':' in text:
+        start, stop, step = (float(x) for x in text.split(':'))
+        if step <= 0:
+            raise argparse.ArgumentTypeError(f'step must be positive: {text}')
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return (start + step * np.arange(count)).tolist()
+
+    return [float(x) for x in text.split(',')]
+
+
+def sweep_key(yplus, velocity, length, density=RHO, viscosity=MU,
+              n_layers=N_limits):
+    """
+    Hash identifying a sweep, changes whenever an input or the constants the
+    tables depend on change.
+
+    :returns (str): hex digest
+    """
+    inputs = {
+        'yplus': list(map(float, yplus)),
+        'velocity': list(map(float, velocity)),
+        'length': list(map(float, length)),
+        'density': float(density),
+        'viscosity': float(viscosity),
+        'n_layers': list(map(int, n_layers)),
+        'growth': [MIN_GROWTH, MAX_GROWTH],
+    }
+
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _solve_chunk(args):
+    return layer_grid(*args)
+
+
+def sweep(yplus, velocity, length, density=RHO, viscosity=MU,
+          n_layers=N_limits, cache_dir=SWEEP_CACHE, workers=None):
+    """
+    Solves the layer tables over the cartesian product of the inputs. The
+    result is stored as an npz keyed by sweep_key, repeated sweeps are read
+    straight back from it.
+
+    :param yplus: (list[float]) target y plus values
+    :param velocity: (list[float]) target velocities
+    :param length: (list[float]) characteristic lengths
+    :param density: (float) fluid density
+    :param viscosity: (float) fluid viscosity
+    :param n_layers: (list[int]) layer counts to solve for
+    :param cache_dir: (os.Pathlike) folder holding cached sweeps
+    :param workers: (int) processes to use for large grids, None for all cores
+    :returns (dict[str, ndarray], pathlib.Path): columns of the sweep and the
+        cache file they came from. Grid columns have shape
+        (len(yplus), len(velocity), len(length)[, len(n_layers)])
+    """
+    cache_dir = pathlib.Path(cache_dir)
+    cache_file = cache_dir / f'sweep_{sweep_key(yplus, velocity, length, density, viscosity, n_layers)}.npz'
+
+    if cache_file.exists():
+        with np.load(cache_file) as cached:
+            return dict(cached), cache_file
+
+    points = len(yplus) * len(velocity) * len(length)
+    chunks = np.array_split(np.asarray(yplus, dtype=float),
+                            min(len(yplus), os.cpu_count() or 1))
+
+    if points < POOL_MIN_POINTS or len(chunks) == 1:
+        tables = layer_grid(yplus, velocity, length, density, viscosity, n_layers)
+    else:
+        jobs = [(chunk, velocity, length, density, viscosity, n_layers)
+                for chunk in chunks]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_solve_chunk, jobs))
+
+        tables = {name: np.concatenate([part[name] for part in parts])
+                  for name in ('y1', 'BL', 'initial_layer_mm', 'growth')}
+
+    columns = {
+        'yplus': np.asarray(yplus, dtype=float),
+        'velocity': np.asarray(velocity, dtype=float),
+        'length': np.asarray(length, dtype=float),
+        'n_layers': np.asarray(n_layers),
+        'y1': tables['y1'],
+        'BL': tables['BL'],
+        'initial_layer_mm': tables['initial_layer_mm'],
+        'growth': tables['growth'].astype(np.float32),
+    }
+
+    # written to a temporary file first, so a concurrent or interrupted sweep
+    # never leaves a partial cache file under the final name
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    handle, partial = tempfile.mkstemp(dir=cache_dir, prefix=f'{cache_file.stem}.', suffix='.partial')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            np.savez_compressed(f, **columns)
+        os.replace(partial, cache_file)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    return columns, cache_file
+
+
+def sweep_table(columns, yplus, velocity, length):
+    """
+    Looks up the get_table style configurations of the sweep grid point
+    nearest to the requested operating point.
+
+    :param columns: (dict[str, ndarray]) output of sweep
+    :param yplus: (float) target y plus value
+    :param velocity: (float) target velocity
+    :param length: (float) characteristic length
+    :returns (pd.DataFrame): possible layer configurations
+    """
+    import pandas as pd
+
+    index = tuple(int(np.abs(columns[name] - value).argmin())
+                  for name, value in (('yplus', yplus),
+                                      ('velocity', velocity),
+                                      ('length', length)))
+    growth = columns['growth'][index]
+    valid = np.isfinite(growth)
+
+    table = pd.DataFrame(
+        {'Initial Layer Height (mm)': [float(columns['initial_layer_mm'][index])] * int(valid.sum()),
+         'Number of Layers': columns['n_layers'][valid].tolist(),
+         'Inflation Growth Rate': growth[valid].astype(float).round(3).tolist()
          })
 
     return table
@@ -99,17 +403,38 @@ def get_table(y1, BL, g_guess=1.1):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument('--y_plus', default=100, action='store',
-                        help="target y plus value", type=int)
-    parser.add_argument('--mach', default=0.5, action='store',
-                        help="target velocity by mach number", type=float)
-    parser.add_argument('--length', default=3, action='store',
-                        help="length of rocket in m", type=float)
+    parser.add_argument('--y_plus', default=[100], action='store',
+                        help="target y plus value(s)", type=parse_values)
+    parser.add_argument('--mach', default=[0.5], action='store',
+                        help="target velocity by mach number", type=parse_values)
+    parser.add_argument('--length', default=[3], action='store',
+                        help="length of rocket in m", type=parse_values)
+    parser.add_argument('--sweep', action='store_true',
+                        help="solve every combination of the inputs, values "
+                             "are given as a,b,c or start:stop:step")
+    parser.add_argument('--cache_dir', default=SWEEP_CACHE, action='store',
+                        help="folder to store sweep results in")
+    parser.add_argument('--workers', default=None, action='store',
+                        help="processes to use for large sweeps", type=int)
     args = parser.parse_args()
 
-    y1, BL = calcs(RHO, MU, args.mach * 343, args.length, args.y_plus)
-    table = get_table(y1, BL)
+    if args.sweep:
+        velocities = [mach * SPEED_OF_SOUND for mach in args.mach]
+        columns, cache_file = sweep(args.y_plus, velocities, args.length,
+                                    cache_dir=args.cache_dir,
+                                    workers=args.workers)
+
+        print(f'Solved {columns["y1"].size} operating points, '
+              f'{np.isfinite(columns["growth"]).sum()} valid configurations '
+              f'stored in {cache_file}')
+    else:
+        if max(map(len, (args.y_plus, args.mach, args.length))) > 1:
+            parser.error('multiple values given, use --sweep')
+
+        y_plus, mach, length = args.y_plus[0], args.mach[0], args.length[0]
+        y1, BL = calcs(RHO, MU, mach * SPEED_OF_SOUND, length, y_plus)
+        table = get_table(y1, BL)
 
-    print(f'To achieve a y_plus value of {args.y_plus}, '
-          f'you need one of the following configurations: ')
-    print(table)
+        print(f'To achieve a y_plus value of {y_plus:g}, '
+              f'you need one of the following configurations: ')
+        print(table)
@@ -0,0 +1,594 @@
+import argparse
+import json
+import mmap
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+SECTION = re.compile(rb'\(\s*(\d+)')
+BINARY_END = re.compile(rb'\)?\s*End of Binary Section\s+(\d+)\s*\)')
+BRACKETS = re.compile(rb'"[^"]*"|[()]')
+
+NODES = {10, 2010, 3010}
+CELLS = {12, 2012, 3012}
+FACES = {13, 2013, 3013}
+ZONES = {39, 45}
+
+BC_TYPES = {2: 'interior', 3: 'wall', 4: 'pressure-inlet', 5: 'pressure-outlet',
+            7: 'symmetry', 8: 'periodic-shadow', 9: 'pressure-far-field',
+            10: 'velocity-inlet', 12: 'periodic', 14: 'fan', 20: 'mass-flow-inlet',
+            24: 'interface', 31: 'parent', 36: 'outflow', 37: 'axis'}
+FACE_TYPES = {0: 'mixed', 2: 'linear', 3: 'triangular', 4: 'quadrilateral',
+              5: 'polygonal'}
+ELEMENT_TYPES = {0: 'mixed', 1: 'triangular', 2: 'tetrahedral', 3: 'quadrilateral',
+                 4: 'hexahedral', 5: 'pyramid', 6: 'wedge', 7: 'polyhedral'}
+
+# value of each byte as a hex digit, -1 for anything else
+HEX = np.full(256, -1, dtype=np.int8)
+for digit, char in enumerate(b'0123456789abcdef'):
+    HEX[char] = digit
+    HEX[ord(chr(char).upper())] = digit
+
+CHUNK = 64 << 20  # bytes of ascii parsed at once
+BLOCK = 1 << 22  # ints searched for face records at once
+MAX_FACE_NODES = 1024  # largest node count of a polygonal face
+
+
+@dataclass
+class Section:
+    id: int
+    header: list
+    start: int  # offset of the opening bracket
+    body: Optional[int]  # offset of the body, None if there is none
+    end: Optional[int] = None  # offset after the closing bracket, once known
+
+    @property
+    def binary(self):
+        return self.id >= 2000
+
+
+@dataclass
+class Zone:
+    id: int
+    type: str
+    name: str
+
+
+@dataclass
+class NodeZone:
+    id: int
+    first: int
+    last: int
+    type: int
+
+
+@dataclass
+class FaceZone:
+    id: int
+    first: int
+    last: int
+    bc_type: str
+    face_type: str
+    offsets: Optional[np.ndarray] = None  # CSR offsets into nodes, one per face + 1
+    nodes: Optional[np.ndarray] = None  # 1 based node indices
+    c0: Optional[np.ndarray] = None  # 1 based cell indices
+    c1: Optional[np.ndarray] = None  # 0 where there is no neighbouring cell
+
+    @property
+    def count(self):
+        return self.last - self.first + 1
+
+
+@dataclass
+class CellZone:
+    id: int
+    first: int
+    last: int
+    type: int
+    element_type: str
+    element_counts: dict = field(default_factory=dict)
+
+    @property
+    def count(self):
+        return self.last - self.first + 1
+
+
+@dataclass
+class MeshData:
+    dimensions: int = 3
+    declared: dict = field(default_factory=dict)  # total counts from the zone 0 headers
+    nodes: Optional[np.ndarray] = None
+    node_zones: list = field(default_factory=list)
+    face_zones: list = field(default_factory=list)
+    cell_zones: list = field(default_factory=list)
+    zones: dict = field(default_factory=dict)
+
+    def count(self, kind):
+        """
+        Number of nodes, faces or cells.
+
+        :param kind: (str) nodes, faces or cells.
+        :return: (int)
+        """
+        if kind in self.declared:
+            return self.declared[kind]
+
+        zones = {'nodes': self.node_zones, 'faces': self.face_zones,
+                 'cells': self.cell_zones}[kind]
+
+        return sum(zone.last - zone.first + 1 for zone in zones)
+
+    def face_csr(self):
+        """
+        Face connectivity of all face zones in face index order.
+
+        :return: (tuple[ndarray, ndarray, ndarray, ndarray]) offsets, nodes,
+            c0 and c1.
+        """
+        zones = sorted((zone for zone in self.face_zones if zone.offsets is not None),
+                       key=lambda zone: zone.first)
+        counts = np.concatenate([np.diff(zone.offsets) for zone in zones])
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        return (offsets,
+                np.concatenate([zone.nodes for zone in zones]),
+                np.concatenate([zone.c0 for zone in zones]),
+                np.concatenate([zone.c1 for zone in zones]))
+
+    def summary(self):
+        """
+        Counts, zone inventory and basic statistics.
+
+        :return: (dict)
+        """
+        summary = {
+            'dimensions': self.dimensions,
+            'nodes': self.count('nodes'),
+            'faces': self.count('faces'),
+            'cells': self.count('cells'),
+            'zones': [],
+        }
+
+        if self.nodes is not None and len(self.nodes):
+            summary['bounds'] = [self.nodes.min(axis=0).tolist(),
+                                 self.nodes.max(axis=0).tolist()]
+
+        for zone in self.cell_zones + self.face_zones:
+            named = self.zones.get(zone.id)
+            entry = {'id': zone.id, 'name': named.name if named else None,
+                     'type': named.type if named else getattr(zone, 'bc_type', None),
+                     'count': zone.count}
+
+            if isinstance(zone, CellZone):
+                entry['kind'] = 'cells'
+                entry['element_type'] = zone.element_type
+                if zone.element_counts:
+                    entry['element_counts'] = zone.element_counts
+            else:
+                entry['kind'] = 'faces'
+                entry['face_type'] = zone.face_type
+                if zone.offsets is not None:
+                    sizes = np.bincount(np.diff(zone.offsets))
+                    entry['nodes_per_face'] = {int(n): int(c) for n, c in enumerate(sizes) if c}
+
+            summary['zones'].append(entry)
+
+        return summary
+
+
+def parse_hex(buffer):
+    """
+    Parse whitespace separated hex integers.
+
+    :param buffer: (bytes-like) ascii text.
+    :return: (tuple[ndarray, ndarray]) values and the offset each token starts at.
+    """
+    values = HEX[np.frombuffer(buffer, dtype=np.uint8)]
+    digit = (values >= 0).view(np.int8)
+
+    edges = np.diff(np.concatenate(([0], digit, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if not len(starts):
+        return np.zeros(0, dtype=np.int64), starts
+
+    lengths = ends - starts
+    position = np.flatnonzero(digit)
+    token = np.repeat(np.arange(len(starts)), lengths)
+    shifted = values[position].astype(np.int64) << (4 * (ends[token] - 1 - position))
+
+    offsets = np.zeros(len(starts), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+
+    return np.add.reduceat(shifted, offsets), starts
+
+
+def ascii_chunks(buffer, start, end, chunk=CHUNK):
+    """
+    Split an ascii section body into chunks that end at line breaks.
+
+    :param buffer: (mmap) file contents.
+    :param start: (int) offset of the body.
+    :param end: (int) offset after the body.
+    :param chunk: (int) approximate chunk size in bytes.
+    :return: generator of (start, end) offsets.
+    """
+    while start < end:
+        stop = buffer.find(b'\n', start + chunk, end) if end - start > chunk else -1
+        stop = end if stop == -1 else stop + 1
+        yield start, stop
+        start = stop
+
+
+def record_starts(ints, count, block=BLOCK):
+    """
+    Find the start of each record in a stream of variable length face
+    records, [n, node_1 .. node_n, c0, c1], as found in binary mixed and
+    polygonal face sections.
+
+    Record boundaries can only be found by following the chain of record
+    lengths. Within a block of ints every position holding a plausible node
+    count is treated as a possible start and linked to its successor; pointer
+    doubling then marks the positions reachable from the first start in
+    log2(records) vectorised steps.
+
+    :param ints: (ndarray) ints from the first record onwards.
+    :param count: (int) number of records.
+    :param block: (int) ints searched at once.
+    :return: generator of arrays of record starts.
+    """
+    found = 0
+    start = 0
+
+    while found < count:
+        local = ints[start:start + block]
+        size = len(local)
+        if not size:
+            raise ValueError('face section ended before all faces were read')
+
+        candidates = np.flatnonzero((local > 0) & (local <= MAX_FACE_NODES))
+        if not len(candidates) or candidates[0] != 0:
+            raise ValueError(f'no face record at int {start} of the face section')
+        index = np.full(size + 1, len(candidates), dtype=np.int64)
+        index[candidates] = np.arange(len(candidates))
+
+        # successor of each candidate, the sentinel len(candidates) past the block
+        successor = np.minimum(candidates + local[candidates].astype(np.int64) + 3, size)
+        successor = np.append(index[successor], len(candidates))
+
+        reached = np.zeros(len(candidates) + 1, dtype=bool)
+        reached[0] = True
+        while True:
+            extended = reached.copy()
+            extended[successor[reached]] = True
+            if np.array_equal(extended, reached):
+                break
+            reached = extended
+            successor = successor[successor]
+
+        starts = candidates[reached[:-1]][:count - found]
+        found += len(starts)
+        last = int(starts[-1])
+        yield start + starts
+        start += last + int(local[last]) + 3
+
+
+def extract_records(ints, starts):
+    """
+    Split variable length face records into CSR connectivity.
+
+    :param ints: (ndarray) face ints.
+    :param starts: (ndarray) record starts.
+    :return: (tuple[ndarray, ndarray, ndarray, ndarray]) node counts, nodes, c0, c1.
+    """
+    counts = ints[starts].astype(np.int64)
+    offsets = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=offsets[1:])
+
+    index = np.repeat(starts + 1 - offsets, counts) + np.arange(counts.sum())
+
+    return counts, ints[index], ints[starts + counts + 1], ints[starts + counts + 2]
+
+
+def scan(buffer, position=0):
+    """
+    Stream the sections of a legacy msh file without reading their bodies.
+
+    :param buffer: (mmap) file contents.
+    :param position: (int) offset to start at.
+    :return: generator of Section.
+    """
+    while True:
+        start = buffer.find(b'(', position)
+        if start == -1:
+            return
+
+        match = SECTION.match(buffer, start)
+        if match is None:
+            position = start + 1
+            continue
+
+        section_id = int(match.group(1))
+        position = match.end()
+        while buffer[position:position + 1].isspace():
+            position += 1
+
+        header = []
+        body = None
+        if buffer[position:position + 1] == b'(' and section_id not in (0, 1):
+            close = buffer.find(b')', position)
+            header = buffer[position + 1:close].decode().split()
+            position = close + 1
+            while buffer[position:position + 1].isspace():
+                position += 1
+            if buffer[position:position + 1] == b'(':
+                body = position + 1
+
+        section = Section(section_id, header, start, body)
+        if body is None and header:
+            section.end = buffer.find(b')', position) + 1
+
+        yield section
+
+        if section.end is None:
+            section.end = skip(buffer, section, position)
+        position = section.end
+
+
+def skip(buffer, section, position):
+    """
+    Offset after the end of a section whose body was not read.
+
+    :param buffer: (mmap) file contents.
+    :param section: (Section) section.
+    :param position: (int) offset after the header.
+    :return: (int)
+    """
+    if section.binary:
+        end = re.compile(rb'End of Binary Section\s+%d\s*\)' % section.id)
+        return end.search(buffer, section.body or position).end()
+
+    depth = 1
+    for match in BRACKETS.finditer(buffer, position):
+        token = match.group()
+        if token == b'(':
+            depth += 1
+        elif token == b')':
+            depth -= 1
+            if depth == 0:
+                return match.end()
+
+    return len(buffer)
+
+
+def binary_end(buffer, section, position):
+    match = BINARY_END.match(buffer, position)
+    if match is None:
+        raise ValueError(f'section {section.id} at {section.start} has no end marker')
+
+    return match.end()
+
+
+def ascii_end(buffer, section):
+    """
+    End of an ascii section body, which holds no brackets, and of the section.
+
+    :return: (tuple[int, int]) offset of the closing bracket of the body and
+        offset after the section.
+    """
+    body_end = buffer.find(b')', section.body)
+
+    return body_end, buffer.find(b')', body_end + 1) + 1
+
+
+def read_nodes(buffer, section, mesh, nodes=True):
+    zone_id, first, last, node_type = (int(value, 16) for value in section.header[:4])
+    dimensions = int(section.header[4], 16) if len(section.header) > 4 else mesh.dimensions
+
+    if zone_id == 0:
+        mesh.declared['nodes'] = last - first + 1
+        return
+
+    mesh.node_zones.append(NodeZone(zone_id, first, last, node_type))
+    count = last - first + 1
+
+    if section.body is None:
+        return
+
+    if section.binary:
+        dtype = np.float64 if section.id // 1000 == 3 else np.float32
+        size = count * dimensions * np.dtype(dtype).itemsize
+        section.end = binary_end(buffer, section, section.body + size)
+        if not nodes:
+            return
+        coordinates = np.frombuffer(buffer, dtype=dtype, count=count * dimensions,
+                                    offset=section.body).reshape(count, dimensions)
+    else:
+        body_end, section.end = ascii_end(buffer, section)
+        if not nodes:
+            return
+        coordinates = np.concatenate([
+            np.array(buffer[start:stop].split(), dtype=np.float64)
+            for start, stop in ascii_chunks(buffer, section.body, body_end)
+        ]).reshape(count, dimensions)
+
+    if mesh.nodes is None:
+        total = mesh.declared.get('nodes', last)
+        mesh.nodes = np.zeros((total, dimensions), dtype=np.float64)
+    elif len(mesh.nodes) < last:
+        mesh.nodes = np.concatenate([mesh.nodes, np.zeros((last - len(mesh.nodes), dimensions))])
+
+    mesh.nodes[first - 1:last] = coordinates
+
+
+def read_cells(buffer, section, mesh):
+    values = [int(value, 16) for value in section.header]
+    zone_id, first, last, cell_type = values[:4]
+    element_type = values[4] if len(values) > 4 else 0
+
+    if zone_id == 0:
+        mesh.declared['cells'] = last - first + 1
+        return
+
+    zone = CellZone(zone_id, first, last, cell_type, ELEMENT_TYPES.get(element_type, str(element_type)))
+    mesh.cell_zones.append(zone)
+
+    if section.body is None:
+        zone.element_counts = {zone.element_type: zone.count}
+        return
+
+    if section.binary:
+        types = np.frombuffer(buffer, dtype=np.int32, count=zone.count, offset=section.body)
+        section.end = binary_end(buffer, section, section.body + 4 * zone.count)
+    else:
+        body_end, section.end = ascii_end(buffer, section)
+        types = np.concatenate([parse_hex(buffer[start:stop])[0]
+                                for start, stop in ascii_chunks(buffer, section.body, body_end)])
+
+    zone.element_counts = {ELEMENT_TYPES.get(int(t), str(t)): int(c)
+                           for t, c in enumerate(np.bincount(types)) if c}
+
+
+def read_faces(buffer, section, mesh, faces=True):
+    values = [int(value, 16) for value in section.header]
+    zone_id, first, last, bc_type = values[:4]
+    face_type = values[4] if len(values) > 4 else 0
+
+    if zone_id == 0:
+        mesh.declared['faces'] = last - first + 1
+        return
+
+    zone = FaceZone(zone_id, first, last, BC_TYPES.get(bc_type, str(bc_type)),
+                    FACE_TYPES.get(face_type, str(face_type)))
+    mesh.face_zones.append(zone)
+
+    if section.body is None:
+        return
+
+    if not faces:
+        # binary sections are skipped by their end marker
+        if not section.binary:
+            section.end = ascii_end(buffer, section)[1]
+        return
+
+    mixed = face_type in (0, 5)
+
+    if section.binary:
+        ints = np.frombuffer(buffer, dtype=np.int32, offset=section.body,
+                             count=(len(buffer) - section.body) // 4)
+        if mixed:
+            parts = [extract_records(ints, starts) for starts in record_starts(ints, zone.count)]
+            size = sum(len(part[1]) for part in parts) + 3 * zone.count
+        else:
+            records = ints[:zone.count * (face_type + 2)].reshape(zone.count, face_type + 2)
+            parts = [(np.full(zone.count, face_type), records[:, :face_type].ravel(),
+                      records[:, -2], records[:, -1])]
+            size = records.size
+        section.end = binary_end(buffer, section, section.body + 4 * size)
+    else:
+        body_end, section.end = ascii_end(buffer, section)
+        parts = [ascii_faces(buffer, start, stop, mixed)
+                 for start, stop in ascii_chunks(buffer, section.body, body_end)]
+
+    counts = np.concatenate([part[0] for part in parts]).astype(np.int64)
+    zone.offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=zone.offsets[1:])
+    zone.nodes = np.concatenate([part[1] for part in parts])
+    zone.c0 = np.concatenate([part[2] for part in parts])
+    zone.c1 = np.concatenate([part[3] for part in parts])
+
+
+def ascii_faces(buffer, start, stop, mixed):
+    """
+    Parse ascii face records, one face per line.
+
+    :return: (tuple[ndarray, ndarray, ndarray, ndarray]) node counts, nodes, c0, c1.
+    """
+    chunk = buffer[start:stop]
+    values, token_starts = parse_hex(chunk)
+
+    breaks = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == ord('\n'))
+    line = np.searchsorted(breaks, token_starts)
+    tokens = np.bincount(line)
+    tokens = tokens[tokens > 0]
+
+    ends = np.cumsum(tokens)
+    firsts = ends - tokens
+    node_counts = tokens - 3 if mixed else tokens - 2
+
+    keep = np.ones(len(values), dtype=bool)
+    keep[ends - 1] = False
+    keep[ends - 2] = False
+    if mixed:
+        keep[firsts] = False
+
+    return node_counts, values[keep], values[ends - 2], values[ends - 1]
+
+
+def read_zone(section, mesh):
+    if len(section.header) >= 3:
+        zone_id = int(section.header[0])
+        mesh.zones[zone_id] = Zone(zone_id, section.header[1], section.header[2])
+
+
+def read(file_path: os.PathLike, nodes: bool = True, faces: bool = True):
+    """
+    Read a fluent legacy ascii or binary msh file without fluent.
+
+    The file is memory mapped and read section by section; ascii sections are
+    parsed in chunks, binary sections straight from the mapping.
+
+    :param file_path: (os.Pathlike) msh file.
+    :param nodes: (Bool) read the node coordinates.
+    :param faces: (Bool) read the face connectivity. Counts and zones are
+        always read.
+    :return: (MeshData)
+    """
+    mesh = MeshData()
+
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        try:
+            for section in scan(buffer):
+                if section.id == 2 and not section.header:
+                    mesh.dimensions = int(buffer[section.start + 2:buffer.find(b')', section.start)])
+                    section.end = buffer.find(b')', section.start) + 1
+                elif section.id in NODES and section.header:
+                    read_nodes(buffer, section, mesh, nodes)
+                elif section.id in CELLS and section.header:
+                    read_cells(buffer, section, mesh)
+                elif section.id in FACES and section.header:
+                    read_faces(buffer, section, mesh, faces)
+                elif section.id in ZONES:
+                    read_zone(section, mesh)
+        except ValueError as error:
+            # the traceback keeps arrays viewing the mapping alive, which
+            # would stop it closing and hide the error behind a BufferError
+            raise error.with_traceback(None)
+
+    return mesh
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('mesh', help="fluent legacy msh file")
+    parser.add_argument('--faces', action='store_true',
+                        help="read the face connectivity for face statistics")
+    parser.add_argument('--json', action='store_true',
+                        help="print the summary as json")
+    args = parser.parse_args()
+
+    summary = read(args.mesh, faces=args.faces).summary()
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f'{summary["cells"]} cells, {summary["faces"]} faces, {summary["nodes"]} nodes')
+        if 'bounds' in summary:
+            print(f'bounds: {summary["bounds"][0]} to {summary["bounds"][1]}')
+        for zone in summary['zones']:
+            print(f'{zone["kind"]:<6} {zone["id"]:>4} {str(zone["name"]):<30} '
+                  f'{str(zone["type"]):<18} {zone["count"]:>12}')
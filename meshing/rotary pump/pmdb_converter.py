@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import pathlib
+import time
+
+import geometry_handler
+import journal
+import mesh_cache
+
+MANIFEST = 'pmdb_manifest.json'
+
+
+def load_manifest(folder: os.PathLike):
+    """
+    Read the pmdb manifest of a geometry folder.
+
+    :param folder: (os.Pathlike) geometry folder.
+    :return: (dict) entries keyed by geometry file name.
+    """
+    path = pathlib.Path(folder) / MANIFEST
+
+    if not path.exists():
+        return {}
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(folder: os.PathLike, manifest: dict):
+    path = pathlib.Path(folder) / MANIFEST
+    partial = path.with_suffix('.partial')
+
+    with open(partial, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    os.replace(partial, path)
+
+
+def lookup(geometry: os.PathLike, digest: str = None):
+    """
+    Converted pmdb of a geometry, if it was made from the current contents of
+    the geometry file.
+
+    :param geometry: (os.Pathlike) cad geometry.
+    :param digest: (str) mesh_cache.file_hash of the geometry, hashed when
+        not given.
+    :return: (pathlib.Path) pmdb file or None.
+    """
+    geometry = pathlib.Path(geometry)
+    entry = load_manifest(geometry.parent).get(geometry.name)
+
+    if entry is None or not geometry.exists():
+        return None
+
+    pmdb = geometry.parent / entry['pmdb']
+    if not pmdb.exists():
+        return None
+
+    if entry['hash'] != (digest or mesh_cache.file_hash(geometry)):
+        print(f'{pmdb.name} is out of date with {geometry.name}, convert it again')
+        return None
+
+    return pmdb
+
+
+def pending(folder: os.PathLike, pattern: str = '*.scdoc'):
+    """
+    Geometries in a folder without an up to date pmdb.
+
+    :param folder: (os.Pathlike) geometry folder.
+    :param pattern: (str) glob matching the cad geometries.
+    :return: (list[tuple[pathlib.Path, str]]) geometries and their hashes.
+    """
+    folder = pathlib.Path(folder)
+    manifest = load_manifest(folder)
+    geometries = []
+
+    for geometry in sorted(folder.glob(pattern)):
+        digest = mesh_cache.file_hash(geometry)
+        entry = manifest.get(geometry.name)
+
+        up_to_date = (entry is not None and entry['hash'] == digest
+                      and (folder / entry['pmdb']).exists())
+        if not up_to_date:
+            geometries.append((geometry, digest))
+
+    return geometries
+
+
+def convert(folder: os.PathLike, pattern: str = '*.scdoc', session=None,
+            processors: int = 4, show_gui: bool = False):
+    """
+    Convert every geometry in a folder to pmdb in a single fluent session.
+    Geometries whose pmdb was made from their current contents are skipped.
+
+    :param folder: (os.Pathlike) geometry folder.
+    :param pattern: (str) glob matching the cad geometries.
+    :param session: running meshing session to use, it is left open.
+        Otherwise fluent is launched for the conversion and exited after.
+    :param processors: (int) cores for a launched session.
+    :param show_gui: (Bool) show the gui of a launched session.
+    :return: (list[pathlib.Path]) pmdb files written.
+    """
+    folder = pathlib.Path(folder).resolve()
+    geometries = pending(folder, pattern)
+
+    if not geometries:
+        print(f'All pmdb files in {folder} are up to date')
+        return []
+
+    print(f'Converting {len(geometries)} geometries in {folder}')
+
+    # one stage per geometry, so a failure can be traced to its file
+    commands = [(geometry.name, geometry_handler.save_pmdb(geometry, iteration))
+                for iteration, (geometry, _) in enumerate(geometries)]
+    hashes = {geometry.name: digest for geometry, digest in geometries}
+
+    manifest = load_manifest(folder)
+    converted = []
+    start = time.time()
+
+    def completed(name):
+        pmdb = folder.joinpath(name).with_suffix('.pmdb')
+        # a pmdb left from an earlier conversion does not count
+        if not pmdb.exists() or pmdb.stat().st_mtime < start - 1:
+            print(f'{name} was imported but no pmdb was written')
+            return
+        manifest[name] = {'hash': hashes[name], 'pmdb': pmdb.name}
+        save_manifest(folder, manifest)
+        converted.append(pmdb)
+
+    # a geometry that fails to convert does not affect the others
+    tracker = journal.StageTracker(independent=True)
+    tracker.on_complete.append(completed)
+
+    if session is None:
+        import ansys.fluent.core as pyfluent
+
+        meshing = pyfluent.launch_fluent(mode="meshing", precision="double",
+                                         processor_count=processors,
+                                         show_gui=show_gui)
+    else:
+        meshing = session
+
+    callback = meshing.transcript.register_callback(tracker)
+    try:
+        meshing.execute_tui(f'{journal.consolidate(commands)}\n{journal.end_marker("pmdb")}')
+        # the last geometry's transcript can arrive after execute_tui returned
+        if not tracker.wait("pmdb"):
+            raise journal.StageError(tracker.stage, 'the transcript did not reach the end marker')
+        tracker.finish()
+    except journal.StageError:
+        raise
+    except Exception as error:
+        raise journal.StageError(tracker.stage, error) from error
+    finally:
+        meshing.transcript.unregister_callback(callback)
+        if session is None:
+            meshing.exit()
+
+    for stage, line in tracker.errors:
+        print(f'{stage}: {line}')
+
+    return converted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('folder', help="folder of cad geometries")
+    parser.add_argument('--pattern', default='*.scdoc', action='store',
+                        help="glob matching the geometries to convert")
+    parser.add_argument('--processors', default=4, action='store', type=int,
+                        help="cores for fluent")
+    parser.add_argument('--show_gui', action='store_true',
+                        help="show the fluent gui")
+    args = parser.parse_args()
+
+    pmdbs = convert(args.folder, args.pattern, processors=args.processors,
+                    show_gui=args.show_gui)
+    print(f'Wrote {len(pmdbs)} pmdb files')
@@ -0,0 +1,126 @@
+import contextlib
+import json
+import os
+import pathlib
+import time
+
+import resources
+
+
+class Profiler:
+    def __init__(self, output_folder: os.PathLike, interval: float = 1.0):
+        """
+        Records the wall time of pipeline stages and samples the cpu and
+        memory of the fluent process tree while they run.
+
+        :param output_folder: (os.Pathlike) folder the trace is written to.
+        :param interval: (float) seconds between samples.
+        """
+        self.output_folder = pathlib.Path(output_folder)
+        self.interval = interval
+        self.stages = []
+        self.samples = []
+        self.sampler = None
+
+    def watch(self, pid):
+        """
+        Start sampling a process tree, e.g. resources.fluent_pid(session).
+
+        :param pid: (int) root process id.
+        """
+        self.stop()
+        self.sampler = resources.ProcessTreeSampler(pid, self.interval).start()
+
+    def stop(self):
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.samples.extend(self.sampler.samples)
+            self.sampler = None
+
+    def record(self, stage: str, start: float, end: float):
+        """
+        Record a stage timed elsewhere, e.g. from journal.StageTracker.timings.
+
+        :param stage: (str) name of the stage.
+        :param start: (float) start time.
+        :param end: (float) end time.
+        """
+        self.stages.append({'stage': stage, 'start': start, 'end': end})
+
+    @contextlib.contextmanager
+    def stage(self, stage: str):
+        """
+        Time a stage.
+
+        :param stage: (str) name of the stage.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(stage, start, time.time())
+
+    def summary(self):
+        """
+        Wall time, mean cpu and peak memory of each stage.
+
+        :return: (list[dict])
+        """
+        samples = self.samples + (self.sampler.samples if self.sampler else [])
+        rows = []
+
+        for stage in self.stages:
+            during = [sample for sample in samples
+                      if stage['start'] <= sample['time'] <= stage['end']]
+            rows.append({
+                'stage': stage['stage'],
+                'wall_time': stage['end'] - stage['start'],
+                'mean_cpu': sum(s['cpu'] for s in during) / len(during) if during else None,
+                'peak_rss': max((s['rss'] for s in during), default=None),
+            })
+
+        return rows
+
+    def table(self):
+        """
+        Summary as a text table.
+
+        :return: (str)
+        """
+        rows = self.summary()
+        total = sum(row['wall_time'] for row in rows) or 1.0
+        lines = [f'{"stage":<24} {"wall (s)":>9} {"share":>6} {"cpu (%)":>8} {"peak (GB)":>9}']
+
+        for row in rows:
+            cpu = f'{row["mean_cpu"]:.0f}' if row['mean_cpu'] is not None else '-'
+            rss = f'{row["peak_rss"] / 2 ** 30:.2f}' if row['peak_rss'] is not None else '-'
+            lines.append(f'{row["stage"]:<24} {row["wall_time"]:>9.1f} '
+                         f'{row["wall_time"] / total:>6.0%} {cpu:>8} {rss:>9}')
+
+        return '\n'.join(lines)
+
+    def write(self, name: str = 'profile'):
+        """
+        Write the json trace and the summary table to the output folder.
+
+        :param name: (str) file name without extension.
+        :return: (pathlib.Path) path of the json trace.
+        """
+        self.stop()
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+
+        trace = {
+            'interval': self.interval,
+            'stages': self.stages,
+            'summary': self.summary(),
+            'samples': self.samples,
+        }
+
+        trace_file = self.output_folder / f'{name}.json'
+        with open(trace_file, 'w') as f:
+            json.dump(trace, f, indent=2)
+
+        with open(self.output_folder / f'{name}.txt', 'w') as f:
+            f.write(self.table() + '\n')
+
+        return trace_file
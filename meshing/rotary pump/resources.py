@@ -0,0 +1,121 @@
+import threading
+import time
+
+import psutil
+
+
+def fluent_pid(session):
+    """
+    Process id of the fluent (cortex) process behind a pyfluent session.
+
+    :param session: pyfluent session.
+    :return: (int) pid or None if it cannot be determined.
+    """
+    connection = getattr(session, '_fluent_connection', None)
+    properties = getattr(connection, 'connection_properties', None)
+    pid = getattr(properties, 'cortex_pid', None)
+
+    if pid is None:
+        print('Could not find the fluent process of the session, its resources are not sampled')
+
+    return pid
+
+
+def process_tree(pid):
+    """
+    A process and all of its descendants.
+
+    :param pid: (int) root process id.
+    :return: (list[psutil.Process]) processes that are still alive.
+    """
+    try:
+        root = psutil.Process(pid)
+        return [root] + root.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return []
+
+
+def tree_rss(pid):
+    """
+    Resident memory of a process tree.
+
+    :param pid: (int) root process id.
+    :return: (int) bytes.
+    """
+    total = 0
+
+    for process in process_tree(pid):
+        try:
+            total += process.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+
+    return total
+
+
+class ProcessTreeSampler:
+    def __init__(self, pid, interval: float = 1.0):
+        """
+        Samples the cpu usage and resident memory of a process tree in a
+        background thread.
+
+        :param pid: (int) root process id.
+        :param interval: (float) seconds between samples.
+        """
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.peak_rss = 0
+
+        self._processes = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self):
+        """
+        Take a sample of the process tree.
+
+        :return: (dict) time, cpu percent (summed over processes), rss bytes
+            and number of processes.
+        """
+        cpu = 0.0
+        rss = 0
+        alive = {}
+
+        for process in process_tree(self.pid):
+            # reuse Process objects, cpu_percent is measured between calls
+            process = self._processes.get(process.pid, process)
+            try:
+                cpu += process.cpu_percent(None)
+                rss += process.memory_info().rss
+            except psutil.NoSuchProcess:
+                continue
+            alive[process.pid] = process
+
+        self._processes = alive
+        self.peak_rss = max(self.peak_rss, rss)
+
+        sample = {'time': time.time(), 'cpu': cpu, 'rss': rss,
+                  'processes': len(alive)}
+        self.samples.append(sample)
+
+        return sample
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
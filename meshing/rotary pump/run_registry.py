@@ -0,0 +1,303 @@
+import argparse
+import json
+import os
+import pathlib
+import sqlite3
+import time
+
+import checkpoint
+import mesh_cache
+
+REGISTRY = pathlib.Path(os.path.dirname(__file__)) / 'run_registry.sqlite'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT UNIQUE NOT NULL,
+    kind TEXT,
+    working_folder TEXT,
+    registered REAL,
+    config_hash TEXT,
+    geometry_hash TEXT,
+    mesh_file TEXT,
+    cells INTEGER,
+    faces INTEGER,
+    nodes INTEGER,
+    config TEXT,
+    timings TEXT,
+    quality TEXT,
+    artifacts TEXT
+);
+CREATE TABLE IF NOT EXISTS params (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value
+);
+CREATE INDEX IF NOT EXISTS params_key_value ON params (key, value);
+CREATE INDEX IF NOT EXISTS params_run ON params (run);
+CREATE INDEX IF NOT EXISTS runs_config_hash ON runs (config_hash);
+CREATE INDEX IF NOT EXISTS runs_geometry_hash ON runs (geometry_hash);
+'''
+
+# run columns find() can filter on besides the parameters
+COLUMNS = ['run_id', 'kind', 'working_folder', 'config_hash', 'geometry_hash', 'mesh_file']
+JSON_COLUMNS = ['config', 'timings', 'quality', 'artifacts']
+
+
+def flatten(config, prefix=''):
+    """
+    Flatten a config into dotted parameter names, e.g. mesh.layers. Entries
+    of lists with a name, like scoped sizings, are keyed by it, e.g.
+    scoped.rocket_curve.max.
+
+    :param config: plain config, as stored in the run manifest.
+    :param prefix: (str) name of the enclosing section.
+    :return: (dict) parameter values, lists of plain values as json text.
+    """
+    if isinstance(config, dict):
+        params = {}
+        for key, value in config.items():
+            params.update(flatten(value, f'{prefix}{key}.'))
+        return params
+
+    if isinstance(config, list) and config and all(isinstance(item, dict) and 'name' in item for item in config):
+        params = {}
+        for item in config:
+            params.update(flatten(item, f'{prefix}{item["name"]}.'))
+        return params
+
+    if isinstance(config, (list, tuple)):
+        config = json.dumps(config)
+
+    return {prefix.rstrip('.'): config}
+
+
+def mesh_counts(quality: dict, mesh_file=None):
+    """
+    Cell, face and node counts of a mesh, the latest reported in the
+    transcript, or from an array export of the mesh.
+
+    :param quality: (dict) quality metrics by stage.
+    :param mesh_file: (os.Pathlike) mesh file.
+    :return: (dict)
+    """
+    counts = {}
+    for metrics in quality.values():
+        counts.update({kind: metrics[kind] for kind in ('cells', 'faces', 'nodes') if kind in metrics})
+
+    header = pathlib.Path(mesh_file).with_suffix('.arrays') / 'header.json' if mesh_file else None
+    if header is not None and header.exists():
+        with open(header) as f:
+            counts = {**json.load(f)['counts'], **counts}
+
+    return counts
+
+
+def read_json(file_path: pathlib.Path, default=None):
+    if not file_path.exists():
+        return default
+    with open(file_path) as f:
+        return json.load(f)
+
+
+def folder_record(working_folder: os.PathLike, kind: str = 'automesh'):
+    """
+    Registry record of an auto mesh working folder, read from the manifest,
+    profile and quality files the run left.
+
+    :param working_folder: (os.Pathlike) run working folder.
+    :param kind: (str) kind of run.
+    :return: (dict) arguments for Registry.add, None if the folder holds no
+        finished run.
+    """
+    working_folder = pathlib.Path(working_folder).resolve()
+    manifest = checkpoint.Manifest(working_folder)
+
+    if manifest.config is None or 'mesh_file' not in manifest.data:
+        return None
+
+    quality = read_json(working_folder / 'quality.json', {})
+    profile = read_json(working_folder / 'profile.json', {})
+
+    artifacts = {stage: entry['checkpoint'] for stage, entry in manifest.data['stages'].items()
+                 if entry.get('checkpoint')}
+    for name in ('profile.json', 'quality.json', 'journals'):
+        if (working_folder / name).exists():
+            artifacts[name] = str(working_folder / name)
+
+    return {
+        'run_id': working_folder.name.split('_')[-1],
+        'kind': kind,
+        'working_folder': str(working_folder),
+        'config': manifest.config,
+        'config_hash': mesh_cache.config_hash(manifest.config),
+        'geometry_hash': manifest.data.get('geometry_hash'),
+        'mesh_file': manifest.data['mesh_file'],
+        'counts': mesh_counts(quality, manifest.data['mesh_file']),
+        'timings': {row['stage']: row['wall_time'] for row in profile.get('summary', [])},
+        'quality': quality,
+        'artifacts': artifacts,
+    }
+
+
+class Registry:
+    def __init__(self, path: os.PathLike = REGISTRY, timeout: float = 30.0):
+        """
+        SQLite index of finished runs. Every config parameter of a run is
+        stored in an indexed table, so runs can be found by any parameter
+        without scanning working folders.
+
+        :param path: (os.Pathlike) database file.
+        :param timeout: (float) seconds to wait for another process writing.
+        """
+        self.path = pathlib.Path(path)
+        self.connection = sqlite3.connect(self.path, timeout=timeout)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, run_id, kind=None, working_folder=None, config=None, config_hash=None,
+            geometry_hash=None, mesh_file=None, counts=None, timings=None, quality=None,
+            artifacts=None):
+        """
+        Register a finished run, replacing an earlier record of the same run.
+
+        :param run_id: (str) run id, e.g. the uuid of the working folder.
+        :param kind: (str) kind of run, automesh or watertight.
+        :param working_folder: (os.Pathlike) folder holding the run files.
+        :param config: plain config, flattened into searchable parameters.
+        :param config_hash: (str) hash of the config.
+        :param geometry_hash: (str) hash of the geometry contents.
+        :param mesh_file: (os.Pathlike) finished mesh.
+        :param counts: (dict) cells, faces and nodes of the mesh.
+        :param timings: (dict) seconds per stage.
+        :param quality: (dict) quality metrics by stage.
+        :param artifacts: (dict) other files of the run by name.
+        :return: (int) row id of the run.
+        """
+        counts = counts or {}
+        params = flatten(config) if config is not None else {}
+
+        with self.connection:
+            self.connection.execute('DELETE FROM runs WHERE run_id = ?', (str(run_id),))
+            cursor = self.connection.execute(
+                'INSERT INTO runs (run_id, kind, working_folder, registered, config_hash, '
+                'geometry_hash, mesh_file, cells, faces, nodes, config, timings, quality, artifacts) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (str(run_id), kind, str(working_folder) if working_folder else None, time.time(),
+                 config_hash, geometry_hash, str(mesh_file) if mesh_file else None,
+                 counts.get('cells'), counts.get('faces'), counts.get('nodes'),
+                 json.dumps(config), json.dumps(timings or {}), json.dumps(quality or {}),
+                 json.dumps(artifacts or {})))
+            self.connection.executemany(
+                'INSERT INTO params (run, key, value) VALUES (?, ?, ?)',
+                [(cursor.lastrowid, key, value) for key, value in params.items()])
+
+        return cursor.lastrowid
+
+    def find(self, params: dict = None, **columns):
+        """
+        Runs with the given parameter and column values, newest first.
+
+        :param params: (dict) parameter values by dotted name, e.g.
+            {'mesh.layers': 15}.
+        :param columns: run columns to match, e.g. geometry_hash.
+        :return: (list[dict]) run records.
+        """
+        clauses, values = [], []
+
+        for column, value in columns.items():
+            if column not in COLUMNS:
+                raise KeyError(f'{column} is not a run column, use one of {COLUMNS}')
+            clauses.append(f'{column} = ?')
+            values.append(value)
+
+        for key, value in (params or {}).items():
+            if isinstance(value, (list, tuple)):
+                value = json.dumps(value)
+            clauses.append('id IN (SELECT run FROM params WHERE key = ? AND value = ?)')
+            values.extend([key, value])
+
+        where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+        rows = self.connection.execute(
+            f'SELECT * FROM runs {where} ORDER BY registered DESC', values)
+
+        return [self.record(row) for row in rows]
+
+    def get(self, run_id: str):
+        """
+        Record of a run.
+
+        :param run_id: (str) run id.
+        :return: (dict) run record or None.
+        """
+        runs = self.find(run_id=str(run_id))
+        return runs[0] if runs else None
+
+    @staticmethod
+    def record(row: sqlite3.Row):
+        record = dict(row)
+        for column in JSON_COLUMNS:
+            record[column] = json.loads(record[column]) if record[column] else None
+        return record
+
+    def scan(self, folder: os.PathLike, pattern: str = 'automesh_*'):
+        """
+        Register the finished runs in the working folders below a folder,
+        e.g. runs made before the registry existed.
+
+        :param folder: (os.Pathlike) folder holding working folders.
+        :param pattern: (str) glob matching the working folders.
+        :return: (int) runs registered.
+        """
+        count = 0
+        for working_folder in sorted(pathlib.Path(folder).glob(pattern)):
+            record = folder_record(working_folder)
+            if record is not None:
+                self.add(**record)
+                count += 1
+
+        return count
+
+
+def parse_param(text: str):
+    import yaml
+
+    key, _, value = text.partition('=')
+    if not value:
+        raise argparse.ArgumentTypeError(f'{text} is not key=value')
+    return key, yaml.safe_load(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('params', nargs='*', type=parse_param,
+                        help="parameter values to match, e.g. mesh.layers=15")
+    parser.add_argument('--registry', default=REGISTRY, action='store',
+                        help="registry database")
+    parser.add_argument('--geometry_hash', default=None, action='store',
+                        help="only runs of this geometry")
+    parser.add_argument('--scan', default=None, action='store',
+                        help="register the finished runs in the working folders below this folder")
+    args = parser.parse_args()
+
+    with Registry(args.registry) as registry:
+        if args.scan:
+            print(f'Registered {registry.scan(args.scan)} runs from {args.scan}')
+
+        columns = {'geometry_hash': args.geometry_hash} if args.geometry_hash else {}
+        start = time.perf_counter()
+        runs = registry.find(dict(args.params), **columns)
+        print(f'{len(runs)} runs found in {(time.perf_counter() - start) * 1000:.1f} ms')
+
+        for run in runs:
+            print(f'{run["run_id"]:<10} {run["cells"] or "-":>10} cells  {run["mesh_file"]}')
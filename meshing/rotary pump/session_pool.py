@@ -0,0 +1,190 @@
+import atexit
+import contextlib
+import queue
+import threading
+
+import resources
+
+# clears the mesh, scoped sizings and size field left by the previous job
+RESET_COMMANDS = '''
+mesh/clear-mesh
+objects/delete-all yes
+scoped-sizing delete-all yes
+scoped-sizing delete-size-field
+'''
+
+
+class PooledSession:
+    def __init__(self, session):
+        """
+        A pooled fluent session and its usage.
+
+        :param session: pyfluent meshing session.
+        """
+        self.session = session
+        self.uses = 0
+        self.pid = resources.fluent_pid(session)
+        self.baseline_rss = resources.tree_rss(self.pid) if self.pid else 0
+
+    def memory_growth(self):
+        """
+        Resident memory relative to the memory just after launch.
+
+        :return: (float) ratio, 1 when memory cannot be measured.
+        """
+        if not self.pid or not self.baseline_rss:
+            return 1.0
+
+        return resources.tree_rss(self.pid) / self.baseline_rss
+
+
+class SessionPool:
+    def __init__(self, size: int = 1, max_uses: int = 10,
+                 max_memory_growth: float = 3.0,
+                 reset_commands: str = RESET_COMMANDS, **launch_kwargs):
+        """
+        Keeps fluent meshing sessions warm and hands them out to jobs.
+
+        Sessions are launched lazily up to size. Between jobs they are reset
+        with reset_commands, and recycled after max_uses jobs or once their
+        memory has grown by max_memory_growth since launch.
+
+        :param size: (int) maximum number of sessions.
+        :param max_uses: (int) jobs a session runs before it is relaunched.
+        :param max_memory_growth: (float) memory growth factor that triggers
+            a relaunch.
+        :param reset_commands: (str) tui commands run between jobs.
+        :param launch_kwargs: arguments for pyfluent.launch_fluent.
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.max_memory_growth = max_memory_growth
+        self.reset_commands = reset_commands
+        self.launch_kwargs = {'mode': 'meshing', **launch_kwargs}
+
+        self.idle = queue.LifoQueue()
+        self.active = {}
+        self.launched = 0
+        self.lock = threading.Lock()
+        self.closed = False
+
+        atexit.register(self.close)
+
+    def launch(self):
+        import ansys.fluent.core as pyfluent
+
+        print(f'Launching pooled fluent session {self.launched}/{self.size}')
+        return PooledSession(pyfluent.launch_fluent(**self.launch_kwargs))
+
+    def acquire(self):
+        """
+        Take a session from the pool, launching one if the pool is not full.
+        Blocks until a session is free otherwise.
+
+        :return: pyfluent session.
+        """
+        pooled = None
+
+        while pooled is None:
+            if self.closed:
+                raise RuntimeError('Session pool is closed.')
+
+            try:
+                pooled = self.idle.get_nowait()
+                continue
+            except queue.Empty:
+                pass
+
+            with self.lock:
+                launch = self.launched < self.size
+                if launch:
+                    self.launched += 1
+
+            if launch:
+                try:
+                    pooled = self.launch()
+                except Exception:
+                    with self.lock:
+                        self.launched -= 1
+                    raise
+            else:
+                # retired sessions free a launch slot, so check again regularly
+                try:
+                    pooled = self.idle.get(timeout=1)
+                except queue.Empty:
+                    pass
+
+        with self.lock:
+            self.active[id(pooled.session)] = pooled
+
+        return pooled.session
+
+    def release(self, session, healthy: bool = True):
+        """
+        Return a session to the pool. Unhealthy, worn out or bloated sessions
+        are exited and replaced on the next acquire.
+
+        :param session: session from acquire.
+        :param healthy: (bool) False if the job left the session unusable.
+        """
+        with self.lock:
+            pooled = self.active.pop(id(session))
+        pooled.uses += 1
+
+        recycle = (not healthy or self.closed
+                   or pooled.uses >= self.max_uses
+                   or pooled.memory_growth() > self.max_memory_growth)
+
+        if not recycle:
+            try:
+                session.execute_tui(self.reset_commands)
+            except Exception as error:
+                print(f'Resetting pooled session failed: {error}')
+                recycle = True
+
+        if recycle:
+            self.retire(pooled)
+        else:
+            self.idle.put(pooled)
+
+    def retire(self, pooled):
+        with self.lock:
+            self.launched -= 1
+        try:
+            pooled.session.exit()
+        except Exception as error:
+            print(f'Exiting pooled session failed: {error}')
+
+    @contextlib.contextmanager
+    def session(self):
+        """
+        Context manager form of acquire and release. The session is recycled
+        if the job raises.
+        """
+        session = self.acquire()
+        healthy = False
+        try:
+            yield session
+            healthy = True
+        finally:
+            self.release(session, healthy)
+
+    def close(self):
+        """
+        Exit all idle sessions. Sessions still in use are exited when they
+        are released.
+        """
+        self.closed = True
+
+        while True:
+            try:
+                pooled = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self.retire(pooled)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# the rotary pump scripts import each other as top level modules, as do the
+# watertight workflow scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'watertight_workflow'))
@@ -0,0 +1,49 @@
+import re
+import threading
+from types import SimpleNamespace
+
+import journal
+
+
+class Transcript:
+    def __init__(self):
+        self.callbacks = {}
+
+    def register_callback(self, callback):
+        self.callbacks[id(callback)] = callback
+        return id(callback)
+
+    def unregister_callback(self, callback_id):
+        self.callbacks.pop(callback_id)
+
+    def print(self, text):
+        for callback in list(self.callbacks.values()):
+            callback(text)
+
+
+class Session:
+    def __init__(self, output):
+        """
+        Meshing session printing the markers of a command stream, and the
+        given output of each stage, to its transcript.
+
+        :param output: (dict) transcript text by stage, or a function
+            returning it, called when the stage runs.
+        """
+        self.transcript = Transcript()
+        self.output = output
+        self.tui = SimpleNamespace(exit=lambda: None)
+
+    def execute_tui(self, stream):
+        for text in re.findall(r'\(display "\\n(.*)\\n"\)', stream):
+            self.transcript.print(f'{text}\n')
+            if text.startswith(journal.MARKER):
+                output = self.output.get(text.split(journal.MARKER)[1].strip(), '')
+                self.transcript.print(output() if callable(output) else output)
+
+
+class StreamingSession(Session):
+    def execute_tui(self, stream):
+        # the transcript is streamed, it arrives after the stream returned
+        thread = threading.Thread(target=Session.execute_tui, args=(self, stream))
+        thread.start()
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from convergence import ConvergenceCheck, DivergenceError, IterationDriver
+
+
+class Solver:
+    """
+    Solver session whose residuals and reports are functions of the
+    iteration, with the monitor histories fluent keeps.
+    """
+    def __init__(self, residual, head):
+        self.residual = residual
+        self.head = head
+        self.iteration = 0
+        self.iterate_calls = []
+        self.monitors = SimpleNamespace(get_monitor_set_data=self.get_monitor_set_data)
+        self.settings = SimpleNamespace(solution=SimpleNamespace(
+            run_calculation=SimpleNamespace(iterate=self.iterate)))
+
+    def iterate(self, iter_count):
+        self.iterate_calls.append(iter_count)
+        self.iteration += iter_count
+
+    def get_monitor_set_data(self, monitor_set_name, start_index=0):
+        indices = np.arange(max(start_index, 1), self.iteration + 1)
+        if monitor_set_name == "residual":
+            values = {"continuity": [self.residual(i) for i in indices]}
+        else:
+            values = {monitor_set_name: [self.head(i) for i in indices]}
+        return indices, {name: np.array(series, dtype=float) for name, series in values.items()}
+
+
+def driver(session, max_iterations=1000, chunk=25):
+    check = ConvergenceCheck(1e-4, ["pump-head"], tolerance=1e-3, window=50)
+    return IterationDriver(session, check, max_iterations, chunk)
+
+
+def test_converged():
+    # residuals meet the criterion at 100, the head settles from 120
+    session = Solver(lambda i: 1e-2 * 0.955 ** i, lambda i: 1e4 + (0 if i >= 120 else 1e3))
+    iteration_driver = driver(session)
+
+    assert iteration_driver.run() == (True, 175)
+    assert session.iterate_calls == [25] * 7
+    assert [entry["iteration"] for entry in iteration_driver.check.history] == list(range(1, 176))
+
+
+def test_not_converged_at_max_iterations():
+    # the head never settles
+    session = Solver(lambda i: 1e-6, lambda i: 1e4 * (1 + 0.01 * (i % 2)))
+    iteration_driver = driver(session, max_iterations=110)
+
+    assert iteration_driver.run() == (False, 110)
+    assert session.iterate_calls == [25, 25, 25, 25, 10]
+
+
+def test_divergence_within_a_chunk():
+    # a residual blows up for a single iteration in the middle of a chunk
+    session = Solver(lambda i: 1e6 if i == 37 else 1e-2, lambda i: 1e4)
+
+    with pytest.raises(DivergenceError) as error:
+        driver(session).run()
+
+    assert error.value.iteration == 37
+    assert session.iterate_calls == [25, 25]
+
+
+def test_not_finite_report():
+    session = Solver(lambda i: 1e-2, lambda i: float("nan") if i > 10 else 1e4)
+
+    with pytest.raises(DivergenceError, match="pump-head is nan"):
+        driver(session).run()
+
+
+def test_fluent_stopped_iterating():
+    session = Solver(lambda i: 1e-2, lambda i: 1e4)
+    session.iterate = lambda iter_count: None
+    session.settings.solution.run_calculation.iterate = session.iterate
+
+    assert driver(session).run() == (False, 0)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+import hemolysis
+from field_export import FieldArrays, FieldExport
+
+MODEL = hemolysis.MODELS['giersiepen']
+
+
+def export(folder, zones):
+    """
+    Field export of cell zones.
+
+    :param zones: (dict) strain rate and cell volume arrays by zone.
+    :return: (FieldArrays)
+    """
+    fields = FieldExport(folder, precision='float64')
+    for zone, (strain_rate, volume) in zones.items():
+        fields.write('cell_zone', zone, 'SV_STRAIN_RATE_MAG', strain_rate)
+        fields.write('cell_zone', zone, 'SV_VOLUME', volume)
+    fields.close()
+    return FieldArrays(folder)
+
+
+def test_uniform_stress_matches_the_closed_form():
+    stress, flow_rate = 150.0, 5 / 60000
+    volume = np.full(1000, 2e-9)
+
+    integral = hemolysis.ZoneIntegral(MODEL)
+    integral.add(np.full(1000, stress), volume)
+
+    expected = (volume.sum() / flow_rate) ** MODEL.beta * MODEL.C * stress ** MODEL.alpha
+    assert integral.hemolysis(flow_rate) == pytest.approx(expected, rel=1e-12)
+    assert integral.result(flow_rate)['mean_stress'] == pytest.approx(stress)
+
+
+def test_chunks_and_zones_merge_to_one_pass(tmp_path):
+    rng = np.random.default_rng(0)
+    zones = {zone: (rng.uniform(0, 1e5, cells), rng.uniform(1e-10, 1e-8, cells))
+             for zone, cells in (('rot_vol', 5000), ('stat_vol', 3000))}
+    strain_rate = np.concatenate([strain for strain, _ in zones.values()])
+    volume = np.concatenate([volume for _, volume in zones.values()])
+
+    single = hemolysis.ZoneIntegral(MODEL)
+    single.add(hemolysis.shear_stress(strain_rate), volume)
+
+    results = hemolysis.zone_hemolysis(export(tmp_path, zones), models=['giersiepen'],
+                                       flow_rate=1e-4, chunk=700)['giersiepen']
+
+    total = results['total']
+    assert total['cells'] == 8000
+    assert total['source_integral'] == pytest.approx(single.source_volume, rel=1e-12)
+    assert total['hemolysis_index'] == pytest.approx(single.hemolysis(1e-4), rel=1e-12)
+    assert total['max_stress'] == pytest.approx(single.max_stress)
+    assert results['rot_vol']['cells'] + results['stat_vol']['cells'] == 8000
+
+
+def test_zero_stress_is_no_damage():
+    integral = hemolysis.ZoneIntegral(MODEL)
+    integral.add(np.zeros(10), np.full(10, 1e-9), time=np.full(10, 0.1))
+
+    result = integral.result(1e-4)
+    assert result['hemolysis_index'] == 0
+    assert result['mean_damage'] == 0
+    assert not np.isnan(result['source_integral'])
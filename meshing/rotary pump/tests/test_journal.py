@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+import auto_mesh
+import journal
+import mesh_quality
+from fakes import Session, StreamingSession
+
+CONFIG = Path(__file__).resolve().parents[1] / 'auto_mesh_config.yaml'
+
+
+@pytest.fixture
+def mesher(tmp_path):
+    mesher = auto_mesh.load_config(CONFIG, working_folder=str(tmp_path / 'automesh_test'),
+                                   cache=False, registry=False)
+    mesher.working_folder.mkdir()
+    return mesher
+
+
+def test_error_line_fails_its_stage(mesher):
+    mesher.meshing = Session({'write_sf': 'Error: size field could not be written\n'})
+    stages = [(name, lambda: '') for name in ('geometry_import', 'scoped_sizing', 'write_sf', 'read_sf')]
+
+    with pytest.raises(journal.StageError) as error:
+        mesher.execute(stages)
+
+    assert error.value.stage == 'write_sf'
+    assert mesher.manifest.completed([name for name, _ in stages]) == 2
+    assert 'write_sf' not in mesher.manifest.data['stages']
+    assert 'read_sf' not in mesher.manifest.data['stages']
+
+
+def test_stages_without_errors_complete(mesher):
+    mesher.meshing = Session({})
+    stages = [(name, lambda: '') for name in ('geometry_import', 'scoped_sizing')]
+
+    mesher.execute(stages)
+
+    assert mesher.manifest.completed([name for name, _ in stages]) == 2
+
+
+def test_error_line_fails_the_run(tmp_path, monkeypatch):
+    geometry = tmp_path / 'pump.scdoc'
+    geometry.write_text('geometry')
+    mesher = auto_mesh.load_config(CONFIG, working_folder=str(tmp_path / 'automesh_test'),
+                                   geometry={'name': str(geometry), 'type': 'scdoc'},
+                                   cache=False, registry=True)
+    registered = []
+    monkeypatch.setattr(mesher, 'register', lambda: registered.append(mesher.working_folder))
+
+    with pytest.raises(journal.StageError) as error:
+        mesher.run(Session({'mesh': 'Error: volume fill failed\n'}))
+
+    assert error.value.stage == 'mesh'
+    assert mesher.manifest.checkpoint('mesh') is None
+    assert 'save_mesh' not in mesher.manifest.data['stages']
+    assert not registered
+
+
+def test_waits_for_the_end_of_the_transcript(mesher):
+    mesher.meshing = StreamingSession({'get_summary': '5 cells with negative volumes\n'})
+    stages = [(name, lambda: '') for name in ('auto_node_move', 'get_summary')]
+
+    with pytest.raises(mesh_quality.QualityError):
+        mesher.execute(stages)
+
+    assert mesher.quality_monitor.metrics['get_summary'] == {'negative_volumes': 5}
+    assert 'get_summary' not in mesher.manifest.data['stages']
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+import auto_mesh
+import mesh_cache
+
+CONFIG = Path(__file__).resolve().parents[1] / 'auto_mesh_config.yaml'
+
+
+def test_put_leaves_no_partial_files(tmp_path):
+    mesh_file = tmp_path / 'pump.msh'
+    mesh_file.write_text('mesh')
+    cache = mesh_cache.MeshCache(tmp_path / 'cache')
+
+    cached = cache.put('key', mesh_file, {'layers': 15})
+    cache.put('key', mesh_file, {'layers': 15})
+
+    assert cached.read_text() == 'mesh'
+    assert sorted(path.name for path in cached.parent.iterdir()) == ['config.json', 'pump.msh']
+
+
+def test_cache_hit_makes_no_working_folder(tmp_path):
+    geometry = tmp_path / 'pump.scdoc'
+    geometry.write_text('geometry')
+    mesher = auto_mesh.load_config(CONFIG, working_folder=str(tmp_path / 'automesh_test'),
+                                   geometry={'name': str(geometry), 'type': 'scdoc'})
+    mesher.mesh_cache = mesh_cache.MeshCache(tmp_path / 'cache')
+    mesh_file = tmp_path / 'pump.msh'
+    mesh_file.write_text('mesh')
+    cached = mesher.mesh_cache.put(mesher.cache_key(), mesh_file)
+
+    assert mesher.run() == cached
+    assert not mesher.working_folder.exists()
@@ -0,0 +1,60 @@
+import mesh_quality
+
+# transcript of the mesh stage: the cell_report commands, then check-mesh
+MESH_TRANSCRIPT = f'''
+{mesh_quality.MARKER} cell_skewness
+Cell quality limits:
+  minimum quality: 2.164213e-05 cell 5432 in zone 6
+  maximum quality: 8.123457e-01 cell 871 in zone 6
+  average quality: 1.234500e-01
+  number of cells: 1,234,567
+{mesh_quality.MARKER} cell_orthogonal_quality
+Cell quality limits:
+  minimum quality: 1.872310e-01 cell 77 in zone 6
+  maximum quality: 9.998712e-01 cell 12 in zone 6
+  average quality: 8.612000e-01
+Domain extents.
+  x-coordinate: min = -5.000000e-01, max = 5.000000e-01.
+Volume statistics.
+  minimum volume (m3): 1.2e-10
+  maximum volume (m3): 2.345678e-06
+    total volume (m3): 1.000000e-01
+'''
+
+CHECK_TRANSCRIPT = '''
+Checking cell volumes.
+  3 cells with negative volumes
+Mesh contains 1234567 cells, 3456789 faces, 234567 nodes.
+'''
+
+
+def feed(monitor, stage, transcript):
+    for line in transcript.splitlines():
+        monitor(stage, line)
+    return monitor.metrics[stage]
+
+
+def test_ranges_of_each_measure():
+    metrics = feed(mesh_quality.QualityMonitor(), 'mesh', MESH_TRANSCRIPT)
+
+    assert metrics['min_cell_skewness'] == 2.164213e-05
+    assert metrics['max_cell_skewness'] == 0.8123457
+    assert metrics['min_cell_orthogonal_quality'] == 0.187231
+    assert metrics['max_cell_orthogonal_quality'] == 0.9998712
+    assert metrics['cells'] == 1234567
+    assert metrics['min_volume'] == 1.2e-10
+
+
+def test_later_min_lines_do_not_replace_the_gated_measure():
+    monitor = mesh_quality.QualityMonitor()
+    feed(monitor, 'mesh', MESH_TRANSCRIPT)
+
+    assert monitor.check('mesh', {'skewness': 0.9, 'orthogonal_quality': 0.01}) == []
+
+
+def test_check_mesh_counts():
+    monitor = mesh_quality.QualityMonitor()
+    metrics = feed(monitor, 'get_summary', CHECK_TRANSCRIPT)
+
+    assert metrics == {'negative_volumes': 3, 'cells': 1234567, 'faces': 3456789, 'nodes': 234567}
+    assert monitor.check('get_summary', {'negative_volumes': 0}) == ['negative_volumes 3 (limit 0)']
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+import msh_reader
+
+# two tetrahedra sharing the face 1 2 3
+NODES = [[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1], [0, 0, -1]]
+INTERIOR = [[1, 2, 3, 1, 2]]
+WALLS = [[1, 2, 4, 1, 0], [2, 3, 4, 1, 0], [1, 3, 4, 1, 0],
+         [1, 2, 5, 2, 0], [2, 3, 5, 2, 0], [1, 3, 5, 2, 0]]
+ZONES = b'(45 (2 fluid fluid)())\n(45 (3 interior interior-fluid)())\n(45 (4 wall walls)())\n'
+
+
+def ascii_mesh():
+    def rows(values):
+        return '\n'.join(' '.join(f'{value:x}' for value in row) for row in values)
+
+    return (f'(0 "synthetic mesh")\n(2 3)\n'
+            f'(10 (0 1 5 0 3))\n'
+            f'(10 (1 1 5 1 3)(\n{rows(NODES)}\n))\n'
+            f'(12 (0 1 2 0 0))\n'
+            f'(12 (2 1 2 1 0)(\n2 2\n))\n'
+            f'(13 (0 1 7 0 0))\n'
+            f'(13 (3 1 1 2 0)(\n{rows([[3] + face for face in INTERIOR])}\n))\n'
+            f'(13 (4 2 7 3 3)(\n{rows(WALLS)}\n))\n').encode() + ZONES
+
+
+def binary_mesh():
+    def section(section_id, header, body):
+        return (b'(%d (%s)(' % (section_id, header.encode()) + body
+                + b')\nEnd of Binary Section %d)\n' % section_id)
+
+    interior = np.array([[3] + face for face in INTERIOR], dtype=np.int32)
+    return (b'(0 "synthetic mesh")\n(2 3)\n(10 (0 1 5 0 3))\n'
+            + section(3010, '1 1 5 1 3', np.array(NODES, dtype=np.float64).tobytes())
+            + b'(12 (0 1 2 0 0))\n'
+            + section(2012, '2 1 2 1 0', np.array([2, 2], dtype=np.int32).tobytes())
+            + b'(13 (0 1 7 0 0))\n'
+            + section(2013, '3 1 1 2 0', interior.tobytes())
+            + section(2013, '4 2 7 3 3', np.array(WALLS, dtype=np.int32).tobytes())
+            + ZONES)
+
+
+@pytest.mark.parametrize('contents', [ascii_mesh, binary_mesh])
+def test_read(tmp_path, contents):
+    mesh_file = tmp_path / 'pump.msh'
+    mesh_file.write_bytes(contents())
+
+    mesh = msh_reader.read(mesh_file)
+    summary = mesh.summary()
+
+    assert (summary['nodes'], summary['faces'], summary['cells']) == (5, 7, 2)
+    assert [(zone['name'], zone['type'], zone['count']) for zone in summary['zones']] == [
+        ('fluid', 'fluid', 2), ('interior-fluid', 'interior', 1), ('walls', 'wall', 6)]
+    assert summary['zones'][0]['element_counts'] == {'tetrahedral': 2}
+    assert summary['bounds'] == [[0, 0, -1], [1, 1, 1]]
+    np.testing.assert_array_equal(mesh.nodes, NODES)
+
+    offsets, nodes, c0, c1 = mesh.face_csr()
+    faces = np.array(INTERIOR + WALLS)
+    np.testing.assert_array_equal(offsets, np.arange(0, 22, 3))
+    np.testing.assert_array_equal(nodes, faces[:, :3].ravel())
+    np.testing.assert_array_equal(c0, faces[:, 3])
+    np.testing.assert_array_equal(c1, faces[:, 4])
+
+
+@pytest.mark.parametrize('contents', [ascii_mesh, binary_mesh])
+def test_read_counts_only(tmp_path, contents):
+    mesh_file = tmp_path / 'pump.msh'
+    mesh_file.write_bytes(contents())
+
+    mesh = msh_reader.read(mesh_file, nodes=False, faces=False)
+
+    assert mesh.nodes is None
+    assert all(zone.offsets is None for zone in mesh.face_zones)
+    assert [zone.name for zone in mesh.zones.values()] == ['fluid', 'interior-fluid', 'walls']
+
+
+def test_truncated_binary_section(tmp_path):
+    contents = binary_mesh()
+    mesh_file = tmp_path / 'pump.msh'
+    mesh_file.write_bytes(contents[:contents.index(b'End of Binary Section 3010') - 8])
+
+    with pytest.raises(ValueError, match='no end marker'):
+        msh_reader.read(mesh_file)
+
+
+def test_corrupt_face_record(tmp_path):
+    # a mixed face record claiming zero nodes
+    contents = binary_mesh()
+    record = np.array([3] + INTERIOR[0], dtype=np.int32).tobytes()
+    corrupt = np.array([0] + INTERIOR[0], dtype=np.int32).tobytes()
+    mesh_file = tmp_path / 'pump.msh'
+    mesh_file.write_bytes(contents.replace(record, corrupt))
+
+    with pytest.raises(ValueError, match='no face record'):
+        msh_reader.read(mesh_file)
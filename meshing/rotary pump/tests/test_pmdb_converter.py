@@ -0,0 +1,26 @@
+import pmdb_converter
+from fakes import StreamingSession
+
+
+def converts(folder, name, error=''):
+    def output():
+        (folder / name).with_suffix('.pmdb').write_text('pmdb')
+        return error
+    return output
+
+
+def test_failed_geometry_does_not_hold_back_the_others(tmp_path):
+    for name in ('a', 'b', 'c'):
+        (tmp_path / f'{name}.scdoc').write_text(name)
+    session = StreamingSession({
+        'a.scdoc': converts(tmp_path, 'a.scdoc', 'Error: import failed\n'),
+        'b.scdoc': converts(tmp_path, 'b.scdoc'),
+        'c.scdoc': converts(tmp_path, 'c.scdoc'),
+    })
+
+    converted = pmdb_converter.convert(tmp_path, session=session)
+
+    assert [pmdb.name for pmdb in converted] == ['b.pmdb', 'c.pmdb']
+    assert sorted(pmdb_converter.load_manifest(tmp_path)) == ['b.scdoc', 'c.scdoc']
+    assert pmdb_converter.lookup(tmp_path / 'a.scdoc') is None
+    assert pmdb_converter.lookup(tmp_path / 'c.scdoc') == tmp_path / 'c.pmdb'
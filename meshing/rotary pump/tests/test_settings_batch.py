@@ -0,0 +1,75 @@
+import pytest
+
+from settings_batch import SettingsBatch
+
+
+class Settings:
+    """
+    Settings or workflow object that records the remote calls made on it.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def set_state(self, state):
+        self.calls.append(('set_state', state))
+
+    def add_child_and_update(self, state):
+        self.calls.append(('add_child_and_update', state))
+
+
+def test_one_set_state_per_object(capsys):
+    equations = Settings()
+    controls = Settings()
+
+    with SettingsBatch("test") as batch:
+        for equation in ["continuity", "x-velocity", "k"]:
+            batch.set(equations, {equation: {"absolute_criteria": 1e-4}})
+        batch.set(equations, {"k": {"check_convergence": False}})
+        batch.set(controls, {"cell_quality_limit": 0.15}, min_size=0.1)
+        batch.set(controls, min_size=0.2)
+
+        assert equations.calls == controls.calls == []
+
+    assert equations.calls == [('set_state', {
+        "continuity": {"absolute_criteria": 1e-4},
+        "x-velocity": {"absolute_criteria": 1e-4},
+        "k": {"absolute_criteria": 1e-4, "check_convergence": False},
+    })]
+    assert controls.calls == [('set_state', {"cell_quality_limit": 0.15, "min_size": 0.2})]
+    assert (batch.assignments, batch.calls, batch.saved) == (7, 2, 5)
+    assert capsys.readouterr().out == "test: 2 calls for 7 assignments, 5 round trips saved\n"
+
+
+def test_add_child():
+    task = Settings()
+    state = {"BOIFaceLabelList": ["blades"], "BOISize": 0.5}
+
+    with SettingsBatch() as batch:
+        batch.add_child(task, state, BOIControlName="blades")
+        batch.add_child(task, BOIControlName="hub")
+
+    assert task.calls == [('add_child_and_update', dict(state, BOIControlName="blades")),
+                          ('add_child_and_update', {"BOIControlName": "hub"})]
+    assert (batch.assignments, batch.calls) == (6, 2)
+
+
+def test_recorded_state_is_a_copy():
+    equations = Settings()
+    state = {"continuity": {"absolute_criteria": 1e-4}}
+
+    with SettingsBatch() as batch:
+        batch.set(equations, state)
+        state["continuity"]["absolute_criteria"] = 1e-3
+
+    assert equations.calls == [('set_state', {"continuity": {"absolute_criteria": 1e-4}})]
+
+
+def test_nothing_applied_on_error():
+    equations = Settings()
+
+    with pytest.raises(RuntimeError):
+        with SettingsBatch() as batch:
+            batch.set(equations, {"continuity": {"absolute_criteria": 1e-4}})
+            raise RuntimeError("setup failed")
+
+    assert equations.calls == []
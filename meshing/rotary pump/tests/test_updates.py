@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from updates import Updates
+
+pytest.importorskip('requests')
+
+
+class Webhook:
+    def __init__(self, rate_limited=0, retry_after=0.3):
+        """
+        Local stand-in for a discord webhook, recording the messages posted.
+
+        :param rate_limited: (int) first requests answered with 429.
+        :param retry_after: (float) seconds the 429 responses ask to wait.
+        """
+        self.requests = []
+        self.messages = []
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                webhook.requests.append(time.monotonic())
+                if len(webhook.requests) <= rate_limited:
+                    self.send_response(429)
+                    self.send_header('Content-Type', 'application/json')
+                    self.end_headers()
+                    self.wfile.write(json.dumps({'retry_after': retry_after}).encode())
+                    return
+                webhook.messages.append([embed['title'] for embed in body['embeds']])
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def webhook():
+    webhook = Webhook()
+    yield webhook
+    webhook.close()
+
+
+def test_updates_within_the_window_are_batched(webhook):
+    updates = Updates(True, webhook.url, batch_window=0.3)
+    for i in range(12):
+        updates.send_update('mesh', f'update {i}')
+
+    assert updates.flush(10)
+    updates.close()
+
+    # discord takes at most 10 embeds per message
+    assert [len(message) for message in webhook.messages] == [10, 2]
+    assert updates.sent == 12
+    assert updates.dropped == 0
+
+
+def test_rate_limited_batch_waits_retry_after():
+    webhook = Webhook(rate_limited=1, retry_after=0.4)
+    try:
+        updates = Updates(True, webhook.url, batch_window=0.05)
+        updates.send_update('solver', 'converged')
+
+        assert updates.flush(10)
+        updates.close()
+    finally:
+        webhook.close()
+
+    assert len(webhook.requests) == 2
+    assert webhook.requests[1] - webhook.requests[0] >= 0.4
+    assert webhook.messages == [['converged']]
+
+
+def test_full_buffer_drops_the_oldest(webhook):
+    updates = Updates(True, webhook.url, buffer=5, batch_window=0.3)
+    for i in range(8):
+        updates.send_update('mesh', f'update {i}')
+
+    assert updates.flush(10)
+    updates.close()
+
+    assert updates.dropped == 3
+    assert webhook.messages == [[f'update {i}' for i in range(3, 8)]]
@@ -0,0 +1,84 @@
+import functools
+import json
+
+import pytest
+
+import mesh
+import session_pool
+from misc import RunLog
+
+
+class Node:
+    def __init__(self, calls, path='session'):
+        """
+        Stand-in for any pyfluent session, workflow or settings object. Every
+        attribute is another node and every call is recorded.
+
+        :param calls: (list) shared record of calls.
+        :param path: (str) attribute path of this node.
+        """
+        self._calls = calls
+        self._path = path
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return Node(self._calls, f'{self._path}.{name}')
+
+    def __getitem__(self, key):
+        return Node(self._calls, f'{self._path}[{key!r}]')
+
+    def __call__(self, *args, **kwargs):
+        self._calls.append(self._path)
+        return Node(self._calls, f'{self._path}()')
+
+    def __iter__(self):
+        return iter([])
+
+    def get_state(self):
+        return {}
+
+    def set_state(self, state):
+        self._calls.append(f'{self._path}.set_state')
+
+
+@pytest.fixture
+def mesher(tmp_path, monkeypatch):
+    calls = []
+    pool = session_pool.SessionPool(size=1)
+    monkeypatch.setattr(pool, 'launch', lambda: session_pool.PooledSession(Node(calls)))
+
+    mesher = mesh.Mesh(show_gui=False, pool=pool)
+    mesher.save_path = tmp_path
+    mesher.run_log = RunLog(tmp_path, mesher.uuid)
+    mesher.register = functools.partial(mesh.Mesh.register, mesher, tmp_path / 'registry.sqlite')
+    mesher.calls = calls
+    return mesher
+
+
+def test_run_meshing_returns_the_session(mesher, tmp_path):
+    mesher.run_meshing()
+
+    assert not mesher.pool.active
+    assert mesher.pool.idle.qsize() == 1
+    assert 'session.watertight().update_regions' in mesher.calls
+    assert 'session.tui.file.write_mesh' in mesher.calls
+
+    with open(tmp_path / 'mesh_profile.json') as f:
+        stages = [row['stage'] for row in json.load(f)['summary']]
+    assert stages[:3] == ['initialise', 'import_geom', 'add_local_sizings']
+    assert 'update_boundaries_and_regions' in stages
+    assert (tmp_path / 'registry.sqlite').exists()
+
+
+def test_failed_step_recycles_the_session(mesher, tmp_path, monkeypatch):
+    def fail():
+        raise RuntimeError('volume fill failed')
+    monkeypatch.setattr(mesher, 'generate_volume_mesh', fail)
+
+    with pytest.raises(RuntimeError):
+        mesher.run_meshing()
+
+    assert not mesher.pool.active
+    assert mesher.pool.launched == 0
+    assert (tmp_path / 'mesh_profile.json').exists()
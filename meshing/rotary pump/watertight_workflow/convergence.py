@@ -0,0 +1,187 @@
+import json
+import math
+
+
+class DivergenceError(Exception):
+    def __init__(self, iteration, reason):
+        """
+        Raised when a solution diverges, so the run stops instead of using up
+        its iteration budget.
+
+        :param iteration: (int) iteration the divergence was found at.
+        :param reason: (str) what diverged.
+        """
+        super().__init__(f"solution diverged at iteration {iteration}: {reason}")
+        self.iteration = iteration
+        self.reason = reason
+
+
+class ConvergenceCheck:
+    def __init__(self, residual_criteria, monitors=(), tolerance=1e-3, window=50,
+                 divergence_factor=1e3):
+        """
+        Decides after each iteration whether a steady solution has converged
+        or diverged.
+
+        Converged means every residual is below its criterion and every
+        monitored report stays within a relative tolerance band over the last
+        window iterations. Diverged means a residual or report is not finite,
+        or a residual grew divergence_factor times above its lowest value.
+
+        :param residual_criteria: (float | dict) absolute criterion for all
+            equations, or by equation name.
+        :param monitors: (list[str]) report definitions that must settle.
+        :param tolerance: (float) allowed (max - min) / |mean| of each monitor
+            over the window.
+        :param window: (int) iterations the monitors must stay in the band.
+        :param divergence_factor: (float) growth of a residual above its
+            lowest value taken as divergence.
+        """
+        self.residual_criteria = residual_criteria
+        self.monitors = list(monitors)
+        self.tolerance = tolerance
+        self.window = window
+        self.divergence_factor = divergence_factor
+
+        self.history = []
+        self.lowest = {}
+
+    def criterion(self, equation):
+        if isinstance(self.residual_criteria, dict):
+            return self.residual_criteria.get(equation)
+        return self.residual_criteria
+
+    def update(self, iteration, residuals: dict, reports: dict):
+        """
+        Add the state at the end of an iteration.
+
+        :param iteration: (int) iterations done so far.
+        :param residuals: (dict) latest residual of each equation.
+        :param reports: (dict) latest value of each monitored report.
+        :return: (Bool) whether the solution has converged.
+        """
+        self.history.append({"iteration": iteration, "residuals": residuals, "reports": reports})
+
+        for name, value in {**residuals, **reports}.items():
+            if not math.isfinite(value):
+                raise DivergenceError(iteration, f"{name} is {value}")
+
+        for equation, value in residuals.items():
+            lowest = self.lowest[equation] = min(value, self.lowest.get(equation, value))
+            if lowest > 0 and value > self.divergence_factor * lowest:
+                raise DivergenceError(iteration, f"{equation} residual {value:.3g} grew from {lowest:.3g}")
+
+        return self.residuals_met() and self.monitors_settled()
+
+    def residuals_met(self):
+        residuals = self.history[-1]["residuals"]
+        return all(value <= self.criterion(equation) for equation, value in residuals.items()
+                   if self.criterion(equation) is not None)
+
+    def monitors_settled(self):
+        latest = self.history[-1]["iteration"]
+        if self.monitors and self.history[0]["iteration"] > latest - self.window:
+            return False # not enough iterations yet to cover the window
+
+        window = []
+        for entry in reversed(self.history):
+            if entry["iteration"] < latest - self.window:
+                break
+            window.append(entry["reports"])
+
+        for monitor in self.monitors:
+            values = [reports[monitor] for reports in window]
+            mean = abs(sum(values) / len(values))
+            if max(values) - min(values) > self.tolerance * max(mean, 1e-30):
+                return False
+
+        return True
+
+    def write(self, file_path):
+        with open(file_path, "w") as f:
+            json.dump(self.history, f, indent=2)
+
+
+class IterationDriver:
+    def __init__(self, session, check: ConvergenceCheck, max_iterations=1000, chunk=25):
+        """
+        Iterates a steady solution in chunks and stops as soon as it converges
+        or diverges.
+
+        Between chunks the residual and report monitor histories of the chunk
+        are read, so the check sees every iteration, not only the last of each
+        chunk. Each monitored report needs a report plot of the same name.
+
+        :param session: pyfluent solver session, already initialised.
+        :param check: (ConvergenceCheck) convergence and divergence tests.
+        :param max_iterations: (int) iteration budget.
+        :param chunk: (int) iterations between checks.
+        """
+        self.session = session
+        self.check = check
+        self.max_iterations = max_iterations
+        self.chunk = chunk
+        self.iteration = 0
+
+    def history(self, monitor_set):
+        """
+        Values of a monitor set since the last check, only those of the last
+        chunk are transferred.
+
+        :param monitor_set: (str) "residual" or a report plot.
+        :return: (dict) values by name, by iteration.
+        """
+        indices, data = self.session.monitors.get_monitor_set_data(
+            monitor_set_name=monitor_set, start_index=self.iteration + 1)
+        return {int(iteration): {name: float(values[i]) for name, values in data.items()}
+                for i, iteration in enumerate(indices) if iteration > self.iteration}
+
+    def samples(self):
+        """
+        Residuals and reports of each iteration of the last chunk.
+
+        :return: (list[tuple[int, dict, dict]]) iteration, residual by
+            equation and report values.
+        """
+        residuals = self.history("residual")
+        reports = {monitor: self.history(monitor) for monitor in self.check.monitors}
+
+        return [(iteration, residuals[iteration],
+                 {monitor: reports[monitor][iteration][monitor] for monitor in self.check.monitors})
+                for iteration in sorted(residuals)
+                if all(iteration in reports[monitor] for monitor in self.check.monitors)]
+
+    def run(self):
+        """
+        Iterate until converged or out of iterations.
+
+        :return: (tuple[Bool, int]) whether it converged and the iterations run.
+        """
+        iterate = self.session.settings.solution.run_calculation.iterate
+
+        while self.iteration < self.max_iterations:
+            count = min(self.chunk, self.max_iterations - self.iteration)
+            try:
+                iterate(iter_count=count)
+            except Exception as error:
+                # fluent stops with an error on e.g. floating point exceptions
+                raise DivergenceError(self.iteration, str(error)) from error
+
+            samples = self.samples()
+            if not samples:
+                # no new iterations, e.g. fluent's own convergence check stopped it before
+                # the monitors settled, so the solution is not known to have converged
+                print(f"Fluent stopped iterating at iteration {self.iteration}, not converged")
+                return False, self.iteration
+
+            for iteration, residuals, reports in samples:
+                self.iteration = iteration
+                converged = self.check.update(iteration, residuals, reports)
+
+            # judged on the last iteration, the state the solution is left in
+            if converged:
+                print(f"Converged after {self.iteration} iterations")
+                return True, self.iteration
+
+        print(f"Not converged after {self.iteration} iterations")
+        return False, self.iteration
@@ -0,0 +1,148 @@
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+
+#array files are written with the rotary pump export helpers
+import paths
+import mesh_export
+
+FORMAT = 1
+MANIFEST = "fields.json"
+
+#face centroids of surfaces, as scalar fields so they come in the same bulk calls
+CENTROID_FIELDS = ["x-coordinate", "y-coordinate", "z-coordinate"]
+
+
+def array_name(location, zone, field):
+    return re.sub(r"[^\w.-]+", "_", f"{location}.{zone}.{field}")
+
+
+def field_access(session):
+    #newer pyfluent groups field_data and solution_variable_data under session.fields
+    return getattr(session, "fields", session)
+
+
+class FieldExport:
+    def __init__(self, folder, precision="float32", compress=False, chunk=mesh_export.CHUNK):
+        """
+        Writes field data of a solved case to numpy arrays, one per zone and
+        field, as each bulk request returns, with a manifest describing them.
+
+        :param folder: (os.Pathlike) export folder.
+        :param precision: (str) float32 or float64, dtype of the stored values.
+        :param compress: (Bool) store zlib compressed chunks instead of .npy files.
+        :param chunk: (int) values per compressed chunk.
+        """
+        self.folder = Path(folder)
+        self.dtype = np.dtype(precision)
+        self.compress = compress
+        self.chunk = chunk
+        self.manifest = {"format": FORMAT, "precision": self.dtype.name, "arrays": {}}
+
+    def write(self, location, zone, field, values):
+        """
+        Store the values of one field on one zone or surface.
+
+        :param location: (str) surface or cell_zone.
+        :param zone: (str) zone or surface name.
+        :param field: (str) field or solution variable name.
+        :param values: array like values.
+        """
+        name = array_name(location, zone, field)
+        array = np.asarray(values)
+        if array.dtype.kind == "f":
+            array = array.astype(self.dtype, copy=False)
+
+        entry = mesh_export.write_array(self.folder, name, array, self.compress, self.chunk)
+        self.manifest["arrays"][name] = dict(entry, location=location, zone=str(zone), field=field)
+
+    def surfaces(self, session, surfaces, fields, centroids=True):
+        """
+        Export face values on surfaces, one call per field covering every
+        surface.
+
+        :param session: pyfluent solver session.
+        :param surfaces: (list[str]) surface names.
+        :param fields: (list[str]) field names, e.g. pressure, wall-shear.
+        :param centroids: (Bool) also export the face centroids.
+        """
+        field_data = field_access(session).field_data
+        fields = list(fields) + (CENTROID_FIELDS if centroids else [])
+
+        for field in fields:
+            data = field_data.get_scalar_field_data(field_name=field, surfaces=list(surfaces),
+                                                    node_value=False)
+            for surface, values in data.items():
+                self.write("surface", surface, field, values)
+
+    def cell_zones(self, session, zones, variables, domain="mixture"):
+        """
+        Export cell values of solution variables, one call per variable
+        covering every zone.
+
+        :param session: pyfluent solver session.
+        :param zones: (list[str]) cell zone names.
+        :param variables: (list[str]) solution variables, e.g. SV_P, SV_VOLUME.
+        :param domain: (str) phase domain.
+        """
+        variable_data = field_access(session).solution_variable_data
+
+        for variable in variables:
+            data = variable_data.get_data(solution_variable_name=variable,
+                                          zone_names=list(zones), domain_name=domain)
+            for zone in zones:
+                values = np.asarray(data[zone])
+                if variable == "SV_CENTROID":
+                    values = values.reshape(-1, 3)
+                self.write("cell_zone", zone, variable, values)
+
+    def close(self, **info):
+        """
+        Write the manifest.
+
+        :param info: values stored in the manifest, e.g. the case file.
+        :return: (pathlib.Path) manifest file.
+        """
+        self.manifest.update(info)
+        manifest_file = self.folder / MANIFEST
+        with open(manifest_file, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        return manifest_file
+
+
+class FieldArrays:
+    def __init__(self, folder, mmap=True):
+        """
+        Field export folder. Arrays are read on first access, .npy files are
+        memory mapped.
+
+        :param folder: (os.Pathlike) export folder.
+        :param mmap: (Bool) memory map uncompressed arrays.
+        """
+        self.folder = Path(folder)
+        self.mmap = mmap
+
+        with open(self.folder / MANIFEST) as f:
+            self.manifest = json.load(f)
+
+        if self.manifest["format"] != FORMAT:
+            raise ValueError(f"{self.folder} has field export format {self.manifest['format']}, "
+                             f"expected {FORMAT}")
+
+    def zones(self, location="cell_zone"):
+        return sorted({entry["zone"] for entry in self.manifest["arrays"].values()
+                       if entry["location"] == location})
+
+    def get(self, zone, field, location="cell_zone"):
+        """
+        Values of a field on a zone.
+
+        :param zone: (str) zone or surface name.
+        :param field: (str) field or solution variable name.
+        :param location: (str) surface or cell_zone.
+        :return: (ndarray)
+        """
+        entry = self.manifest["arrays"][array_name(location, zone, field)]
+        return mesh_export.read_array(self.folder, entry, self.mmap)
@@ -0,0 +1,217 @@
+import argparse
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+CHUNK = 1 << 20 # cells per chunk, bounds the temporary arrays to a few tens of MB
+BLOOD_VISCOSITY = 0.0035 # Pa s
+
+
+@dataclass(frozen=True)
+class PowerLaw:
+    """
+    Power law blood damage model, HI (%) = C * stress^alpha * time^beta with
+    the scalar shear stress in Pa and the exposure time in s.
+    """
+    C: float
+    alpha: float
+    beta: float
+
+    def damage(self, stress, time):
+        """
+        Hemolysis index of each cell.
+
+        :param stress: (ndarray) scalar shear stress, Pa.
+        :param time: (ndarray) exposure time, s.
+        :return: (ndarray) HI in %.
+        """
+        return self.C * np.power(stress, self.alpha) * np.power(time, self.beta)
+
+    def source(self, stress):
+        """
+        Linearised damage source of each cell, (C * stress^alpha)^(1/beta),
+        evaluated in log space so large exponents do not overflow.
+
+        :param stress: (ndarray) scalar shear stress, Pa.
+        :return: (ndarray)
+        """
+        with np.errstate(divide="ignore"):
+            log_stress = np.log(stress)
+        return np.exp((np.log(self.C) + self.alpha * log_stress) / self.beta)
+
+
+# constant sets fitted to different blood damage experiments
+MODELS = {
+    "giersiepen": PowerLaw(3.62e-5, 2.416, 0.785),
+    "heuser_opitz": PowerLaw(1.8e-6, 1.991, 0.765),
+    "zhang": PowerLaw(1.228e-5, 1.9918, 0.6606),
+    "fraser": PowerLaw(1.745e-6, 1.963, 0.0762),
+}
+
+
+def shear_stress(strain_rate, viscosity=BLOOD_VISCOSITY):
+    return viscosity * np.asarray(strain_rate, dtype=np.float64)
+
+
+class ZoneIntegral:
+    def __init__(self, model: PowerLaw):
+        """
+        Volume integrals of one zone, added to a chunk of cells at a time.
+
+        :param model: (PowerLaw) damage model.
+        """
+        self.model = model
+        self.cells = 0
+        self.volume = 0.0
+        self.stress_volume = 0.0
+        self.source_volume = 0.0
+        self.damage_volume = 0.0
+        self.max_stress = 0.0
+        self.timed = False
+
+    def add(self, stress, volume, time=None):
+        """
+        Add a chunk of cells.
+
+        :param stress: (ndarray) scalar shear stress, Pa.
+        :param volume: (ndarray) cell volumes, m^3.
+        :param time: (ndarray) exposure time, s, to also integrate the per
+            cell power law.
+        """
+        stress = np.asarray(stress, dtype=np.float64)
+        volume = np.asarray(volume, dtype=np.float64)
+        if not len(stress):
+            return
+
+        self.cells += len(stress)
+        self.volume += volume.sum()
+        self.stress_volume += np.dot(stress, volume)
+        self.source_volume += np.dot(self.model.source(stress), volume)
+        self.max_stress = max(self.max_stress, float(stress.max()))
+
+        if time is not None:
+            self.timed = True
+            self.damage_volume += np.dot(self.model.damage(stress, np.asarray(time, dtype=np.float64)), volume)
+
+    def merge(self, other):
+        """
+        Add the integrals of another zone, e.g. to combine zones into a total.
+
+        :param other: (ZoneIntegral) integral of the same model.
+        """
+        self.cells += other.cells
+        self.volume += other.volume
+        self.stress_volume += other.stress_volume
+        self.source_volume += other.source_volume
+        self.damage_volume += other.damage_volume
+        self.max_stress = max(self.max_stress, other.max_stress)
+        self.timed = self.timed or other.timed
+
+    def hemolysis(self, flow_rate):
+        """
+        Eulerian hemolysis index of Garon and Farinas,
+        HI = (1 / Q * integral of (C * stress^alpha)^(1/beta) dV)^beta.
+
+        :param flow_rate: (float) volumetric flow rate through the device, m^3/s.
+        :return: (float) HI in %.
+        """
+        return (self.source_volume / flow_rate) ** self.model.beta
+
+    def result(self, flow_rate=None):
+        result = {
+            "cells": self.cells,
+            "volume": self.volume,
+            "mean_stress": self.stress_volume / self.volume if self.volume else None,
+            "max_stress": self.max_stress,
+            "source_integral": self.source_volume,
+            "hemolysis_index": self.hemolysis(flow_rate) if flow_rate else None,
+        }
+        if self.timed:
+            result["mean_damage"] = self.damage_volume / self.volume if self.volume else None
+        return result
+
+
+def zone_hemolysis(fields, zones=None, models=("giersiepen",), flow_rate=None,
+                   strain_rate="SV_STRAIN_RATE_MAG", volume="SV_VOLUME", time=None,
+                   viscosity=BLOOD_VISCOSITY, chunk=CHUNK):
+    """
+    Hemolysis of each cell zone of a field export, and of all of them
+    together, for each damage model. Each chunk of cells is read once and
+    added to the integrals of every model.
+
+    :param fields: (field_export.FieldArrays) exported cell data.
+    :param zones: (list[str]) cell zones, e.g. rotor and stator, all if not given.
+    :param models: (list[str]) names in MODELS.
+    :param flow_rate: (float) volumetric flow rate, m^3/s, for the Garon and
+        Farinas index.
+    :param strain_rate: (str) exported strain rate magnitude, 1/s.
+    :param volume: (str) exported cell volume, m^3.
+    :param time: (str) exported exposure time, s, for the per cell power law.
+    :param viscosity: (float) blood viscosity, Pa s.
+    :param chunk: (int) cells per chunk.
+    :return: (dict) results by model and zone, with the zones combined under total.
+    """
+    zones = zones or fields.zones()
+    integrals = {name: {} for name in models}
+
+    for zone in zones:
+        strain = fields.get(zone, strain_rate)
+        volumes = fields.get(zone, volume)
+        times = fields.get(zone, time) if time else None
+        for name in models:
+            integrals[name][zone] = ZoneIntegral(MODELS[name])
+
+        for start in range(0, len(strain), chunk):
+            stop = start + chunk
+            stress = shear_stress(strain[start:stop], viscosity)
+            cell_volumes = np.asarray(volumes[start:stop], dtype=np.float64)
+            exposure = np.asarray(times[start:stop], dtype=np.float64) if times is not None else None
+            for name in models:
+                integrals[name][zone].add(stress, cell_volumes, exposure)
+
+    results = {}
+    for name in models:
+        total = ZoneIntegral(MODELS[name])
+        for integral in integrals[name].values():
+            total.merge(integral)
+
+        results[name] = {zone: integral.result(flow_rate) for zone, integral in integrals[name].items()}
+        results[name]["total"] = total.result(flow_rate)
+
+    return results
+
+
+def table(results):
+    lines = [f'{"model":<14} {"zone":<12} {"cells":>10} {"mean (Pa)":>10} {"max (Pa)":>10} {"HI (%)":>10}']
+    for model, zones in results.items():
+        for zone, result in zones.items():
+            hi = f'{result["hemolysis_index"]:.3e}' if result["hemolysis_index"] is not None else "-"
+            mean = f'{result["mean_stress"]:.2f}' if result["mean_stress"] is not None else "-"
+            lines.append(f'{model:<14} {zone:<12} {result["cells"]:>10} {mean:>10} '
+                         f'{result["max_stress"]:>10.2f} {hi:>10}')
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from field_export import FieldArrays
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fields", help="field export folder")
+    parser.add_argument("--zones", nargs="*", default=None, help="cell zones, all if not given")
+    parser.add_argument("--models", nargs="*", default=list(MODELS), choices=list(MODELS),
+                        help="damage models")
+    parser.add_argument("--flow_rate", default=None, type=float, action="store",
+                        help="volumetric flow rate in m^3/s")
+    parser.add_argument("--viscosity", default=BLOOD_VISCOSITY, type=float, action="store",
+                        help="blood viscosity in Pa s")
+    parser.add_argument("--output", default=None, action="store", help="json file for the results")
+    args = parser.parse_args()
+
+    results = zone_hemolysis(FieldArrays(args.fields), args.zones, args.models,
+                             args.flow_rate, viscosity=args.viscosity)
+    print(table(results))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
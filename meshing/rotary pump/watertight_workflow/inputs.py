@@ -66,6 +66,33 @@ OUTLET_MASSRATE=0
 
 RESIDUAL_CRITERIA=0.0001
 
+#iteration: runs ITERATION_CHUNK iterations at a time, then checks every iteration of the chunk
+#and stops once the residuals meet RESIDUAL_CRITERIA and the monitors stay within
+#MONITOR_TOLERANCE over MONITOR_WINDOW iterations
+MAX_ITERATIONS=1000
+ITERATION_CHUNK=25
+HEAD_REPORT="pump-head" #area weighted static pressure rise from inlet to outlet, Pa
+TORQUE_REPORT="pump-torque" #moment of the rotor walls about the rotation axis, N m
+TORQUE_ZONES=[BLADES_GRP, "rot_walls"]
+ROTATION_AXIS=[0, 0, 1]
+ROTATION_ORIGIN=[0, 0, 0]
+MONITORS=[HEAD_REPORT, TORQUE_REPORT]
+MONITOR_TOLERANCE=0.001
+MONITOR_WINDOW=50
+
+#field export: face values on surfaces and solution variables in cell zones, written to
+#save_dir/fields_<uuid> as numpy arrays of EXPORT_PRECISION
+EXPORT_SURFACES = [INLET_NAME, OUTLET_NAME] + WALLS
+EXPORT_SURFACE_FIELDS = ["pressure", "velocity-magnitude", "wall-shear", "strain-rate-mag"]
+EXPORT_ZONES = [ROT_ENC, STAT_ENC]
+EXPORT_VARIABLES = ["SV_P", "SV_U", "SV_V", "SV_W", "SV_CENTROID", "SV_VOLUME", "SV_STRAIN_RATE_MAG"]
+EXPORT_PRECISION = "float32"
+
+#hemolysis of the exported cell zones, see hemolysis.MODELS, with the flow rate from FLOW_REPORT
+FLOW_REPORT="outlet-volume-flow" #volume flow through the outlet, m^3/s
+HEMOLYSIS_MODELS = ["giersiepen", "heuser_opitz", "zhang", "fraser"]
+BLOOD_VISCOSITY = 0.0035 #Pa s
+
 
 #for discord updates:
 DISCORD_WEBHOOK =  "https://discord.com/api/webhooks/1307534355232587817/V3ZqQXFCrOEoA0477lQj3-EccHeztedK2K4DiNWYFcy-2z9VEtN-l5yYvia2uGKr4QHd"
@@ -1,6 +1,6 @@
 from pathlib import Path
-import ansys.fluent.core as pyfluent
 import os
+import sqlite3
 import psutil
 
 #constants
@@ -9,19 +9,39 @@ from inputs import *
 #updates
 from updates import Updates
 
+from settings_batch import SettingsBatch
+
 #misc
 from misc import *
 import uuid
 
+#shared helpers from the rotary pump folder
+import paths
+import mesh_cache
+import profiling
+import resources
+import run_registry
+
 """
 Code made using fluent api reference:
 for meshing refer: 
     _datamodel = ansys.fluent.core.meshing
 """
 
+#SURFACE_MESH_PARAMS names of the cfd_surface_mesh_controls arguments
+SURFACE_MESH_CONTROLS = {
+    "CurvatureNormalAngle": "curvature_normal_angle",
+    "GrowthRate": "growth_rate",
+    "MaxSize": "max_size",
+    "MinSize": "min_size",
+    "SizeFunctions": "size_functions",
+    "CellsPerGaps": "cells_per_gap",
+    "ScopeProximityTo": "scope_proximity_to",
+}
+
 class Mesh:
 
-    def __init__(self,verbose=False,show_gui =True):
+    def __init__(self,verbose=False,show_gui =True, pool=None, export_mesh=True):
         self.save_dir  = SAVE_DIR
         self.scdoc_file_path= GEOM_FILE_PATH
         self.file_name_noext = os.path.basename(self.scdoc_file_path)
@@ -33,6 +53,10 @@ class Mesh:
         self.updates = Updates(self.verbose)
         self.show_gui = show_gui
         self.uuid=  uuid.uuid4()
+        self.export_mesh = export_mesh #write the mesh file, not needed when handing the session to the solver
+        self.mesh_file = None
+        self.run_log = RunLog(self.save_path, self.uuid) #task params, read back with misc.read_runs
+        self.pool = pool #optional session_pool.SessionPool, sessions are borrowed instead of launched
 
     @staticmethod
     def get_cores():
@@ -41,16 +65,26 @@ class Mesh:
         pass
         
         
-    def initialise(self):
-        #fluent setup
-        self.session= pyfluent.launch_fluent(
+    def launch_kwargs(self):
+        import ansys.fluent.core as pyfluent
+
+        return dict(
             mode="meshing",
             precision=pyfluent.Precision.DOUBLE,
             processor_count=self.processors,
             cleanup_on_exit=False,
             ui_mode="gui" if self.show_gui else None,
             py=True
-        )   
+        )
+
+    def initialise(self):
+        #fluent setup
+        if self.pool is not None:
+            self.session = self.pool.acquire()
+        else:
+            import ansys.fluent.core as pyfluent
+
+            self.session= pyfluent.launch_fluent(**self.launch_kwargs())
         self.workflow = self.session.watertight()
         print("workflow initiated")
         return True
@@ -76,24 +110,19 @@ class Mesh:
         
         self.add_local_sizing = self.workflow.add_local_sizing
 
-        for i in range(len(FACESIZES)):
-
-            facesize = FACESIZES[i]
-            #self.append_default_values(taskObject=self._add_local_sizing,variables= facesize)
-            self.add_local_sizing.add_child = "yes"
-            self.add_local_sizing.boi_execution = 'Face Size' #wt.add_local_sizing.boi_execution.allowed_values() to get allowed values
-            self.add_local_sizing.boi_zoneor_label = 'label'
+        #each sizing is added with all its arguments in one call
+        with SettingsBatch("local sizings") as batch:
+            for facesize in FACESIZES:
+                batch.add_child(self.add_local_sizing, {
+                    "add_child": "yes",
+                    "boi_execution": "Face Size", #wt.add_local_sizing.boi_execution.allowed_values() to get allowed values
+                    "boi_zoneor_label": "label",
+                    "boi_control_name": facesize["Name"],
+                    #"boi_growth_rate": facesize["GrowthRate"],
+                    #"boi_size": facesize["TargetMeshSize"],
+                    "boi_face_label_list": facesize["FaceLabelList"],
+                })
 
-
-            self.add_local_sizing.boi_control_name = facesize["Name"]
-            #self.add_local_sizing.boi_growth_rate =  facesize["GrowthRate"]
-            #self.add_local_sizing.boi_size =  facesize["TargetMeshSize"]
-            self.add_local_sizing.boi_face_label_list =  facesize["FaceLabelList"]
-
-
-            self.add_local_sizing.add_child_and_update()
-
-        
         print("local sizings added")
 
 
@@ -105,18 +134,15 @@ class Mesh:
         
         self.generate_surface_mesh = self.workflow.create_surface_mesh
         self.surf_mesh_controls =  self.generate_surface_mesh.cfd_surface_mesh_controls
-        #ASSIGNS DEFAULT VALUES TO THE PARAMS
-        self.surf_mesh_controls.min_size.default_value()
-        self.surf_mesh_controls.max_size.default_value()
-        self.surf_mesh_controls.growth_rate()                                                                           #check
-        self.surf_mesh_controls.size_functions.default_value()
-        self.surf_mesh_controls.curvature_normal_angle.default_value()
-        self.surf_mesh_controls.cells_per_gap.default_value()
-        self.surf_mesh_controls.scope_proximity_to.default_value()
+        #controls from SURFACE_MESH_PARAMS set in one call, -1 keeps the fluent default
+        with SettingsBatch("surface mesh controls") as batch:
+            batch.set(self.surf_mesh_controls, {
+                SURFACE_MESH_CONTROLS[name]: value for name, value in SURFACE_MESH_PARAMS.items()
+                if value != -1})
 
         sim_params = self.surf_mesh_controls.get_state()
 
-        write_sim_params(self.create_surface_mesh, sim_params)
+        self.run_log.write(self.create_surface_mesh, sim_params)
 
 
         self.generate_surface_mesh()
@@ -161,6 +187,7 @@ class Mesh:
         self.share_topology.gap_distance.default_value()
 
         sim_params = self.share_topology.get_state() #get default values from here then adjust according to 
+        self.run_log.write(self.invoke_share_topology, sim_params)
         self.share_topology()
         return True
 
@@ -240,25 +267,90 @@ class Mesh:
         self.generate_volume_mesh.Execute()
 
     def save_mesh(self):
-        pass
-    
+        #written straight into save_dir, which the fluent process writes to like its other outputs.
+        #write_mesh blocks the session, so it can not overlap with solver setup in the same fluent
+        #process; with handoff the mesh file is skipped instead (export_mesh=False)
+        if not self.export_mesh:
+            return
+        self.mesh_file = self.save_path / f"{Path(self.file_name_noext).stem}_{self.uuid}.msh"
+        self.save_path.mkdir(parents=True, exist_ok=True)
+        self.session.tui.file.write_mesh(str(self.mesh_file))
+
     def mesh_to_solver(self):
-        # Switch to the Solver Mode
+        # Switch to the Solver Mode, the mesh stays loaded in the same fluent process
         self.session = self.session.switch_to_solver()
 
-    def run_meshing(self):
-        self.initialise()
-        self.import_geom()
-        self.add_local_sizings()
-        self.create_surface_mesh()
-        self.describe_geom()
-        self.invoke_share_topology()
-        self.update_regions()
-        self.update_boundaries()
-        self.add_BL()
-        self.generate_volume_mesh()
-        self.save_mesh()
-        self.session.exit()      
+    def close_session(self, healthy=True):
+        #pooled sessions go back to the pool, reset for the next job
+        if self.pool is not None:
+            self.pool.release(self.session, healthy)
+        else:
+            self.session.exit()
+
+    def watch_fluent(self):
+        #sample the fluent processes of the session, this process stays sampled when they can not be found
+        pid = resources.fluent_pid(self.session)
+        if pid is not None:
+            self.profiler.watch(pid)
+
+    def run_meshing(self, handoff=False):
+        #wall time, cpu and memory of each step are written to save_dir/mesh_profile.json
+        #handoff keeps fluent running and switches it to the solver instead of closing it
+        if handoff and self.pool is not None:
+            raise ValueError("handoff switches the session to solver mode, it can not go back to the pool")
+        self.profiler = profiling.Profiler(self.save_path)
+        self.profiler.watch(os.getpid())
+        self.session = None
+        try:
+            with self.profiler.stage("initialise"):
+                self.initialise()
+            self.watch_fluent()
+
+            steps = [self.import_geom, self.add_local_sizings, self.create_surface_mesh,
+                     self.describe_geom, self.invoke_share_topology,
+                     self.update_boundaries_and_regions, self.update_boundaries, self.add_BL,
+                     self.generate_volume_mesh, self.save_mesh]
+            if handoff:
+                steps.append(self.mesh_to_solver)
+            for step in steps:
+                with self.profiler.stage(step.__name__):
+                    step()
+        except Exception:
+            if self.session is not None:
+                self.close_session(healthy=False)
+            raise
+        finally:
+            self.run_log.flush()
+            self.profiler.write("mesh_profile")
+            print(self.profiler.table())
+        if not handoff:
+            self.close_session()
+        self.register()
+
+    def register(self, path=run_registry.REGISTRY):
+        #record the run in the run registry, searchable by the logged task params
+        self.run_log.flush()
+        config = {"geometry": self.scdoc_file_path}
+        records = read_runs(self.run_log.path) if self.run_log.path.exists() else []
+        for record in records:
+            config[record["task"]] = record["params"]
+
+        geometry = Path(self.scdoc_file_path)
+        try:
+            with run_registry.Registry(path) as registry:
+                registry.add(
+                    run_id=str(self.uuid),
+                    kind="watertight",
+                    working_folder=self.save_path,
+                    config=config,
+                    config_hash=mesh_cache.config_hash(config),
+                    geometry_hash=mesh_cache.file_hash(geometry) if geometry.is_file() else None,
+                    mesh_file=self.mesh_file,
+                    timings={row["stage"]: row["wall_time"] for row in self.profiler.summary()},
+                    artifacts={"run_log": str(self.run_log.path),
+                               "profile": str(self.save_path / "mesh_profile.json")})
+        except sqlite3.Error as error:
+            print(f"Run {self.uuid} was not registered: {error}")
 
 
 if __name__ =="__main__":
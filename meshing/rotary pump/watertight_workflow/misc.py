@@ -1,6 +1,8 @@
 import atexit
+import json
 import psutil
 import os
+import time
 from pathlib import Path
 
 
@@ -18,28 +20,86 @@ def cleanup_fluent():
     atexit.register(_delete_exiting_threads)
 
 
-def write_sim_params(task, params:dict):
+class RunLog:
+    def __init__(self, folder, job):
+        """
+        Append only log of the parameters each task of a run used, one json
+        line per task in a file of its own per job, so concurrent jobs never
+        write to the same file.
+
+        The file is opened on the first write and kept open, lines are
+        buffered and flushed when the log is closed or the process exits.
+
+        :param folder: (os.Pathlike) folder the log is written to.
+        :param job: job id, e.g. the run uuid.
+        """
+        self.job = str(job)
+        self.path = Path(folder) / f"run_log_{self.job}.jsonl"
+        self.file = None
+
+    def write(self, task, params: dict, **fields):
+        """
+        Log the parameters of a task.
+
+        :param task: (str) task name, or the method that ran it.
+        :param params: (dict) task parameters, values json can not store are
+            written as strings.
+        :param fields: other values to store with the record, e.g. mesh_file.
+        """
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.path, "a", encoding="utf-8")
+            atexit.register(self.close)
+
+        record = {"time": time.time(), "job": self.job,
+                  "task": getattr(task, "__name__", str(task)),
+                  "params": params, **fields}
+        self.file.write(json.dumps(record, default=str) + "\n")
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def read_runs(paths, task=None, **params):
     """
-    compiles all params specified or not in ansys
+    Stream the records of run logs, reading a line at a time.
+
+    :param paths: (os.Pathlike | list) run log files, or folders to search for them.
+    :param task: (str) only records of this task.
+    :param params: parameter values records must have, e.g. max_size=2.625. A
+        callable is used as a test of the value instead.
+    :return: generator of (dict) records.
     """
-    file_path = Path("sim_params.txt")
-    if file_path.is_file():
-        with open(file_path, "a") as file:
-
-            file.write(f'task: {task}')
-            for key, value in params.items():
-                file.write(f'\t{key}: {value}')
-            
-            file.close()
-    else:
-        with open(file_path,"x") as file:
-            file.write(f'task: {task}')
-            for key, value in params.items():
-                file.write(f'\t{key}: {value}')
-            
-            file.close()
-    
-    print("Task params of {task} added to {file_path}")
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+
+    # skip lines of other tasks without parsing them
+    needle = json.dumps({"task": task})[1:-1] if task is not None else None
 
+    for path in map(Path, paths):
+        files = sorted(path.rglob("run_log_*.jsonl")) if path.is_dir() else [path]
+        for file_path in files:
+            with open(file_path, encoding="utf-8") as file:
+                for line in file:
+                    if needle is not None and needle not in line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # line cut short by a crashed run
+                    if task is not None and record["task"] != task:
+                        continue
+                    if all(matches(record["params"], key, value) for key, value in params.items()):
+                        yield record
 
 
+def matches(params: dict, key, value):
+    if key not in params:
+        return False
+    return value(params[key]) if callable(value) else params[key] == value
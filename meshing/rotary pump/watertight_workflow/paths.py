@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+#the rotary pump folder holds the helpers shared with auto_mesh, e.g. profiling and mesh_export.
+#modules using them import this first, so they work whichever script was started.
+ROTARY_PUMP = Path(__file__).resolve().parents[1]
+
+if str(ROTARY_PUMP) not in sys.path:
+    sys.path.append(str(ROTARY_PUMP))
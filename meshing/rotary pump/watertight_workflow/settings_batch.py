@@ -0,0 +1,91 @@
+import copy
+
+
+class SettingsBatch:
+    def __init__(self, name="settings"):
+        """
+        Collects settings assignments locally and applies each object's in a
+        single call, instead of one remote call per attribute.
+
+            with SettingsBatch("residuals") as batch:
+                for equation in equations:
+                    batch.set(residuals, {equation: {"absolute_criteria": 1e-4}})
+
+        :param name: (str) name used in the round trip report.
+        """
+        self.name = name
+        self.pending = {}
+        self.assignments = 0
+        self.calls = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.apply()
+            self.report()
+
+    def set(self, obj, state: dict = None, **attributes):
+        """
+        Record assignments to a settings or workflow object, applied with
+        obj.set_state(state). Later values replace earlier ones, nested
+        dicts are merged.
+
+        :param obj: pyfluent settings or datamodel object.
+        :param state: (dict) values by attribute name.
+        :param attributes: more values by attribute name.
+        """
+        state = dict(state or {}, **attributes)
+        _, pending = self.pending.setdefault(id(obj), (obj, {}))
+
+        merge(pending, copy.deepcopy(state))
+        self.assignments += count(state)
+
+    def add_child(self, task, state: dict = None, **attributes):
+        """
+        Add a child to a workflow task, e.g. a local sizing, setting all its
+        arguments in the add_child_and_update call.
+
+        :param task: pyfluent workflow task.
+        :param state: (dict) arguments by name.
+        :param attributes: more arguments by name.
+        """
+        state = dict(state or {}, **attributes)
+
+        task.add_child_and_update(state=state)
+        # each argument would have been set by its own call before the update
+        self.assignments += count(state) + 1
+        self.calls += 1
+
+    def apply(self):
+        """
+        Apply the recorded assignments, one set_state call per object.
+        """
+        for obj, state in self.pending.values():
+            obj.set_state(state)
+            self.calls += 1
+
+        self.pending = {}
+
+    @property
+    def saved(self):
+        return self.assignments - self.calls
+
+    def report(self):
+        print(f"{self.name}: {self.calls} calls for {self.assignments} assignments, "
+              f"{self.saved} round trips saved")
+
+
+def merge(target: dict, state: dict):
+    for key, value in state.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge(target[key], value)
+        else:
+            target[key] = value
+
+
+def count(state: dict):
+    #number of leaf values, each one a remote call when assigned directly
+    return sum(count(value) if isinstance(value, dict) and value else 1
+               for value in state.values())
@@ -1,33 +1,51 @@
 from pathlib import Path
 
-import ansys.fluent.core as pyfluent
-from ansys.fluent.core import examples
-from ansys.fluent.visualization import set_config
-import ansys.fluent.visualization.pyvista as pv
-
 #internal modules
 from mesh import Mesh
 
 #constants
 from inputs import *
 
-#updates
-from meshing.updates import send_update
+from settings_batch import SettingsBatch
+from convergence import ConvergenceCheck, DivergenceError, IterationDriver
+from field_export import FieldArrays, FieldExport
+import hemolysis
+
+#equations whose residuals are checked for convergence
+RESIDUAL_EQUATIONS = ["continuity", "x-velocity", "y-velocity", "z-velocity", "k", "epsilon"]
+
+import json
+import os
+
+#shared helpers from the rotary pump folder
+import paths
+import profiling
 
 class Solver(Mesh):
-        def __init__(self):
-            super().__init__() #inherit variables/methods set in mesh
+        def __init__(self, verbose=False, show_gui=True, pool=None, export_mesh=None):
+            #export_mesh None writes the mesh file only when run_simulation launches a separate solver
+            super().__init__(verbose=verbose, show_gui=show_gui, pool=pool,
+                             export_mesh=export_mesh) #inherit variables/methods set in mesh
             # Define Constants class variables
             self.density = DENSITY
             self.inlet_pressure = INLET_PRESSURE 
             self.inlet_area = INLET_AREA
 
         def start_solver(self):
+            import ansys.fluent.core as pyfluent
+
             self.session = pyfluent.launch_fluent(mode="solution",
-                                              precision=self.precision,
+                                              precision=pyfluent.Precision.DOUBLE,
                                               processor_count=self.processors,
                                               show_gui=self.show_gui)
 
+        def read_mesh(self):
+            #only needed when the solver is launched on its own
+            if self.mesh_file is None or not Path(self.mesh_file).is_file():
+                raise FileNotFoundError(f"No mesh file to solve ({self.mesh_file}), "
+                                        f"mesh with export_mesh=True or use handoff")
+            self.session.settings.file.read_mesh(file_name=str(self.mesh_file))
+
         def set_materials(self):
             # Define Materials
             
@@ -64,48 +82,58 @@ class Solver(Mesh):
             self.session.tui.solve.set.discretization_scheme("epsilon", 1)
             self.session.tui.solve.initialize.set_defaults("k", 0.000001)
 
-            self.session.settings.solution.monitor.residual.equations["continuity"].absolute_criteria = (
-                RESIDUAL_CRITERIA
-            )
-            self.session.settings.solution.monitor.residual.equations["x-velocity"].absolute_criteria = (
-                RESIDUAL_CRITERIA
-            )
-            self.session.settings.solution.monitor.residual.equations["y-velocity"].absolute_criteria = (
-                RESIDUAL_CRITERIA
-            )
-            self.session.settings.solution.monitor.residual.equations["z-velocity"].absolute_criteria = (
-                RESIDUAL_CRITERIA
-            )
-            self.session.settings.solution.monitor.residual.equations["k"].absolute_criteria = RESIDUAL_CRITERIA
-            self.session.settings.solution.monitor.residual.equations["epsilon"].absolute_criteria = (
-                RESIDUAL_CRITERIA
-            )
+            #all residual criteria in one set_state call
+            equations = self.session.settings.solution.monitor.residual.equations
+            with SettingsBatch("residual criteria") as batch:
+                for equation in RESIDUAL_EQUATIONS:
+                    batch.set(equations, {equation: {"absolute_criteria": RESIDUAL_CRITERIA}})
 
         def set_report_defs(self):
-        
-            # Define Report Definitions
-        
+            # Define Report Definitions, the pump head and torque are the monitors that must settle
+            report_definitions = self.session.settings.solution.report_definitions
 
-            self.session.settings.solution.report_definitions.drag["cd-mon1"] = {}
-            self.session.settings.solution.report_definitions.drag["cd-mon1"] = {
-                "zones": ["wall_ahmed_body_main", "wall_ahmed_body_front", "wall_ahmed_body_rear"],
-                "force_vector": [0, 0, 1],
+            report_definitions.expression[HEAD_REPORT] = {
+                "define": f"AreaAve(StaticPressure, ['{OUTLET_NAME}']) - AreaAve(StaticPressure, ['{INLET_NAME}'])",
             }
-            self.session.parameters.output_parameters.report_definitions.create(name="parameter-1")
-            self.session.parameters.output_parameters.report_definitions["parameter-1"] = {
-                "report_definition": "cd-mon1"
+            report_definitions.moment[TORQUE_REPORT] = {
+                "zones": TORQUE_ZONES,
+                "mom_center": ROTATION_ORIGIN,
+                "mom_axis": ROTATION_AXIS,
+            }
+            report_definitions.surface[FLOW_REPORT] = {
+                "report_type": "surface-volumeflowrate",
+                "surface_names": [OUTLET_NAME],
             }
 
-            self.session.settings.solution.monitor.report_plots.create(name="cd-mon1")
-            self.session.settings.solution.monitor.report_plots["cd-mon1"] = {"report_defs": ["cd-mon1"]}
+            for report in MONITORS:
+                self.session.parameters.output_parameters.report_definitions.create(name=f"{report}-parameter")
+                self.session.parameters.output_parameters.report_definitions[f"{report}-parameter"] = {
+                    "report_definition": report
+                }
+                self.session.settings.solution.monitor.report_plots.create(name=report)
+                self.session.settings.solution.monitor.report_plots[report] = {"report_defs": [report]}
 
         def run_solver(self):
         # Initialize and Run Solver
 
-            self.session.settings.solution.run_calculation.iter_count = 5
             self.session.settings.solution.initialization.initialization_type = "standard"
             self.session.settings.solution.initialization.standard_initialize()
-            self.session.settings.solution.run_calculation.iterate(iter_count=5)
+
+            #the driver decides when to stop, fluent's own check would stop before the monitors settle
+            self.session.settings.solution.monitor.residual.options.criterion_type = "none"
+
+            check = ConvergenceCheck(RESIDUAL_CRITERIA, MONITORS, MONITOR_TOLERANCE, MONITOR_WINDOW)
+            driver = IterationDriver(self.session, check, MAX_ITERATIONS, ITERATION_CHUNK)
+            try:
+                self.converged, self.iterations = driver.run()
+            except DivergenceError as error:
+                self.updates.send_update("solver", str(error))
+                raise
+            finally:
+                check.write(self.save_path / f"convergence_{self.uuid}.json")
+
+            self.updates.send_update("solver", f"{'converged' if self.converged else 'not converged'} "
+                                               f"after {self.iterations} iterations")
 
         def post_process(self):
             # Post-Processing Workflow
@@ -113,6 +141,9 @@ class Solver(Mesh):
             self.session.results.surfaces.iso_surface["xmid"].field = "x-coordinate"
             self.session.results.surfaces.iso_surface["xmid"] = {"iso_values": [0]}
 
+            # pyvista and vtk take seconds to import, only load them for plots
+            import ansys.fluent.visualization.pyvista as pv
+
             self.graphics_session1 = pv.Graphics(self.session)
             self.contour1 = self.graphics_session1.Contours["contour-1"]
             self.contour1.field = "velocity-magnitude"
@@ -125,6 +156,31 @@ class Solver(Mesh):
             contour2.surfaces_list = ["xmid"]
             contour2.display("window-2")
 
+        def export_fields(self):
+            #headless replacement for post_process, the arrays are read back with field_export.FieldArrays
+            self.fields_folder = self.save_path / f"fields_{self.uuid}"
+            self.fields_folder.mkdir(parents=True, exist_ok=True)
+
+            export = FieldExport(self.fields_folder, EXPORT_PRECISION)
+            export.surfaces(self.session, EXPORT_SURFACES, EXPORT_SURFACE_FIELDS)
+            export.cell_zones(self.session, EXPORT_ZONES, EXPORT_VARIABLES)
+            print(f"Fields exported to {export.close(run=str(self.uuid), mesh_file=str(self.mesh_file))}")
+
+        def compute_hemolysis(self):
+            #volume weighted blood damage of each exported cell zone, the index needs the flow rate
+            reports = self.session.settings.solution.report_definitions.compute(report_defs=[FLOW_REPORT])
+            #volume flow straight from fluent, the density set up in set_materials is not blood's
+            flow_rate = abs(float(reports[0][FLOW_REPORT][0]))
+            if not flow_rate > 0:
+                raise ValueError(f"{FLOW_REPORT} is {flow_rate} m^3/s, the hemolysis index needs a flow through the pump")
+
+            results = hemolysis.zone_hemolysis(FieldArrays(self.fields_folder), EXPORT_ZONES,
+                                               HEMOLYSIS_MODELS, flow_rate, viscosity=BLOOD_VISCOSITY)
+            print(hemolysis.table(results))
+
+            with open(self.save_path / f"hemolysis_{self.uuid}.json", "w") as f:
+                json.dump(results, f, indent=2)
+
         def save_case_files(self):
 
             
@@ -135,20 +191,39 @@ class Solver(Mesh):
 
             self.session.exit()
 
-        def run_solver(self):
-            try:    
-                self.start_solver()
-                self.set_materials()
-                self.set_BCs()
-                self.set_RVs()
-                self.set_solver_settings()
-                self.set_report_defs()
-                self.run_solver()
-                self.save_case_files()
-            except:
-                send_update("meshing","meshing error")
+        def run_simulation(self, handoff=True):
+            #handoff meshes and solves in the same fluent session, otherwise the meshing
+            #session is closed and a solver is launched to read the saved mesh file
+            if self.export_mesh is None:
+                self.export_mesh = not handoff
+            self.run_meshing(handoff=handoff)
+
+            #wall time, cpu and memory of each step are written to save_dir/solve_profile.json
+            self.profiler = profiling.Profiler(self.save_path)
+            self.profiler.watch(os.getpid())
+
+            steps = [self.set_materials, self.set_BCs, self.set_RVs,
+                     self.set_solver_settings, self.set_report_defs, self.run_solver,
+                     self.export_fields, self.compute_hemolysis, self.save_case_files]
+            if handoff:
+                self.watch_fluent()
+            else:
+                steps = [self.start_solver, self.read_mesh] + steps
+            try:
+                for step in steps:
+                    with self.profiler.stage(step.__name__):
+                        step()
+                    if step == self.start_solver:
+                        self.watch_fluent()
+            except Exception as error:
+                #reported and raised, so callers can tell e.g. a diverged solve from a finished one
+                self.updates.send_update("solver", f"solver error: {type(error).__name__}: {error}")
+                raise
             else:
-                send_update("meshing","meshing successful")          
+                self.updates.send_update("solver","solver successful")
+            finally:
+                self.profiler.write("solve_profile")
+                print(self.profiler.table())
 
 
             
@@ -1,32 +1,191 @@
-import requests # dependency
+import atexit
+import collections
+import threading
+import time
+
 from inputs import DISCORD_WEBHOOK
 
+MAX_EMBEDS = 10 # discord accepts at most 10 embeds per message
+
+
 class Updates:
-    def __init__(self,verbose = False):
+    def __init__(self, verbose=False, webhook=DISCORD_WEBHOOK, buffer=100,
+                 batch_window=2.0, timeout=10.0, retries=5):
+        """
+        Sends run updates to a discord webhook from a background thread, so a
+        slow or rate limited webhook never holds up meshing or solving.
+
+        Updates arriving within batch_window of each other are sent as one
+        message. When the buffer is full the oldest update is dropped.
+
+        :param verbose: (Bool) send updates, otherwise send_update does nothing.
+        :param webhook: (str) webhook url.
+        :param buffer: (int) updates kept waiting to be sent.
+        :param batch_window: (float) seconds to wait for more updates before sending.
+        :param timeout: (float) seconds to wait for the webhook to respond.
+        :param retries: (int) attempts per message before it is dropped.
+        """
         self.verbose = verbose
-        self.webhook = DISCORD_WEBHOOK
+        self.webhook = webhook
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.retries = retries
+
+        self.pending = collections.deque(maxlen=buffer)
+        self.dropped = 0
+        self.sent = 0
+        self.condition = threading.Condition()
+        self.closed = False
+        self.sending = False
+        self.worker = None
 
-    def send_update(self,title, message):
+    def send_update(self, title, message):
+        """
+        Queue an update, returns without waiting for it to be sent.
+
+        :param title: (str) update title.
+        :param message: (str) update message.
+        """
         if not self.verbose:
             return "verbose set to False"
 
-        # for all params, see https://discordapp.com/developers/docs/resources/webhook#execute-webhook
-        data = {}
-
         # leave this out if you dont want an embed
         # for all params, see https://discordapp.com/developers/docs/resources/channel#embed-object
-        data["embeds"] = [
-            {
-                "description" : f'{title}',
-                "title" : f"{message}"
-            }
-        ]
-
-        result = requests.post(self.webhook, json = data)
-
-        try:
-            result.raise_for_status()
-        except requests.exceptions.HTTPError as err:
-            print(err)
-        else:
-            print(f"Payload delivered successfully, code {result.status_code}.")
\ No newline at end of file
+        embed = {
+            "description" : f'{title}',
+            "title" : f"{message}"
+        }
+
+        with self.condition:
+            if self.closed:
+                return "updates closed"
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.pending.append(embed)
+
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._run, name='updates', daemon=True)
+                self.worker.start()
+                atexit.register(self.close)
+            self.condition.notify()
+
+    def flush(self, timeout=None):
+        """
+        Wait for the queued updates to be sent.
+
+        :param timeout: (float) seconds to wait at most.
+        :return: (Bool) whether the queue was emptied.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self.condition:
+            while self.pending or self.sending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+
+        return True
+
+    def close(self, timeout=10.0):
+        """
+        Send what is queued and stop the worker.
+
+        :param timeout: (float) seconds to wait for the queued updates.
+        """
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+
+        if self.worker is not None:
+            self.worker.join(timeout)
+            if self.pending:
+                print(f"{len(self.pending)} updates were not sent")
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+
+            # let a burst of updates arrive before sending them together
+            if not self.closed:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.closed, self.batch_window)
+
+            with self.condition:
+                batch = [self.pending.popleft()
+                         for _ in range(min(MAX_EMBEDS, len(self.pending)))]
+                self.sending = True
+
+            try:
+                self._post(batch)
+            except Exception as err:
+                # a broken webhook must not stop the updates that follow
+                self.dropped += len(batch)
+                print(f"Dropped {len(batch)} updates: {err}")
+            finally:
+                with self.condition:
+                    self.sending = False
+                    self.condition.notify_all()
+
+    def _post(self, embeds):
+        import requests # dependency, only loaded once an update is sent
+
+        # for all params, see https://discordapp.com/developers/docs/resources/webhook#execute-webhook
+        data = {"embeds": embeds}
+        delay = 1.0
+
+        for _ in range(self.retries):
+            try:
+                result = requests.post(self.webhook, json = data, timeout=self.timeout)
+            except requests.exceptions.RequestException as err:
+                print(err)
+                wait = delay
+            else:
+                if result.status_code == 429:
+                    wait = retry_after(result, delay)
+                elif result.status_code >= 500:
+                    print(f"Webhook error, code {result.status_code}.")
+                    wait = delay
+                else:
+                    try:
+                        result.raise_for_status()
+                    except requests.exceptions.HTTPError as err:
+                        print(err)
+                    else:
+                        self.sent += len(embeds)
+                        print(f"Payload delivered successfully, code {result.status_code}.")
+                    return
+
+            if self.closed and wait > self.timeout:
+                break
+            time.sleep(wait)
+            delay = min(delay * 2, 60.0)
+
+        self.dropped += len(embeds)
+        print(f"Dropped {len(embeds)} updates after {self.retries} attempts")
+
+
+def retry_after(response, default):
+    """
+    Seconds a rate limited response asks to wait, from the discord json body
+    or the Retry-After header.
+
+    :param response: (requests.Response) 429 response.
+    :param default: (float) seconds to wait when the response does not say.
+    :return: (float)
+    """
+    try:
+        return float(response.json()["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        pass
+
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, TypeError, ValueError):
+        return default